@@ -0,0 +1,51 @@
+"""Add instance closure table
+
+Revision ID: cfdb16edbd1c
+Revises: 233e207e2773
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cfdb16edbd1c'
+down_revision: Union[str, Sequence[str], None] = '233e207e2773'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('instance_closure',
+    sa.Column('ancestor_id', sa.String(length=100), nullable=False),
+    sa.Column('descendant_id', sa.String(length=100), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['hopper_instances.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['descendant_id'], ['hopper_instances.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+    op.create_index('idx_instance_closure_descendant', 'instance_closure', ['descendant_id', 'depth'], unique=False)
+
+    # Backfill every (ancestor, descendant) pair from the parent links
+    op.execute(
+        """
+        WITH RECURSIVE pairs(ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM hopper_instances
+            UNION
+            SELECT pairs.ancestor_id, h.id, pairs.depth + 1
+            FROM hopper_instances h JOIN pairs ON h.parent_id = pairs.descendant_id
+        )
+        INSERT INTO instance_closure (ancestor_id, descendant_id, depth)
+        SELECT ancestor_id, descendant_id, depth FROM pairs
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_instance_closure_descendant', table_name='instance_closure')
+    op.drop_table('instance_closure')
@@ -0,0 +1,32 @@
+"""Add GIN index on task tags
+
+Revision ID: 5b8e2f4a9c31
+Revises: cfdb16edbd1c
+Create Date: 2026-10-17 12:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e2f4a9c31'
+down_revision: Union[str, Sequence[str], None] = 'cfdb16edbd1c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # GIN and jsonb_path_ops exist only on PostgreSQL
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.create_index('idx_tasks_tags', 'tasks', ['tags'], unique=False, postgresql_using='gin', postgresql_ops={'tags': 'jsonb_path_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('idx_tasks_tags', table_name='tasks')
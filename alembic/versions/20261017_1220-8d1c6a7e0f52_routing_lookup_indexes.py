@@ -0,0 +1,33 @@
+"""Add routing lookup indexes
+
+Revision ID: 8d1c6a7e0f52
+Revises: 5b8e2f4a9c31
+Create Date: 2026-10-17 12:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d1c6a7e0f52'
+down_revision: Union[str, Sequence[str], None] = '5b8e2f4a9c31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('idx_routing_decisions_project_decided_at', 'routing_decisions', ['project', 'decided_at'], unique=False)
+    op.create_index('idx_routing_decisions_decided_at', 'routing_decisions', ['decided_at'], unique=False)
+    op.create_index('idx_routing_decisions_confidence', 'routing_decisions', ['confidence'], unique=False)
+    op.create_index('idx_hopper_instances_parent_scope_status', 'hopper_instances', ['parent_id', 'scope', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_hopper_instances_parent_scope_status', table_name='hopper_instances')
+    op.drop_index('idx_routing_decisions_confidence', table_name='routing_decisions')
+    op.drop_index('idx_routing_decisions_decided_at', table_name='routing_decisions')
+    op.drop_index('idx_routing_decisions_project_decided_at', table_name='routing_decisions')
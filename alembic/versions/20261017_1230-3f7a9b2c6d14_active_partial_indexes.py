@@ -0,0 +1,36 @@
+"""Add partial indexes for available instances and active tasks
+
+Revision ID: 3f7a9b2c6d14
+Revises: 8d1c6a7e0f52
+Create Date: 2026-10-17 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f7a9b2c6d14'
+down_revision: Union[str, Sequence[str], None] = '8d1c6a7e0f52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    available = sa.text("status IN ('RUNNING', 'CREATED')")
+    active = sa.text("status IN ('pending', 'claimed', 'in_progress')")
+    op.create_index('idx_hopper_instances_available', 'hopper_instances', ['id'], unique=False, postgresql_where=available, sqlite_where=available)
+    # tasks.instance_id is not created by earlier revisions; databases
+    # built from the models have it
+    task_columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('tasks')}
+    if 'instance_id' in task_columns:
+        op.create_index('idx_tasks_instance_active', 'tasks', ['instance_id', 'created_at'], unique=False, postgresql_where=active, sqlite_where=active)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP INDEX IF EXISTS idx_tasks_instance_active')
+    op.drop_index('idx_hopper_instances_available', table_name='hopper_instances')
@@ -15,6 +15,8 @@ from typing import Annotated
 from fastapi import Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
+from hopper.database.connection import json_engine_options, pool_engine_options
+
 # Database configuration
 DATABASE_URL = os.getenv(
     "DATABASE_URL", "sqlite+aiosqlite:///./hopper.db"  # Default to SQLite for development
@@ -25,6 +27,9 @@ engine = create_async_engine(
     DATABASE_URL,
     echo=True if os.getenv("SQL_ECHO") == "true" else False,
     future=True,
+    # SQLite uses its own single-connection pool; size the pool for servers
+    **({} if DATABASE_URL.startswith("sqlite") else pool_engine_options()),
+    **json_engine_options(),
 )
 
 # Create async session factory
@@ -376,46 +376,27 @@ async def get_instance_hierarchy(
     Raises:
         NotFoundException: If instance not found
     """
-    # Get the instance with eager loading of children
-    query = select(HopperInstance).where(HopperInstance.id == instance_id)
-    result = await db.execute(query)
-    instance = result.scalar_one_or_none()
+    # Load the whole subtree up front; walking it below issues no queries
+    instance = await db.run_sync(
+        HopperInstance.load_tree, instance_id, with_tasks=False
+    )
 
     if not instance:
         raise NotFoundException("HopperInstance", instance_id)
 
-    async def build_tree(inst: HopperInstance, depth: int) -> InstanceHierarchyNode:
-        """Recursively build hierarchy tree."""
-        # Get children
-        children_query = select(HopperInstance).where(HopperInstance.parent_id == inst.id)
-        children_result = await db.execute(children_query)
-        children = children_result.scalars().all()
-
-        child_nodes = []
-        for child in children:
-            child_node = await build_tree(child, depth + 1)
-            child_nodes.append(child_node)
+    total = 0
 
+    def build_tree(inst: HopperInstance, depth: int) -> InstanceHierarchyNode:
+        """Recursively build hierarchy tree."""
+        nonlocal total
+        total += 1
         return InstanceHierarchyNode(
             instance=_instance_to_response(inst),
-            children=child_nodes,
+            children=[build_tree(child, depth + 1) for child in inst.children],
             depth=depth,
         )
 
-    # Count total instances in hierarchy
-    async def count_descendants(inst_id: str) -> int:
-        """Count all descendants."""
-        children_query = select(HopperInstance).where(HopperInstance.parent_id == inst_id)
-        children_result = await db.execute(children_query)
-        children = children_result.scalars().all()
-
-        count = len(children)
-        for child in children:
-            count += await count_descendants(child.id)
-        return count
-
-    root_node = await build_tree(instance, 0)
-    total = 1 + await count_descendants(instance_id)
+    root_node = build_tree(instance, 0)
 
     return InstanceHierarchy(root=root_node, total_instances=total)
 
@@ -5,7 +5,8 @@ Provides endpoints for feedback, patterns, and learning statistics.
 """
 
 from datetime import datetime, timedelta
-from typing import Any
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
 
 from fastapi import APIRouter, Depends, Query, status
 from sqlalchemy import func, select
@@ -28,6 +29,9 @@ from hopper.api.schemas.learning import (
 )
 from hopper.models import Task, TaskFeedback
 
+if TYPE_CHECKING:
+    from hopper.memory import WorkingMemory
+
 router = APIRouter()
 
 
@@ -36,6 +40,27 @@ router = APIRouter()
 # ============================================================================
 
 
+@lru_cache
+def _get_working_memory() -> "WorkingMemory":
+    """
+    Get the working memory shared by every request.
+
+    The learning engine caches pattern matches and suggestions in it, so it
+    must outlive a single request for those caches to be hit.
+    """
+    from hopper.config.settings import get_settings
+    from hopper.memory import WorkingMemory
+
+    settings = get_settings()
+    return WorkingMemory.from_config(
+        {
+            "backend": "redis" if settings.redis_enabled else "local",
+            "redis_url": settings.redis_url,
+            "default_ttl": settings.working_memory_ttl,
+        }
+    )
+
+
 def _get_sync_components(session: AsyncSession):
     """Get sync learning components from async session."""
     # Run sync operations using session.run_sync
@@ -56,6 +81,7 @@ def _get_sync_components(session: AsyncSession):
     feedback_analytics = FeedbackAnalytics(sync_session)
     learning_engine = LearningEngine(
         sync_session,
+        working_memory=_get_working_memory(),
         episodic_store=episodic_store,
         consolidated_store=consolidated_store,
         feedback_store=feedback_store,
@@ -8,6 +8,12 @@ configuration for both PostgreSQL (production) and SQLite (development).
 import os
 from collections.abc import AsyncGenerator, Generator
 from contextlib import asynccontextmanager, contextmanager
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
 
 from sqlalchemy import create_engine, event, pool
 from sqlalchemy.engine import Engine
@@ -46,6 +52,46 @@ def get_database_url(async_mode: bool = False) -> str:
     return url
 
 
+def _orjson_dumps(value: Any) -> str:
+    """Serialize a JSON column value with orjson."""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def json_engine_options() -> dict[str, Any]:
+    """
+    Get engine options for JSON column (de)serialization.
+
+    Uses orjson when installed, which is several times faster than the
+    stdlib json module on large snapshot/context payloads.
+
+    Returns:
+        Keyword arguments for create_engine / create_async_engine
+    """
+    if orjson is None:
+        return {}
+    return {"json_serializer": _orjson_dumps, "json_deserializer": orjson.loads}
+
+
+def pool_engine_options() -> dict[str, Any]:
+    """
+    Get connection-pool options for server databases (PostgreSQL).
+
+    Sized so concurrent routing/learning requests, which each hold a
+    connection briefly for small queries, don't queue behind each other.
+    Pool size and overflow can be tuned with DB_POOL_SIZE and DB_MAX_OVERFLOW.
+
+    Returns:
+        Keyword arguments for create_engine/create_async_engine
+    """
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),  # Connections to keep open
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),  # Extra connections under burst
+        "pool_timeout": 30,  # Seconds to wait for a free connection
+        "pool_pre_ping": True,  # Verify connections before using them
+        "pool_recycle": 1800,  # Recycle connections after 30 minutes
+    }
+
+
 def create_sync_engine(database_url: str | None = None, echo: bool = False) -> Engine:
     """
     Create a synchronous SQLAlchemy engine.
@@ -68,6 +114,7 @@ def create_sync_engine(database_url: str | None = None, echo: bool = False) -> E
             echo=echo,
             connect_args={"check_same_thread": False},  # Allow multi-threading
             poolclass=pool.StaticPool,  # Single connection pool for SQLite
+            **json_engine_options(),
         )
 
         # Enable foreign keys for SQLite
@@ -82,10 +129,8 @@ def create_sync_engine(database_url: str | None = None, echo: bool = False) -> E
         engine = create_engine(
             database_url,
             echo=echo,
-            pool_size=5,  # Number of connections to maintain
-            max_overflow=10,  # Maximum number of connections to create above pool_size
-            pool_pre_ping=True,  # Verify connections before using them
-            pool_recycle=3600,  # Recycle connections after 1 hour
+            **pool_engine_options(),
+            **json_engine_options(),
         )
 
     return engine
@@ -115,16 +160,15 @@ def create_async_engine_instance(
             echo=echo,
             connect_args={"check_same_thread": False},
             poolclass=pool.StaticPool,
+            **json_engine_options(),
         )
     else:
         # PostgreSQL with async support
         engine = create_async_engine(
             database_url,
             echo=echo,
-            pool_size=5,
-            max_overflow=10,
-            pool_pre_ping=True,
-            pool_recycle=3600,
+            **pool_engine_options(),
+            **json_engine_options(),
         )
 
     return engine
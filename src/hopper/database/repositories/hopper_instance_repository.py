@@ -83,28 +83,11 @@ class HopperInstanceRepository(BaseRepository[HopperInstance]):
         if not instance:
             return []
 
-        hierarchy = [instance]
-
-        # Get ancestors (walk up the tree)
-        current = instance
-        while current.parent_id:
-            parent = self.get(current.parent_id)
-            if parent:
-                hierarchy.insert(0, parent)
-                current = parent
-            else:
-                break
-
-        # Get descendants (walk down the tree)
-        def get_all_children(parent_id: str) -> list[HopperInstance]:
-            children = self.get_child_instances(parent_id)
-            all_descendants = list(children)
-            for child in children:
-                all_descendants.extend(get_all_children(child.id))
-            return all_descendants
-
-        descendants = get_all_children(instance_id)
-        hierarchy.extend(descendants)
+        # Get ancestors, root first
+        hierarchy = [*reversed(instance.get_ancestors()), instance]
+
+        # Get descendants in one recursive query
+        hierarchy.extend(HopperInstance.query_descendants(self.session, instance_id))
 
         return hierarchy
 
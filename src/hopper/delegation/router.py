@@ -267,13 +267,14 @@ class InstanceRouter:
         projects = result.scalars().all()
 
         # Check each project's config for matching capabilities
+        wanted = set(task_tags)
         for project in projects:
             config = project.config or {}
             capabilities = config.get("capabilities", [])
             tags = config.get("tags", [])
 
-            # Check for any overlap
-            if set(task_tags) & set(capabilities + tags):
+            # Check for any overlap, without building a set per project
+            if not (wanted.isdisjoint(capabilities) and wanted.isdisjoint(tags)):
                 return project
 
         return None
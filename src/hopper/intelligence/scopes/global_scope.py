@@ -8,7 +8,7 @@ Project instances. They never execute tasks directly.
 import logging
 from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from hopper.models import HopperInstance, HopperScope, InstanceStatus, Task, TaskStatus
@@ -194,12 +194,14 @@ class GlobalScopeBehavior(BaseScopeBehavior):
         projects = result.scalars().all()
 
         # Check each project for matching capabilities
+        wanted = set(task_tags)
         for project in projects:
             config = project.config or {}
             capabilities = config.get("capabilities", [])
             tags = config.get("tags", [])
 
-            if set(task_tags) & set(capabilities + tags):
+            # Check for any overlap, without building a set per project
+            if not (wanted.isdisjoint(capabilities) and wanted.isdisjoint(tags)):
                 return project
 
         return None
@@ -220,18 +222,25 @@ class GlobalScopeBehavior(BaseScopeBehavior):
                 )
             )
         )
+
+        if strategy == "least_loaded":
+            # Return project with fewest tasks, counted in the same query
+            # rather than by lazy-loading every project's task collection
+            task_count = (
+                select(func.count(Task.id))
+                .where(Task.instance_id == HopperInstance.id)
+                .correlate(HopperInstance)
+                .scalar_subquery()
+            )
+            rows = self.session.execute(query.add_columns(task_count)).all()
+            return min(rows, key=lambda row: row[1])[0] if rows else None
+
         result = self.session.execute(query)
         projects = list(result.scalars().all())
 
         if not projects:
             return None
 
-        if strategy == "round_robin":
-            # Simple: return the first one
-            # Could be enhanced with actual round-robin tracking
-            return projects[0]
-        elif strategy == "least_loaded":
-            # Return project with fewest active tasks
-            return min(projects, key=lambda p: len(p.tasks) if p.tasks else 0)
-        else:
-            return projects[0]
+        # round_robin, or an unknown strategy: return the first one
+        # Could be enhanced with actual round-robin tracking
+        return projects[0]
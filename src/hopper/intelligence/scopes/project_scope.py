@@ -7,7 +7,7 @@ directly or delegate to orchestration instances.
 
 import logging
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from hopper.models import HopperInstance, HopperScope, InstanceStatus, Task, TaskStatus
@@ -116,9 +116,16 @@ class ProjectScopeBehavior(BaseScopeBehavior):
 
         Prefers running instances, can create new ones if configured.
         """
-        # Find existing orchestration instances
+        # Find existing orchestration instances, counting each one's tasks
+        # in the same query rather than lazy-loading every task collection
+        task_count = (
+            select(func.count(Task.id))
+            .where(Task.instance_id == HopperInstance.id)
+            .correlate(HopperInstance)
+            .scalar_subquery()
+        )
         query = (
-            select(HopperInstance)
+            select(HopperInstance, task_count)
             .where(HopperInstance.parent_id == instance.id)
             .where(HopperInstance.scope == HopperScope.ORCHESTRATION)
             .where(
@@ -127,15 +134,12 @@ class ProjectScopeBehavior(BaseScopeBehavior):
                 )
             )
         )
-        result = self.session.execute(query)
-        orchestrations = list(result.scalars().all())
+        orchestrations = self.session.execute(query).all()
 
         if orchestrations:
             # Return the one with fewest tasks (simple load balance)
-            return min(
-                orchestrations,
-                key=lambda o: len(o.tasks) if o.tasks else 0,
-            )
+            least_loaded: HopperInstance = min(orchestrations, key=lambda row: row[1])[0]
+            return least_loaded
 
         return None
 
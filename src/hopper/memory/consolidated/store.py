@@ -204,6 +204,42 @@ class ConsolidatedStore:
 
         return pattern
 
+    def update_pattern_confidences(
+        self,
+        outcomes: list[tuple[str, bool]],
+    ) -> list[RoutingPattern]:
+        """
+        Apply a batch of usage outcomes to their patterns.
+
+        Patterns are loaded with one IN query and outcomes are applied in
+        order, so confidence evolves exactly as with one-at-a-time updates,
+        then all rows are written in a single flush.
+
+        Args:
+            outcomes: (pattern_id, success) pairs, oldest first
+
+        Returns:
+            Updated patterns (unknown pattern IDs are skipped)
+        """
+        if not outcomes:
+            return []
+
+        query = select(RoutingPattern).where(
+            RoutingPattern.id.in_({pattern_id for pattern_id, _ in outcomes})
+        )
+        patterns = {pattern.id: pattern for pattern in self.session.execute(query).scalars()}
+
+        for pattern_id, success in outcomes:
+            pattern = patterns.get(pattern_id)
+            if pattern is not None:
+                pattern.record_usage(success)
+
+        self.session.flush()
+
+        logger.info(f"Applied {len(outcomes)} outcomes to {len(patterns)} patterns")
+
+        return list(patterns.values())
+
     def deactivate_pattern(self, pattern_id: str) -> bool:
         """
         Deactivate a pattern.
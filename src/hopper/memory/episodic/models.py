@@ -6,8 +6,9 @@ Defines the RoutingEpisode model for recording routing decisions.
 
 from datetime import datetime
 from typing import Any
+from uuid import uuid4
 
-from sqlalchemy import DateTime, Float, ForeignKey, String, Text, Boolean
+from sqlalchemy import DateTime, Float, ForeignKey, Index, String, Text, Boolean
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.types import JSON
@@ -15,6 +16,11 @@ from sqlalchemy.types import JSON
 from hopper.models.base import Base, TimestampMixin
 
 
+def generate_episode_id() -> str:
+    """Generate a new routing episode ID."""
+    return f"ep-{uuid4().hex[:12]}"
+
+
 class RoutingEpisode(Base, TimestampMixin):
     """
     Model for recording routing episodes.
@@ -26,14 +32,15 @@ class RoutingEpisode(Base, TimestampMixin):
     __tablename__ = "routing_episodes"
 
     # Primary key
-    id: Mapped[str] = mapped_column(String(100), primary_key=True)
+    id: Mapped[str] = mapped_column(
+        String(100), primary_key=True, default=generate_episode_id
+    )
 
     # Link to task and routing decision
     task_id: Mapped[str] = mapped_column(
         String(50),
         ForeignKey("tasks.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
     decision_task_id: Mapped[str | None] = mapped_column(
         String(50),
@@ -48,6 +55,12 @@ class RoutingEpisode(Base, TimestampMixin):
         nullable=False,
     )
 
+    # Tag names normalized at write time (queryable copy of task_snapshot["tags"])
+    tags_set: Mapped[list[str] | None] = mapped_column(
+        JSONB().with_variant(JSON(), "sqlite"),
+        nullable=True,
+    )
+
     # Routing context at decision time
     available_instances: Mapped[list[str]] = mapped_column(
         JSONB().with_variant(JSON(), "sqlite"),
@@ -106,6 +119,17 @@ class RoutingEpisode(Base, TimestampMixin):
         "TaskFeedback", foreign_keys=[feedback_id]
     )
 
+    # Indexes matching the listing queries (filter + ORDER BY routed_at DESC LIMIT N)
+    __table_args__ = (
+        Index("idx_routing_episodes_success_routed", "outcome_success", "routed_at"),
+        Index("idx_routing_episodes_instance_routed", "chosen_instance", "routed_at"),
+        # Also serves plain task_id lookups, so task_id has no index of its own
+        Index("idx_routing_episodes_task_routed", "task_id", "routed_at"),
+        Index(
+            "idx_routing_episodes_tags_set", "tags_set", postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
+
     def __repr__(self) -> str:
         return (
             f"<RoutingEpisode(id={self.id}, task_id={self.task_id}, "
@@ -3,35 +3,64 @@ Episodic store for routing episode management.
 """
 
 import logging
+from collections.abc import Sequence
 from datetime import datetime, timedelta
-from typing import Any
-from uuid import uuid4
+from typing import Any, cast
+from weakref import WeakKeyDictionary
 
-from sqlalchemy import select, and_, or_, func
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, lambda_stmt, select, and_, or_, func
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import CursorResult, Engine
+from sqlalchemy.orm import Session, defer
 
 from hopper.models import RoutingDecision, Task, TaskFeedback
 
+from ..working.backends import LocalBackend
 from .models import RoutingEpisode
 
 logger = logging.getLogger(__name__)
 
+# get_statistics results, shared by every store in the process (the API
+# builds a store per request) and keyed by arguments. Each engine has its
+# own cache, so separate databases never read each other's results, even
+# in-memory SQLite ones with the same URL. Writes through any store clear
+# them.
+_STATS_CACHES: WeakKeyDictionary[Engine, LocalBackend] = WeakKeyDictionary()
+
+
+def _statistics_cache(engine: Engine) -> LocalBackend:
+    """Get the statistics cache for an engine."""
+    cache = _STATS_CACHES.get(engine)
+    if cache is None:
+        cache = _STATS_CACHES.setdefault(engine, LocalBackend(max_entries=128))
+    return cache
+
+
+def clear_statistics_cache() -> None:
+    """Drop memoized episode statistics."""
+    for cache in list(_STATS_CACHES.values()):
+        cache.clear()
+
 
 class EpisodicStore:
     """
     Store for managing routing episodes.
 
     Provides methods to record, query, and analyze routing decisions.
+    Hot lookups are built with lambda_stmt so each statement is compiled
+    once and later calls only rebind parameters.
     """
 
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, stats_cache_ttl: int = 60):
         """
         Initialize the episodic store.
 
         Args:
             session: Database session
+            stats_cache_ttl: Seconds to memoize get_statistics results (0 disables)
         """
         self.session = session
+        self.stats_cache_ttl = stats_cache_ttl
 
     def record_episode(
         self,
@@ -64,7 +93,64 @@ class EpisodicStore:
         Returns:
             Created RoutingEpisode
         """
-        # Create task snapshot
+        return self.record_episodes(
+            [
+                {
+                    "task": task,
+                    "decision": decision,
+                    "chosen_instance": chosen_instance,
+                    "confidence": confidence,
+                    "reasoning": reasoning,
+                    "strategy_used": strategy_used,
+                    "available_instances": available_instances,
+                    "similar_tasks": similar_tasks,
+                    "decision_factors": decision_factors,
+                    "instance_context": instance_context,
+                }
+            ]
+        )[0]
+
+    def record_episodes(self, specs: list[dict[str, Any]]) -> list[RoutingEpisode]:
+        """
+        Record a batch of routing episodes with a single flush.
+
+        Args:
+            specs: One dict per episode, keyed like the record_episode arguments
+                (``task`` is required, everything else optional)
+
+        Returns:
+            Created RoutingEpisodes, in input order
+        """
+        episodes = [self._build_episode(**spec) for spec in specs]
+        if not episodes:
+            return []
+
+        # One flush lets SQLAlchemy batch the INSERTs instead of one per row
+        self.session.add_all(episodes)
+        self.session.flush()
+        clear_statistics_cache()
+
+        if len(episodes) == 1:
+            logger.info(f"Recorded episode {episodes[0].id} for task {episodes[0].task_id}")
+        else:
+            logger.info(f"Recorded {len(episodes)} episodes")
+
+        return episodes
+
+    def _build_episode(
+        self,
+        task: Task,
+        decision: RoutingDecision | None = None,
+        chosen_instance: str | None = None,
+        confidence: float = 0.0,
+        reasoning: str | None = None,
+        strategy_used: str = "rules",
+        available_instances: list[str] | None = None,
+        similar_tasks: list[dict[str, Any]] | None = None,
+        decision_factors: dict[str, Any] | None = None,
+        instance_context: dict[str, Any] | None = None,
+    ) -> RoutingEpisode:
+        """Build an unsaved RoutingEpisode with a snapshot of the task."""
         task_snapshot = {
             "id": task.id,
             "title": task.title,
@@ -76,11 +162,20 @@ class EpisodicStore:
             "instance_id": task.instance_id,
         }
 
-        episode = RoutingEpisode(
-            id=f"ep-{uuid4().hex[:12]}",
+        # Normalize the tag shape once so reads never have to
+        if isinstance(task.tags, dict):
+            tags_set = list(task.tags.keys())
+        elif isinstance(task.tags, list):
+            tags_set = list(task.tags)
+        else:
+            tags_set = []
+
+        # id and routed_at are filled by column defaults at INSERT time
+        return RoutingEpisode(
             task_id=task.id,
             decision_task_id=decision.task_id if decision else None,
             task_snapshot=task_snapshot,
+            tags_set=tags_set,
             available_instances=available_instances or [],
             similar_tasks_used=similar_tasks,
             chosen_instance=chosen_instance or (decision.project if decision else None),
@@ -89,16 +184,8 @@ class EpisodicStore:
             strategy_used=strategy_used or (decision.decided_by if decision else "rules"),
             decision_factors=decision_factors,
             instance_context=instance_context,
-            routed_at=datetime.utcnow(),
         )
 
-        self.session.add(episode)
-        self.session.flush()
-
-        logger.info(f"Recorded episode {episode.id} for task {task.id}")
-
-        return episode
-
     def record_outcome(
         self,
         episode_id: str,
@@ -120,10 +207,57 @@ class EpisodicStore:
         Returns:
             Updated episode or None if not found
         """
-        episode = self.get_episode(episode_id)
+        # Only outcome columns are touched, so skip the JSON blobs
+        episode = self.get_episode_lite(episode_id)
         if episode is None:
             return None
 
+        self._apply_outcome(episode, success, duration, notes, feedback_id)
+
+        self.session.flush()
+        clear_statistics_cache()
+
+        logger.info(f"Recorded outcome for episode {episode_id}: success={success}")
+
+        return episode
+
+    def record_outcomes_for_tasks(
+        self,
+        outcomes: dict[str, dict[str, Any]],
+    ) -> list[RoutingEpisode]:
+        """
+        Record outcomes on the latest episode of several tasks with one lookup.
+
+        Args:
+            outcomes: Dict of task ID to record_outcome keyword arguments
+                (``success`` is required; duration, notes, feedback_id optional)
+
+        Returns:
+            Updated episodes (tasks without episodes are skipped)
+        """
+        episodes = self.get_latest_episodes_for_tasks(list(outcomes))
+        if not episodes:
+            return []
+
+        for task_id, episode in episodes.items():
+            self._apply_outcome(episode, **outcomes[task_id])
+
+        self.session.flush()
+        clear_statistics_cache()
+
+        logger.info(f"Recorded outcomes for {len(episodes)} episodes")
+
+        return list(episodes.values())
+
+    def _apply_outcome(
+        self,
+        episode: RoutingEpisode,
+        success: bool,
+        duration: str | None = None,
+        notes: str | None = None,
+        feedback_id: str | None = None,
+    ) -> None:
+        """Mark an episode's outcome without flushing."""
         if success:
             episode.mark_success(duration=duration, notes=notes)
         else:
@@ -132,118 +266,165 @@ class EpisodicStore:
         if feedback_id:
             episode.feedback_id = feedback_id
 
-        self.session.flush()
+    def get_episode(self, episode_id: str) -> RoutingEpisode | None:
+        """Get episode by ID."""
+        query = lambda_stmt(lambda: select(RoutingEpisode))
+        query += lambda s: s.where(RoutingEpisode.id == episode_id)
+        result = self.session.execute(query)
+        return result.scalar_one_or_none()
 
-        logger.info(f"Recorded outcome for episode {episode_id}: success={success}")
+    def get_episode_lite(self, episode_id: str) -> RoutingEpisode | None:
+        """
+        Get episode by ID without its large JSON columns.
 
-        return episode
+        Snapshot, context and decision-factor blobs are deferred and only
+        loaded if accessed, keeping the row narrow for id/outcome lookups.
 
-    def get_episode(self, episode_id: str) -> RoutingEpisode | None:
-        """Get episode by ID."""
-        query = select(RoutingEpisode).where(RoutingEpisode.id == episode_id)
+        Args:
+            episode_id: Episode ID
+
+        Returns:
+            RoutingEpisode or None
+        """
+        query = lambda_stmt(
+            lambda: select(RoutingEpisode).options(
+                defer(RoutingEpisode.task_snapshot),
+                defer(RoutingEpisode.tags_set),
+                defer(RoutingEpisode.available_instances),
+                defer(RoutingEpisode.similar_tasks_used),
+                defer(RoutingEpisode.decision_factors),
+                defer(RoutingEpisode.instance_context),
+            )
+        )
+        query += lambda s: s.where(RoutingEpisode.id == episode_id)
         result = self.session.execute(query)
         return result.scalar_one_or_none()
 
-    def get_episodes_for_task(self, task_id: str) -> list[RoutingEpisode]:
+    def get_episodes_for_task(self, task_id: str) -> Sequence[RoutingEpisode]:
         """Get all episodes for a task."""
-        query = (
-            select(RoutingEpisode)
-            .where(RoutingEpisode.task_id == task_id)
-            .order_by(RoutingEpisode.routed_at.desc())
-        )
+        query = lambda_stmt(lambda: select(RoutingEpisode))
+        query += lambda s: s.where(RoutingEpisode.task_id == task_id)
+        query += lambda s: s.order_by(RoutingEpisode.routed_at.desc())
         result = self.session.execute(query)
-        return list(result.scalars().all())
+        return result.scalars().all()
 
     def get_latest_episode_for_task(self, task_id: str) -> RoutingEpisode | None:
         """Get the most recent episode for a task."""
+        query = lambda_stmt(lambda: select(RoutingEpisode))
+        query += lambda s: s.where(RoutingEpisode.task_id == task_id)
+        query += lambda s: s.order_by(RoutingEpisode.routed_at.desc()).limit(1)
+        result = self.session.execute(query)
+        return result.scalar_one_or_none()
+
+    def get_latest_episodes_for_tasks(
+        self,
+        task_ids: list[str],
+    ) -> dict[str, RoutingEpisode]:
+        """
+        Get the most recent episode for each of several tasks in one query.
+
+        Args:
+            task_ids: Task IDs to look up
+
+        Returns:
+            Dict of task ID to latest episode (tasks without episodes are omitted)
+        """
+        if not task_ids:
+            return {}
+
+        rank = (
+            func.row_number()
+            .over(
+                partition_by=RoutingEpisode.task_id,
+                order_by=RoutingEpisode.routed_at.desc(),
+            )
+            .label("rank")
+        )
+        ranked = (
+            select(RoutingEpisode.id, rank)
+            .where(RoutingEpisode.task_id.in_(task_ids))
+            .subquery()
+        )
         query = (
             select(RoutingEpisode)
-            .where(RoutingEpisode.task_id == task_id)
-            .order_by(RoutingEpisode.routed_at.desc())
-            .limit(1)
+            .join(ranked, RoutingEpisode.id == ranked.c.id)
+            .where(ranked.c.rank == 1)
         )
+
         result = self.session.execute(query)
-        return result.scalar_one_or_none()
+        return {episode.task_id: episode for episode in result.scalars()}
 
     def get_episodes_for_instance(
         self,
         instance_id: str,
         limit: int = 100,
         include_outcomes: bool = True,
-    ) -> list[RoutingEpisode]:
+    ) -> Sequence[RoutingEpisode]:
         """Get episodes where instance was chosen."""
-        query = (
-            select(RoutingEpisode)
-            .where(RoutingEpisode.chosen_instance == instance_id)
-            .order_by(RoutingEpisode.routed_at.desc())
-            .limit(limit)
-        )
+        query = lambda_stmt(lambda: select(RoutingEpisode))
+        query += lambda s: s.where(RoutingEpisode.chosen_instance == instance_id)
 
         if include_outcomes:
-            query = query.where(RoutingEpisode.outcome_success.isnot(None))
+            query += lambda s: s.where(RoutingEpisode.outcome_success.isnot(None))
+
+        query += lambda s: s.order_by(RoutingEpisode.routed_at.desc()).limit(limit)
 
         result = self.session.execute(query)
-        return list(result.scalars().all())
+        return result.scalars().all()
 
     def get_successful_episodes(
         self,
         limit: int = 100,
         since: datetime | None = None,
-    ) -> list[RoutingEpisode]:
+    ) -> Sequence[RoutingEpisode]:
         """Get successful routing episodes."""
-        query = (
-            select(RoutingEpisode)
-            .where(RoutingEpisode.outcome_success == True)  # noqa: E712
-            .order_by(RoutingEpisode.routed_at.desc())
-            .limit(limit)
-        )
+        query = lambda_stmt(lambda: select(RoutingEpisode))
+        query += lambda s: s.where(RoutingEpisode.outcome_success == True)  # noqa: E712
 
         if since:
-            query = query.where(RoutingEpisode.routed_at >= since)
+            query += lambda s: s.where(RoutingEpisode.routed_at >= since)
+
+        query += lambda s: s.order_by(RoutingEpisode.routed_at.desc()).limit(limit)
 
         result = self.session.execute(query)
-        return list(result.scalars().all())
+        return result.scalars().all()
 
     def get_failed_episodes(
         self,
         limit: int = 100,
         since: datetime | None = None,
-    ) -> list[RoutingEpisode]:
+    ) -> Sequence[RoutingEpisode]:
         """Get failed routing episodes."""
-        query = (
-            select(RoutingEpisode)
-            .where(RoutingEpisode.outcome_success == False)  # noqa: E712
-            .order_by(RoutingEpisode.routed_at.desc())
-            .limit(limit)
-        )
+        query = lambda_stmt(lambda: select(RoutingEpisode))
+        query += lambda s: s.where(RoutingEpisode.outcome_success == False)  # noqa: E712
 
         if since:
-            query = query.where(RoutingEpisode.routed_at >= since)
+            query += lambda s: s.where(RoutingEpisode.routed_at >= since)
+
+        query += lambda s: s.order_by(RoutingEpisode.routed_at.desc()).limit(limit)
 
         result = self.session.execute(query)
-        return list(result.scalars().all())
+        return result.scalars().all()
 
-    def get_pending_episodes(self, limit: int = 100) -> list[RoutingEpisode]:
+    def get_pending_episodes(self, limit: int = 100) -> Sequence[RoutingEpisode]:
         """Get episodes without outcomes."""
-        query = (
-            select(RoutingEpisode)
-            .where(RoutingEpisode.outcome_success.is_(None))
-            .order_by(RoutingEpisode.routed_at.desc())
-            .limit(limit)
-        )
+        query = lambda_stmt(lambda: select(RoutingEpisode))
+        query += lambda s: s.where(RoutingEpisode.outcome_success.is_(None))
+        query += lambda s: s.order_by(RoutingEpisode.routed_at.desc()).limit(limit)
         result = self.session.execute(query)
-        return list(result.scalars().all())
+        return result.scalars().all()
 
     def find_similar_episodes(
         self,
         task_tags: list[str],
         limit: int = 10,
         success_only: bool = True,
-    ) -> list[RoutingEpisode]:
+    ) -> Sequence[RoutingEpisode]:
         """
         Find episodes with similar task tags.
 
-        Simple tag-based matching. Enhanced in semantic-search worker.
+        Tag overlap is evaluated in the database, so only matching rows
+        are fetched and up to ``limit`` results are always returned.
 
         Args:
             task_tags: Tags to match
@@ -253,36 +434,35 @@ class EpisodicStore:
         Returns:
             List of similar episodes
         """
-        # This is a simplified implementation
-        # The semantic-search worker will enhance this with better similarity
-        query = select(RoutingEpisode)
+        if not task_tags:
+            return []
+
+        query = select(RoutingEpisode).where(self._tag_overlap_condition(task_tags))
 
         if success_only:
             query = query.where(RoutingEpisode.outcome_success == True)  # noqa: E712
 
-        query = query.order_by(RoutingEpisode.routed_at.desc()).limit(limit * 3)
+        query = query.order_by(RoutingEpisode.routed_at.desc()).limit(limit)
 
         result = self.session.execute(query)
-        episodes = result.scalars().all()
-
-        # Filter by tag overlap
-        matching = []
-        tag_set = set(task_tags)
-        for episode in episodes:
-            snapshot_tags = episode.task_snapshot.get("tags", {})
-            if isinstance(snapshot_tags, dict):
-                episode_tags = set(snapshot_tags.keys())
-            elif isinstance(snapshot_tags, list):
-                episode_tags = set(snapshot_tags)
-            else:
-                episode_tags = set()
-
-            if tag_set & episode_tags:  # Any overlap
-                matching.append(episode)
-                if len(matching) >= limit:
-                    break
-
-        return matching
+        return result.scalars().all()
+
+    def _tag_overlap_condition(self, task_tags: list[str]) -> Any:
+        """
+        Build a server-side predicate matching episodes sharing any tag.
+
+        Args:
+            task_tags: Tags to match
+
+        Returns:
+            SQL boolean expression over the normalized tags_set column
+        """
+        if self.session.get_bind().dialect.name == "postgresql":
+            # JSONB ?| against a GIN-indexed array of tag names
+            return RoutingEpisode.tags_set.has_any(postgresql.array(task_tags))
+
+        tag = func.json_each(RoutingEpisode.tags_set).table_valued("value")
+        return select(1).select_from(tag).where(tag.c.value.in_(task_tags)).exists()
 
     def get_statistics(
         self,
@@ -297,9 +477,15 @@ class EpisodicStore:
         Returns:
             Statistics dict
         """
-        base_query = select(RoutingEpisode)
-        if since:
-            base_query = base_query.where(RoutingEpisode.routed_at >= since)
+        # Memoized per engine and minute of `since`
+        cache = _statistics_cache(self.session.get_bind().engine)
+        cache_key = "statistics:" + (
+            since.replace(second=0, microsecond=0).isoformat() if since else "all"
+        )
+        if self.stats_cache_ttl > 0:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return {**cached, "since": since.isoformat() if since else None}
 
         # Total episodes
         total_query = select(func.count(RoutingEpisode.id))
@@ -338,7 +524,7 @@ class EpisodicStore:
             )
         avg_confidence = self.session.execute(avg_confidence_query).scalar() or 0.0
 
-        return {
+        stats = {
             "total_episodes": total,
             "successful": successes,
             "failed": failures,
@@ -348,30 +534,59 @@ class EpisodicStore:
             "since": since.isoformat() if since else None,
         }
 
+        if self.stats_cache_ttl > 0:
+            cache.set(cache_key, stats, ttl=self.stats_cache_ttl)
+
+        return dict(stats)
+
     def cleanup_old_episodes(
         self,
         retention_days: int = 90,
+        batch_size: int = 10_000,
+        commit_batches: bool = False,
     ) -> int:
         """
         Delete episodes older than retention period.
 
+        Deletes in chunks of ``batch_size`` rows so a large sweep never
+        runs as one long-locking statement.
+
         Args:
             retention_days: Days to retain episodes
+            batch_size: Maximum rows removed per DELETE statement
+            commit_batches: Commit after each chunk to release locks (for
+                background sweeps that own their session)
 
         Returns:
             Number of episodes deleted
         """
         cutoff = datetime.utcnow() - timedelta(days=retention_days)
 
-        query = select(RoutingEpisode).where(RoutingEpisode.routed_at < cutoff)
-        result = self.session.execute(query)
-        old_episodes = result.scalars().all()
+        count = 0
+        while True:
+            batch_ids = (
+                select(RoutingEpisode.id)
+                .where(RoutingEpisode.routed_at < cutoff)
+                .limit(batch_size)
+            )
+            result = cast(
+                CursorResult[Any],
+                self.session.execute(
+                    delete(RoutingEpisode).where(RoutingEpisode.id.in_(batch_ids)),
+                    execution_options={"synchronize_session": False},
+                ),
+            )
+            deleted = result.rowcount or 0
+            count += deleted
+
+            if commit_batches:
+                self.session.commit()
 
-        count = len(old_episodes)
-        for episode in old_episodes:
-            self.session.delete(episode)
+            if deleted < batch_size:
+                break
 
         self.session.flush()
+        clear_statistics_cache()
 
         logger.info(f"Cleaned up {count} episodes older than {retention_days} days")
 
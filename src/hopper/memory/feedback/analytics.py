@@ -3,18 +3,42 @@ Feedback analytics for routing accuracy analysis.
 """
 
 import logging
-from collections import Counter
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Any
+from typing import Any, cast
+from weakref import WeakKeyDictionary
 
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, func, and_, case, literal_column, true, tuple_
+from sqlalchemy.engine import Engine, Row
 from sqlalchemy.orm import Session
 
 from hopper.models import Task, TaskFeedback
 
+from ..working.backends import LocalBackend
+
 logger = logging.getLogger(__name__)
 
+# get_summary results, shared by every analytics instance in the process (the
+# API builds one per request) and keyed by period. Each engine has its own
+# cache, so separate databases never read each other's summaries, even
+# in-memory SQLite ones with the same URL. Feedback writes clear them
+# through clear_summary_cache().
+_SUMMARY_CACHES: WeakKeyDictionary[Engine, LocalBackend] = WeakKeyDictionary()
+
+
+def _summary_cache(engine: Engine) -> LocalBackend:
+    """Get the summary cache for an engine."""
+    cache = _SUMMARY_CACHES.get(engine)
+    if cache is None:
+        cache = _SUMMARY_CACHES.setdefault(engine, LocalBackend(max_entries=128))
+    return cache
+
+
+def clear_summary_cache() -> None:
+    """Drop memoized feedback summaries."""
+    for cache in list(_SUMMARY_CACHES.values()):
+        cache.clear()
+
 
 @dataclass
 class RoutingAccuracyReport:
@@ -77,14 +101,16 @@ class FeedbackAnalytics:
     Provides insights on routing accuracy, quality metrics, and patterns.
     """
 
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, summary_cache_ttl: int = 60):
         """
         Initialize analytics service.
 
         Args:
             session: Database session
+            summary_cache_ttl: Seconds to memoize get_summary results (0 disables)
         """
         self.session = session
+        self.summary_cache_ttl = summary_cache_ttl
 
     def get_routing_accuracy(
         self,
@@ -103,194 +129,272 @@ class FeedbackAnalytics:
         Returns:
             RoutingAccuracyReport
         """
-        # Base query
-        query = select(TaskFeedback)
+        conditions = self._feedback_conditions(since, until)
+        totals = self._aggregate_feedback(conditions, instance_id)
+
+        return self._build_accuracy_report(totals, conditions, since, until, instance_id)
+
+    def get_quality_report(
+        self,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> QualityReport:
+        """
+        Generate quality metrics report.
+
+        Args:
+            since: Start of period
+            until: End of period
+
+        Returns:
+            QualityReport
+        """
+        conditions = self._feedback_conditions(since, until)
+        totals = self._aggregate_feedback(conditions)
+
+        return self._build_quality_report(totals, conditions)
 
-        # Apply filters
+    def _feedback_conditions(
+        self,
+        since: datetime | None,
+        until: datetime | None,
+    ) -> list[Any]:
+        """Build the period filter shared by all report queries."""
         conditions = []
         if since:
             conditions.append(TaskFeedback.created_at >= since)
         if until:
             conditions.append(TaskFeedback.created_at <= until)
+        return conditions
 
-        if conditions:
-            query = query.where(and_(*conditions))
+    def _aggregate_feedback(
+        self,
+        conditions: list[Any],
+        instance_id: str | None = None,
+    ) -> Row[Any]:
+        """
+        Compute the scalar metrics of both reports in one aggregate pass.
+
+        Args:
+            conditions: Period filter from _feedback_conditions
+            instance_id: Restrict to tasks routed to this instance
+
+        Returns:
+            Row of labelled totals and averages
+        """
+        blockers_len = self._json_array_length(TaskFeedback.unexpected_blockers, "blockers")
+        skills_len = self._json_array_length(TaskFeedback.required_skills_not_tagged, "skills")
+        query = select(
+            func.count().label("total"),
+            func.sum(case((TaskFeedback.was_good_match == True, 1), else_=0)).label(  # noqa: E712
+                "good_matches"
+            ),
+            func.sum(case((TaskFeedback.was_good_match == False, 1), else_=0)).label(  # noqa: E712
+                "bad_matches"
+            ),
+            func.avg(TaskFeedback.quality_score).label("avg_quality"),
+            func.avg(TaskFeedback.complexity_rating).label("avg_complexity"),
+            func.sum(case((TaskFeedback.required_rework == True, 1), else_=0)).label(  # noqa: E712
+                "rework_count"
+            ),
+            func.sum(case((blockers_len > 0, 1), else_=0)).label("tasks_with_blockers"),
+            func.sum(case((skills_len > 0, 1), else_=0)).label("missing_skills"),
+        ).select_from(TaskFeedback)
 
-        # Join with Task if filtering by instance
         if instance_id:
             query = query.join(Task, TaskFeedback.task_id == Task.id).where(
                 Task.instance_id == instance_id
             )
+        if conditions:
+            query = query.where(and_(*conditions))
 
-        result = self.session.execute(query)
-        feedback_list = list(result.scalars().all())
+        return self.session.execute(query).one()
 
-        # Calculate metrics
-        total = len(feedback_list)
-        good_matches = sum(1 for f in feedback_list if f.was_good_match)
-        bad_matches = sum(1 for f in feedback_list if f.was_good_match is False)
+    def _build_accuracy_report(
+        self,
+        totals: Row[Any],
+        conditions: list[Any],
+        since: datetime | None,
+        until: datetime | None,
+        instance_id: str | None = None,
+    ) -> RoutingAccuracyReport:
+        """Build a RoutingAccuracyReport from aggregated totals."""
+        total = totals.total or 0
+        if total == 0:
+            # Empty period - the breakdown queries cannot find anything
+            return RoutingAccuracyReport(0, 0, 0, 0.0, [], {}, since, until)
 
+        good_matches = totals.good_matches or 0
         accuracy = good_matches / total if total > 0 else 0.0
 
-        # Find common misrouting targets
-        misrouting_targets = [
-            f.should_have_routed_to
-            for f in feedback_list
-            if f.was_good_match is False and f.should_have_routed_to
-        ]
-        target_counts = Counter(misrouting_targets).most_common(5)
-
-        # Per-instance breakdown
-        by_instance = self._calculate_by_instance(feedback_list)
-
         return RoutingAccuracyReport(
             total_feedback=total,
             good_matches=good_matches,
-            bad_matches=bad_matches,
+            bad_matches=totals.bad_matches or 0,
             accuracy_rate=accuracy,
-            common_misrouting_targets=target_counts,
-            by_instance=by_instance,
+            common_misrouting_targets=self._misrouting_targets(conditions, instance_id),
+            by_instance=self._calculate_by_instance(conditions, instance_id),
             period_start=since,
             period_end=until,
         )
 
+    def _build_quality_report(
+        self,
+        totals: Row[Any],
+        conditions: list[Any],
+    ) -> QualityReport:
+        """Build a QualityReport from aggregated totals."""
+        total = totals.total or 0
+        if total == 0:
+            return QualityReport(0, 0.0, 0.0, 0.0, 0, 0, {})
+
+        rework_rate = (totals.rework_count or 0) / total if total > 0 else 0.0
+
+        by_complexity = self._calculate_by_complexity(conditions)
+
+        return QualityReport(
+            total_tasks=total,
+            average_quality_score=float(totals.avg_quality or 0.0),
+            average_complexity=float(totals.avg_complexity or 0.0),
+            rework_rate=rework_rate,
+            tasks_with_blockers=totals.tasks_with_blockers or 0,
+            missing_skills_count=totals.missing_skills or 0,
+            by_complexity=by_complexity,
+        )
+
+    def _misrouting_targets(
+        self,
+        conditions: list[Any],
+        instance_id: str | None = None,
+    ) -> list[tuple[str, int]]:
+        """Find the five most common should-have-routed-to targets."""
+        query = (
+            select(TaskFeedback.should_have_routed_to, func.count())
+            .where(
+                TaskFeedback.was_good_match == False,  # noqa: E712
+                TaskFeedback.should_have_routed_to.isnot(None),
+                TaskFeedback.should_have_routed_to != "",
+            )
+            .group_by(TaskFeedback.should_have_routed_to)
+            .order_by(func.count().desc())
+            .limit(5)
+        )
+        if instance_id:
+            query = query.join(Task, TaskFeedback.task_id == Task.id).where(
+                Task.instance_id == instance_id
+            )
+        if conditions:
+            query = query.where(and_(*conditions))
+
+        return [(cast(str, target), count) for target, count in self.session.execute(query)]
+
     def _calculate_by_instance(
         self,
-        feedback_list: list[TaskFeedback],
+        conditions: list[Any],
+        instance_id: str | None = None,
     ) -> dict[str, dict[str, Any]]:
         """Calculate per-instance metrics."""
-        # Get tasks for feedback
-        task_ids = [f.task_id for f in feedback_list]
-        if not task_ids:
-            return {}
-
-        task_query = select(Task).where(Task.id.in_(task_ids))
-        result = self.session.execute(task_query)
-        tasks = {t.id: t for t in result.scalars().all()}
-
-        # Group feedback by instance
-        by_instance: dict[str, list[TaskFeedback]] = {}
-        for feedback in feedback_list:
-            task = tasks.get(feedback.task_id)
-            if task and task.instance_id:
-                if task.instance_id not in by_instance:
-                    by_instance[task.instance_id] = []
-                by_instance[task.instance_id].append(feedback)
-
-        # Calculate per-instance metrics
-        result_dict = {}
-        for instance_id, feedbacks in by_instance.items():
-            total = len(feedbacks)
-            good = sum(1 for f in feedbacks if f.was_good_match)
-            accuracy = good / total if total > 0 else 0.0
+        query = (
+            select(
+                Task.instance_id,
+                func.count(),
+                func.sum(case((TaskFeedback.was_good_match == True, 1), else_=0)),  # noqa: E712
+            )
+            .select_from(TaskFeedback)
+            .join(Task, TaskFeedback.task_id == Task.id)
+            .where(Task.instance_id.isnot(None), Task.instance_id != "")
+            .group_by(Task.instance_id)
+        )
+        if instance_id:
+            query = query.where(Task.instance_id == instance_id)
+        if conditions:
+            query = query.where(and_(*conditions))
 
-            result_dict[instance_id] = {
+        result_dict = {}
+        for task_instance_id, total, good in self.session.execute(query):
+            good = good or 0
+            result_dict[task_instance_id] = {
                 "total": total,
                 "good_matches": good,
                 "bad_matches": total - good,
-                "accuracy_rate": accuracy,
+                "accuracy_rate": good / total if total > 0 else 0.0,
             }
 
         return result_dict
 
-    def get_quality_report(
-        self,
-        since: datetime | None = None,
-        until: datetime | None = None,
-    ) -> QualityReport:
+    def _json_array_length(self, column: Any, key: str) -> Any:
         """
-        Generate quality metrics report.
+        Build a dialect-appropriate length expression for a JSON list field.
 
         Args:
-            since: Start of period
-            until: End of period
+            column: JSON column holding a ``{key: [...]}`` object
+            key: Key of the list inside the JSON object
 
         Returns:
-            QualityReport
+            SQL expression evaluating to the list length (NULL if absent)
         """
-        # Base query
-        query = select(TaskFeedback)
-
-        conditions = []
-        if since:
-            conditions.append(TaskFeedback.created_at >= since)
-        if until:
-            conditions.append(TaskFeedback.created_at <= until)
-
-        if conditions:
-            query = query.where(and_(*conditions))
+        if self.session.get_bind().dialect.name == "postgresql":
+            return func.jsonb_array_length(column.op("->")(key))
+        return func.json_array_length(column, f"$.{key}")
 
-        result = self.session.execute(query)
-        feedback_list = list(result.scalars().all())
-
-        total = len(feedback_list)
-
-        # Quality scores
-        quality_scores = [f.quality_score for f in feedback_list if f.quality_score is not None]
-        avg_quality = sum(quality_scores) / len(quality_scores) if quality_scores else 0.0
-
-        # Complexity
-        complexities = [f.complexity_rating for f in feedback_list if f.complexity_rating is not None]
-        avg_complexity = sum(complexities) / len(complexities) if complexities else 0.0
-
-        # Rework
-        rework_count = sum(1 for f in feedback_list if f.required_rework)
-        rework_rate = rework_count / total if total > 0 else 0.0
-
-        # Blockers
-        tasks_with_blockers = sum(
-            1 for f in feedback_list
-            if f.unexpected_blockers and f.unexpected_blockers.get("blockers")
-        )
+    def _json_object_keys(self, column: Any) -> Any:
+        """
+        Build a table-valued expression yielding the keys of a JSON object column.
 
-        # Missing skills
-        missing_skills = sum(
-            1 for f in feedback_list
-            if f.required_skills_not_tagged and f.required_skills_not_tagged.get("skills")
-        )
+        Rows whose value is not a JSON object contribute no keys.
 
-        # By complexity
-        by_complexity = self._calculate_by_complexity(feedback_list)
+        Args:
+            column: JSON column holding an object
 
-        return QualityReport(
-            total_tasks=total,
-            average_quality_score=avg_quality,
-            average_complexity=avg_complexity,
-            rework_rate=rework_rate,
-            tasks_with_blockers=tasks_with_blockers,
-            missing_skills_count=missing_skills,
-            by_complexity=by_complexity,
-        )
+        Returns:
+            Table-valued function with a single ``key`` column
+        """
+        if self.session.get_bind().dialect.name == "postgresql":
+            return (
+                func.jsonb_object_keys(
+                    case(
+                        (func.jsonb_typeof(column) == "object", column),
+                        else_=literal_column("'{}'::jsonb"),
+                    )
+                )
+                .table_valued("key")
+                .lateral()
+            )
+        return func.json_each(
+            case((func.json_type(column) == "object", column), else_="{}")
+        ).table_valued("key")
 
     def _calculate_by_complexity(
         self,
-        feedback_list: list[TaskFeedback],
+        conditions: list[Any],
     ) -> dict[int, dict[str, Any]]:
         """Calculate metrics by complexity rating."""
-        by_complexity: dict[int, list[TaskFeedback]] = {}
-
-        for feedback in feedback_list:
-            if feedback.complexity_rating is not None:
-                if feedback.complexity_rating not in by_complexity:
-                    by_complexity[feedback.complexity_rating] = []
-                by_complexity[feedback.complexity_rating].append(feedback)
-
-        result = {}
-        for rating, feedbacks in sorted(by_complexity.items()):
-            quality_scores = [f.quality_score for f in feedbacks if f.quality_score is not None]
-            avg_quality = sum(quality_scores) / len(quality_scores) if quality_scores else 0.0
-
-            rework_count = sum(1 for f in feedbacks if f.required_rework)
-            good_matches = sum(1 for f in feedbacks if f.was_good_match)
-
-            result[rating] = {
-                "count": len(feedbacks),
-                "average_quality": avg_quality,
-                "rework_count": rework_count,
-                "good_matches": good_matches,
-            }
+        query = (
+            select(
+                TaskFeedback.complexity_rating,
+                func.count(),
+                func.avg(TaskFeedback.quality_score),
+                func.sum(case((TaskFeedback.required_rework == True, 1), else_=0)),  # noqa: E712
+                func.sum(case((TaskFeedback.was_good_match == True, 1), else_=0)),  # noqa: E712
+            )
+            .where(TaskFeedback.complexity_rating.isnot(None))
+            .group_by(TaskFeedback.complexity_rating)
+            .order_by(TaskFeedback.complexity_rating)
+        )
+        if conditions:
+            query = query.where(and_(*conditions))
 
-        return result
+        return {
+            rating: {
+                "count": count,
+                "average_quality": float(avg_quality or 0.0),
+                "rework_count": rework_count or 0,
+                "good_matches": good_matches or 0,
+            }
+            for rating, count, avg_quality, rework_count, good_matches in self.session.execute(
+                query
+            )
+        }
 
     def get_misrouting_patterns(
         self,
@@ -305,64 +409,103 @@ class FeedbackAnalytics:
         Returns:
             List of pattern dictionaries
         """
-        # Get misrouted feedback
-        query = (
-            select(TaskFeedback)
-            .where(TaskFeedback.was_good_match == False)  # noqa: E712
-            .where(TaskFeedback.should_have_routed_to.isnot(None))
+        misrouted = and_(
+            TaskFeedback.was_good_match == False,  # noqa: E712
+            TaskFeedback.should_have_routed_to.isnot(None),
+            Task.instance_id.isnot(None),
         )
-
-        result = self.session.execute(query)
-        misrouted = list(result.scalars().all())
-
-        # Get associated tasks
-        task_ids = [f.task_id for f in misrouted]
-        if not task_ids:
+        bucket_columns = (Task.instance_id, TaskFeedback.should_have_routed_to)
+
+        # Bucket by (actual, suggested) and take the top-K in SQL
+        bucket_query = (
+            select(*bucket_columns, func.count())
+            .select_from(TaskFeedback)
+            .join(Task, TaskFeedback.task_id == Task.id)
+            .where(misrouted)
+            .group_by(*bucket_columns)
+            .order_by(func.count().desc())
+            .limit(limit)
+        )
+        buckets = self.session.execute(bucket_query).all()
+        if not buckets:
             return []
 
-        task_query = select(Task).where(Task.id.in_(task_ids))
-        tasks = {t.id: t for t in self.session.execute(task_query).scalars().all()}
-
-        # Analyze patterns: actual -> should_have
-        patterns: dict[tuple[str, str], list[dict]] = {}
-
-        for feedback in misrouted:
-            task = tasks.get(feedback.task_id)
-            if not task or not task.instance_id:
-                continue
-
-            key = (task.instance_id, feedback.should_have_routed_to or "unknown")
-
-            if key not in patterns:
-                patterns[key] = []
+        in_top_buckets = tuple_(*bucket_columns).in_(
+            [(actual, suggested) for actual, suggested, _ in buckets]
+        )
 
-            patterns[key].append({
-                "task_id": feedback.task_id,
-                "task_title": task.title,
-                "tags": task.tags,
-                "feedback": feedback.routing_feedback,
+        # Up to 3 most recent examples per bucket
+        rank = (
+            func.row_number()
+            .over(partition_by=bucket_columns, order_by=TaskFeedback.created_at.desc())
+            .label("rank")
+        )
+        ranked = (
+            select(
+                *bucket_columns,
+                TaskFeedback.task_id,
+                Task.title,
+                Task.tags,
+                TaskFeedback.routing_feedback,
+                rank,
+            )
+            .join(Task, TaskFeedback.task_id == Task.id)
+            .where(misrouted, in_top_buckets)
+            .subquery()
+        )
+        examples: dict[tuple[str | None, str | None], list[dict[str, Any]]] = {}
+        for row in self.session.execute(select(ranked).where(ranked.c.rank <= 3)):
+            examples.setdefault((row.instance_id, row.should_have_routed_to), []).append({
+                "task_id": row.task_id,
+                "task_title": row.title,
+                "tags": row.tags,
+                "feedback": row.routing_feedback,
             })
 
-        # Convert to list and sort by frequency
-        result_list = []
-        for (actual, suggested), examples in sorted(
-            patterns.items(), key=lambda x: len(x[1]), reverse=True
-        )[:limit]:
-            # Find common tags in misrouted tasks
-            all_tags: Counter[str] = Counter()
-            for ex in examples:
-                if ex["tags"]:
-                    all_tags.update(ex["tags"].keys())
-
-            result_list.append({
-                "routed_to": actual,
-                "should_have_been": suggested,
-                "count": len(examples),
-                "common_tags": all_tags.most_common(5),
-                "examples": examples[:3],  # Limit examples
-            })
+        # Top-5 tag keys per bucket, tallied in SQL
+        tag_key = self._json_object_keys(Task.tags)
+        tag_count = (
+            select(*bucket_columns, tag_key.c.key, func.count().label("count"))
+            .select_from(TaskFeedback)
+            .join(Task, TaskFeedback.task_id == Task.id)
+            .join(tag_key, true())
+            .where(misrouted, in_top_buckets)
+            .group_by(*bucket_columns, tag_key.c.key)
+            .subquery()
+        )
+        tag_rank = (
+            func.row_number()
+            .over(
+                partition_by=(tag_count.c.instance_id, tag_count.c.should_have_routed_to),
+                order_by=(tag_count.c.count.desc(), tag_count.c.key),
+            )
+            .label("rank")
+        )
+        ranked_tags = select(tag_count, tag_rank).subquery()
+        tags_query = (
+            select(
+                ranked_tags.c.instance_id,
+                ranked_tags.c.should_have_routed_to,
+                ranked_tags.c.key,
+                ranked_tags.c.count,
+            )
+            .where(ranked_tags.c.rank <= 5)
+            .order_by(ranked_tags.c.rank)
+        )
+        common_tags: dict[tuple[str | None, str | None], list[tuple[str, int]]] = {}
+        for actual, suggested, key, count in self.session.execute(tags_query):
+            common_tags.setdefault((actual, suggested), []).append((key, count))
 
-        return result_list
+        return [
+            {
+                "routed_to": actual,
+                "should_have_been": suggested or "unknown",
+                "count": count,
+                "common_tags": common_tags.get((actual, suggested), []),
+                "examples": examples.get((actual, suggested), []),
+            }
+            for actual, suggested, count in buckets
+        ]
 
     def get_summary(
         self,
@@ -371,20 +514,40 @@ class FeedbackAnalytics:
         """
         Get summary of feedback for a period.
 
+        Summaries are memoized for summary_cache_ttl seconds, so
+        ``generated_at`` is when the returned summary was computed, which may
+        be that long ago.
+
         Args:
             days: Number of days to analyze
 
         Returns:
             Summary dictionary
         """
+        cache = _summary_cache(self.session.get_bind().engine)
+        cache_key = f"summary:{days}"
+        if self.summary_cache_ttl > 0:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return dict(cached)
+
         since = datetime.utcnow() - timedelta(days=days)
 
-        accuracy = self.get_routing_accuracy(since=since)
-        quality = self.get_quality_report(since=since)
+        # One scan of the period feeds the scalar metrics of both reports
+        conditions = self._feedback_conditions(since, None)
+        totals = self._aggregate_feedback(conditions)
 
-        return {
+        accuracy = self._build_accuracy_report(totals, conditions, since, None)
+        quality = self._build_quality_report(totals, conditions)
+
+        summary = {
             "period_days": days,
             "routing_accuracy": accuracy.to_dict(),
             "quality_metrics": quality.to_dict(),
             "generated_at": datetime.utcnow().isoformat(),
         }
+
+        if self.summary_cache_ttl > 0:
+            cache.set(cache_key, summary, ttl=self.summary_cache_ttl)
+
+        return dict(summary)
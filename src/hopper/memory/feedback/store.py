@@ -3,24 +3,35 @@ Feedback store for managing task feedback.
 """
 
 import logging
+from collections.abc import Callable, Iterator, Sequence
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import select, and_
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, lambda_stmt, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, contains_eager, selectinload
 
 from hopper.models import Task, TaskFeedback, TaskStatus
 
-from ..episodic import EpisodicStore
+from ..episodic import EpisodicStore, RoutingEpisode
+from .analytics import clear_summary_cache
 
 logger = logging.getLogger(__name__)
 
+# Dialects whose insert() supports ON CONFLICT ... DO UPDATE ... RETURNING
+_UPSERT_DIALECTS: dict[str, Callable[..., Any]] = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
 
 class FeedbackStore:
     """
     Store for managing task feedback.
 
     Handles feedback creation, retrieval, and linking to routing episodes.
+    Read paths are built with lambda_stmt so each statement is compiled
+    once and later calls only rebind parameters.
     """
 
     def __init__(self, session: Session, episodic_store: EpisodicStore | None = None):
@@ -71,54 +82,7 @@ class FeedbackStore:
         Returns:
             Created TaskFeedback or None if task not found
         """
-        # Verify task exists
-        task = self.session.execute(
-            select(Task).where(Task.id == task_id)
-        ).scalar_one_or_none()
-
-        if task is None:
-            logger.warning(f"Task {task_id} not found for feedback")
-            return None
-
-        # Check for existing feedback
-        existing = self.get_feedback(task_id)
-        if existing:
-            # Update existing feedback
-            if routing_feedback is not None:
-                existing.routing_feedback = routing_feedback
-            if was_good_match is not None:
-                existing.was_good_match = was_good_match
-            if should_have_routed_to is not None:
-                existing.should_have_routed_to = should_have_routed_to
-            if estimated_duration is not None:
-                existing.estimated_duration = estimated_duration
-            if actual_duration is not None:
-                existing.actual_duration = actual_duration
-            if complexity_rating is not None:
-                existing.complexity_rating = complexity_rating
-            if quality_score is not None:
-                existing.quality_score = quality_score
-            if required_rework is not None:
-                existing.required_rework = required_rework
-            if rework_reason is not None:
-                existing.rework_reason = rework_reason
-            if unexpected_blockers is not None:
-                existing.unexpected_blockers = {"blockers": unexpected_blockers}
-            if required_skills_not_tagged is not None:
-                existing.required_skills_not_tagged = {"skills": required_skills_not_tagged}
-            if notes is not None:
-                existing.notes = notes
-
-            self.session.flush()
-            logger.info(f"Updated feedback for task {task_id}")
-
-            # Update linked episode
-            self._update_episode_outcome(task_id, existing)
-
-            return existing
-
-        # Create new feedback
-        feedback = TaskFeedback(
+        feedback, _ = self.record_feedback_with_episode(
             task_id=task_id,
             was_good_match=was_good_match,
             routing_feedback=routing_feedback,
@@ -129,38 +93,242 @@ class FeedbackStore:
             quality_score=quality_score,
             required_rework=required_rework,
             rework_reason=rework_reason,
-            unexpected_blockers={"blockers": unexpected_blockers} if unexpected_blockers else None,
-            required_skills_not_tagged={"skills": required_skills_not_tagged} if required_skills_not_tagged else None,
+            unexpected_blockers=unexpected_blockers,
+            required_skills_not_tagged=required_skills_not_tagged,
             notes=notes,
-            created_at=datetime.utcnow(),
         )
+        return feedback
 
-        self.session.add(feedback)
-        self.session.flush()
+    def record_feedback_with_episode(
+        self,
+        task_id: str,
+        was_good_match: bool,
+        **fields: Any,
+    ) -> tuple[TaskFeedback | None, RoutingEpisode | None]:
+        """
+        Record feedback for a task and return the episode it updated.
 
-        logger.info(f"Recorded feedback for task {task_id}: was_good_match={was_good_match}")
+        Lets callers that also need the linked episode (e.g. to adjust
+        pattern confidence) skip a second latest-episode lookup.
+
+        Args:
+            task_id: Task ID
+            was_good_match: Whether routing was a good match
+            **fields: Other record_feedback arguments
+
+        Returns:
+            Tuple of (TaskFeedback or None if task not found,
+            updated RoutingEpisode or None if there is none)
+        """
+        item = {"task_id": task_id, "was_good_match": was_good_match, **fields}
+
+        dialect = self.session.get_bind().dialect.name
+        if dialect in _UPSERT_DIALECTS:
+            feedback = self._upsert_feedback(_UPSERT_DIALECTS[dialect], **item)
+            if feedback is None:
+                logger.warning(f"Task {task_id} not found for feedback")
+                return None, None
+            logger.info(f"Recorded feedback for task {task_id}: was_good_match={feedback.was_good_match}")
+        else:
+            recorded = self._write_feedback_bulk([item])
+            if not recorded:
+                return None, None
+            feedback = recorded[0]
 
         # Update linked episode
-        self._update_episode_outcome(task_id, feedback)
+        episodes = self._update_episode_outcomes([feedback])
 
-        return feedback
+        return feedback, episodes.get(task_id)
+
+    def _upsert_feedback(
+        self,
+        insert_fn: Callable[..., Any],
+        task_id: str,
+        was_good_match: bool,
+        unexpected_blockers: list[str] | None = None,
+        required_skills_not_tagged: list[str] | None = None,
+        **fields: Any,
+    ) -> TaskFeedback | None:
+        """
+        Insert or update feedback in one statement.
 
-    def _update_episode_outcome(self, task_id: str, feedback: TaskFeedback) -> None:
-        """Update the linked routing episode with feedback outcome."""
-        if self.episodic_store is None:
-            return
-
-        episode = self.episodic_store.get_latest_episode_for_task(task_id)
-        if episode is None:
-            return
-
-        self.episodic_store.record_outcome(
-            episode_id=episode.id,
-            success=feedback.was_good_match or False,
-            duration=feedback.actual_duration,
-            notes=feedback.routing_feedback,
-            feedback_id=feedback.task_id,
+        Selecting the row's values from ``tasks`` means an unknown task simply
+        inserts nothing, instead of raising a foreign key error mid-transaction.
+        """
+        columns = TaskFeedback.__table__.c
+        values = {
+            "task_id": task_id,
+            "was_good_match": was_good_match,
+            "unexpected_blockers": {"blockers": unexpected_blockers} if unexpected_blockers else None,
+            "required_skills_not_tagged": {"skills": required_skills_not_tagged} if required_skills_not_tagged else None,
+            **fields,
+        }
+
+        # On conflict only overwrite what the caller supplied, as an update would
+        updates = {
+            name: value
+            for name, value in {"was_good_match": was_good_match, **fields}.items()
+            if value is not None
+        }
+        if unexpected_blockers is not None:
+            updates["unexpected_blockers"] = {"blockers": unexpected_blockers}
+        if required_skills_not_tagged is not None:
+            updates["required_skills_not_tagged"] = {"skills": required_skills_not_tagged}
+
+        # from_select() skips Python-side column defaults, so bind created_at
+        # here. The column is naive UTC like every other writer's; the
+        # database's now() would be in the server's time zone.
+        values["created_at"] = datetime.utcnow()
+        source = select(
+            *(literal(value, columns[name].type).label(name) for name, value in values.items()),
+        ).where(Task.id == task_id)
+        statement = insert_fn(TaskFeedback).from_select(list(values), source)
+        statement = statement.on_conflict_do_update(
+            index_elements=[TaskFeedback.task_id],
+            set_=updates,
+        ).returning(TaskFeedback)
+
+        result = self.session.execute(
+            statement, execution_options={"populate_existing": True}
         )
+        clear_summary_cache()
+        return result.scalar_one_or_none()
+
+    def record_feedback_bulk(self, items: list[dict[str, Any]]) -> list[TaskFeedback]:
+        """
+        Record feedback for many tasks with a fixed number of queries.
+
+        Task existence and existing feedback are each checked with one IN
+        query, then all inserts and updates go out in a single flush.
+
+        Args:
+            items: One dict per task, keyed like the record_feedback arguments
+                (``task_id`` and ``was_good_match`` are required)
+
+        Returns:
+            Created or updated TaskFeedback records, in input order
+            (items for unknown tasks are skipped)
+        """
+        recorded = self._write_feedback_bulk(items)
+
+        # Update linked episodes
+        self._update_episode_outcomes(recorded)
+
+        return recorded
+
+    def _write_feedback_bulk(self, items: list[dict[str, Any]]) -> list[TaskFeedback]:
+        """Insert or update feedback rows without touching episodes."""
+        task_ids = [item["task_id"] for item in items]
+        if not task_ids:
+            return []
+
+        known_ids = set(
+            self.session.execute(select(Task.id).where(Task.id.in_(task_ids))).scalars()
+        )
+        existing = {
+            feedback.task_id: feedback
+            for feedback in self.session.execute(
+                select(TaskFeedback).where(TaskFeedback.task_id.in_(task_ids))
+            ).scalars()
+        }
+
+        recorded: list[TaskFeedback] = []
+        created: list[TaskFeedback] = []
+        for item in items:
+            task_id = item["task_id"]
+            if task_id not in known_ids:
+                logger.warning(f"Task {task_id} not found for feedback")
+                continue
+
+            feedback = existing.get(task_id)
+            if feedback is None:
+                feedback = self._build_feedback(**item)
+                existing[task_id] = feedback
+                created.append(feedback)
+            else:
+                self._apply_feedback_updates(feedback, **item)
+
+            recorded.append(feedback)
+
+        if not recorded:
+            return []
+
+        # One flush lets SQLAlchemy batch the INSERTs and UPDATEs
+        self.session.add_all(created)
+        self.session.flush()
+        clear_summary_cache()
+
+        if len(recorded) == 1:
+            feedback = recorded[0]
+            if created:
+                logger.info(
+                    f"Recorded feedback for task {feedback.task_id}: "
+                    f"was_good_match={feedback.was_good_match}"
+                )
+            else:
+                logger.info(f"Updated feedback for task {feedback.task_id}")
+        else:
+            logger.info(
+                f"Recorded feedback for {len(recorded)} tasks "
+                f"({len(created)} new, {len(recorded) - len(created)} updated)"
+            )
+
+        return recorded
+
+    def _build_feedback(
+        self,
+        task_id: str,
+        was_good_match: bool,
+        unexpected_blockers: list[str] | None = None,
+        required_skills_not_tagged: list[str] | None = None,
+        **fields: Any,
+    ) -> TaskFeedback:
+        """Build an unsaved TaskFeedback record."""
+        return TaskFeedback(
+            task_id=task_id,
+            was_good_match=was_good_match,
+            unexpected_blockers={"blockers": unexpected_blockers} if unexpected_blockers else None,
+            required_skills_not_tagged={"skills": required_skills_not_tagged} if required_skills_not_tagged else None,
+            **fields,
+        )
+
+    def _apply_feedback_updates(
+        self,
+        feedback: TaskFeedback,
+        task_id: str,
+        unexpected_blockers: list[str] | None = None,
+        required_skills_not_tagged: list[str] | None = None,
+        **fields: Any,
+    ) -> None:
+        """Overwrite the fields of existing feedback that were supplied."""
+        for name, value in fields.items():
+            if value is not None:
+                setattr(feedback, name, value)
+        if unexpected_blockers is not None:
+            feedback.unexpected_blockers = {"blockers": unexpected_blockers}
+        if required_skills_not_tagged is not None:
+            feedback.required_skills_not_tagged = {"skills": required_skills_not_tagged}
+
+    def _update_episode_outcomes(
+        self,
+        feedbacks: list[TaskFeedback],
+    ) -> dict[str, RoutingEpisode]:
+        """Update the linked routing episodes with feedback outcomes."""
+        if self.episodic_store is None or not feedbacks:
+            return {}
+
+        episodes = self.episodic_store.record_outcomes_for_tasks(
+            {
+                feedback.task_id: {
+                    "success": feedback.was_good_match or False,
+                    "duration": feedback.actual_duration,
+                    "notes": feedback.routing_feedback,
+                    "feedback_id": feedback.task_id,
+                }
+                for feedback in feedbacks
+            }
+        )
+        return {episode.task_id: episode for episode in episodes}
 
     def get_feedback(self, task_id: str) -> TaskFeedback | None:
         """
@@ -172,7 +340,8 @@ class FeedbackStore:
         Returns:
             TaskFeedback or None
         """
-        query = select(TaskFeedback).where(TaskFeedback.task_id == task_id)
+        query = lambda_stmt(lambda: select(TaskFeedback))
+        query += lambda s: s.where(TaskFeedback.task_id == task_id)
         result = self.session.execute(query)
         return result.scalar_one_or_none()
 
@@ -181,7 +350,7 @@ class FeedbackStore:
         limit: int = 100,
         offset: int = 0,
         good_matches_only: bool | None = None,
-    ) -> list[TaskFeedback]:
+    ) -> Sequence[TaskFeedback]:
         """
         Get all feedback records.
 
@@ -193,23 +362,45 @@ class FeedbackStore:
         Returns:
             List of TaskFeedback records
         """
-        query = select(TaskFeedback).order_by(TaskFeedback.created_at.desc())
+        query = lambda_stmt(
+            lambda: select(TaskFeedback).options(selectinload(TaskFeedback.task))
+        )
 
         if good_matches_only is True:
-            query = query.where(TaskFeedback.was_good_match == True)  # noqa: E712
+            query += lambda s: s.where(TaskFeedback.was_good_match == True)  # noqa: E712
         elif good_matches_only is False:
-            query = query.where(TaskFeedback.was_good_match == False)  # noqa: E712
+            query += lambda s: s.where(TaskFeedback.was_good_match == False)  # noqa: E712
 
-        query = query.offset(offset).limit(limit)
+        query += lambda s: s.order_by(TaskFeedback.created_at.desc()).offset(offset).limit(limit)
 
         result = self.session.execute(query)
-        return list(result.scalars().all())
+        return result.scalars().all()
+
+    def iter_all_feedback(self, batch_size: int = 500) -> Iterator[TaskFeedback]:
+        """
+        Iterate over every feedback record without buffering the whole table.
+
+        Rows are fetched from a server-side cursor in batches, so memory stays
+        bounded for exports regardless of table size.
+
+        Args:
+            batch_size: Rows fetched per round-trip
+
+        Yields:
+            TaskFeedback records, newest first
+        """
+        query = select(TaskFeedback).order_by(TaskFeedback.created_at.desc())
+        result = self.session.execute(
+            query,
+            execution_options={"stream_results": True, "yield_per": batch_size},
+        )
+        yield from result.scalars()
 
     def get_feedback_for_instance(
         self,
         instance_id: str,
         limit: int = 100,
-    ) -> list[TaskFeedback]:
+    ) -> Sequence[TaskFeedback]:
         """
         Get feedback for tasks routed to a specific instance.
 
@@ -220,18 +411,18 @@ class FeedbackStore:
         Returns:
             List of TaskFeedback records
         """
-        query = (
-            select(TaskFeedback)
-            .join(Task, TaskFeedback.task_id == Task.id)
-            .where(Task.instance_id == instance_id)
-            .order_by(TaskFeedback.created_at.desc())
-            .limit(limit)
+        query = lambda_stmt(
+            lambda: select(TaskFeedback)
+            .join(TaskFeedback.task)
+            .options(contains_eager(TaskFeedback.task))
         )
+        query += lambda s: s.where(Task.instance_id == instance_id)
+        query += lambda s: s.order_by(TaskFeedback.created_at.desc()).limit(limit)
 
         result = self.session.execute(query)
-        return list(result.scalars().all())
+        return result.scalars().all()
 
-    def get_misrouted_feedback(self, limit: int = 100) -> list[TaskFeedback]:
+    def get_misrouted_feedback(self, limit: int = 100) -> Sequence[TaskFeedback]:
         """
         Get feedback for misrouted tasks.
 
@@ -241,21 +432,20 @@ class FeedbackStore:
         Returns:
             List of TaskFeedback records where routing was bad
         """
-        query = (
-            select(TaskFeedback)
-            .where(TaskFeedback.was_good_match == False)  # noqa: E712
-            .order_by(TaskFeedback.created_at.desc())
-            .limit(limit)
+        query = lambda_stmt(
+            lambda: select(TaskFeedback).options(selectinload(TaskFeedback.task))
         )
+        query += lambda s: s.where(TaskFeedback.was_good_match == False)  # noqa: E712
+        query += lambda s: s.order_by(TaskFeedback.created_at.desc()).limit(limit)
 
         result = self.session.execute(query)
-        return list(result.scalars().all())
+        return result.scalars().all()
 
     def get_tasks_needing_feedback(
         self,
         limit: int = 50,
         status_filter: list[TaskStatus] | None = None,
-    ) -> list[Task]:
+    ) -> Sequence[Task]:
         """
         Get completed tasks that don't have feedback yet.
 
@@ -269,15 +459,14 @@ class FeedbackStore:
         if status_filter is None:
             status_filter = [TaskStatus.DONE]
 
-        # Subquery for tasks with feedback
-        feedback_subquery = select(TaskFeedback.task_id)
-
+        # Anti-join: tasks with no matching feedback row
         query = (
             select(Task)
+            .outerjoin(TaskFeedback, TaskFeedback.task_id == Task.id)
             .where(
                 and_(
                     Task.status.in_(status_filter),
-                    Task.id.notin_(feedback_subquery),
+                    TaskFeedback.task_id.is_(None),
                 )
             )
             .order_by(Task.updated_at.desc())
@@ -285,7 +474,7 @@ class FeedbackStore:
         )
 
         result = self.session.execute(query)
-        return list(result.scalars().all())
+        return result.scalars().all()
 
     def delete_feedback(self, task_id: str) -> bool:
         """
@@ -303,6 +492,7 @@ class FeedbackStore:
 
         self.session.delete(feedback)
         self.session.flush()
+        clear_summary_cache()
 
         logger.info(f"Deleted feedback for task {task_id}")
         return True
@@ -3,11 +3,12 @@ Learning engine that integrates all memory components.
 """
 
 import logging
-from collections import Counter
+import sys
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from typing import Any
 
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
 from hopper.models import Task
@@ -23,9 +24,9 @@ from .suggestion import RoutingSuggestion, SuggestionSource
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class LearningResult:
-    """Result of a learning operation."""
+    """Result of a learning operation (immutable, so no-op results can be shared)."""
 
     episodes_created: int = 0
     patterns_updated: int = 0
@@ -42,6 +43,10 @@ class LearningResult:
         }
 
 
+# Shared result for calls that found nothing to update
+_EMPTY_RESULT = LearningResult()
+
+
 class LearningEngine:
     """
     Central learning engine that integrates all memory components.
@@ -61,6 +66,7 @@ class LearningEngine:
         consolidated_store: ConsolidatedStore | None = None,
         task_searcher: TaskSearcher | None = None,
         feedback_store: FeedbackStore | None = None,
+        pattern_batch_size: int = 1,
     ):
         """
         Initialize learning engine.
@@ -72,6 +78,8 @@ class LearningEngine:
             consolidated_store: Consolidated store (created if not provided)
             task_searcher: Task searcher (created if not provided)
             feedback_store: Feedback store (created if not provided)
+            pattern_batch_size: Pattern confidence updates to buffer before
+                writing them in one batch (1 writes each update immediately)
         """
         self.session = session
 
@@ -84,6 +92,15 @@ class LearningEngine:
             session, self.episodic_store
         )
 
+        # Buffered (pattern_id, success) confidence updates; flushed when the
+        # batch fills, before consolidation and before the session commits,
+        # and dropped if the session rolls back. close() removes the hooks.
+        self.pattern_batch_size = pattern_batch_size
+        self._pending_pattern_updates: list[tuple[str, bool]] = []
+        if pattern_batch_size > 1:
+            event.listen(session, "before_commit", self._flush_before_commit)
+            event.listen(session, "after_rollback", self._discard_after_rollback)
+
         # Pattern extractor for consolidation
         self._pattern_extractor = PatternExtractor(
             session,
@@ -99,7 +116,10 @@ class LearningEngine:
         """
         Build complete routing context for a task.
 
-        Includes similar tasks, patterns, and recent decisions.
+        Includes similar tasks (with their latest episode outcomes) and the
+        given available instances. The similarity search and the outcome
+        lookup share this engine's Session, which is not thread-safe, so they
+        run sequentially; the outcome lookup is a single batched query.
 
         Args:
             task: Task to build context for
@@ -140,10 +160,14 @@ class LearningEngine:
             min_score=0.3,
         )
 
+        # Get episode outcomes for all results in one round-trip
+        episodes = self.episodic_store.get_latest_episodes_for_tasks(
+            [result.task_id for result in search_results]
+        )
+
         similar = []
         for result in search_results:
-            # Get episode outcome for this task
-            episode = self.episodic_store.get_latest_episode_for_task(result.task_id)
+            episode = episodes.get(result.task_id)
 
             similar.append(
                 SimilarTask(
@@ -179,6 +203,14 @@ class LearningEngine:
         Returns:
             List of routing suggestions, sorted by confidence
         """
+        # Reuse suggestions from an earlier call unless the caller supplied
+        # its own context, which may differ from the cached one
+        use_cache = context is None
+        if use_cache:
+            cached = self.working_memory.get_suggestions(task.id, limit)
+            if cached is not None:
+                return [RoutingSuggestion.from_dict(data) for data in cached]
+
         suggestions = []
 
         # Get tags
@@ -186,22 +218,33 @@ class LearningEngine:
         priority = task.priority
         title = task.title
 
-        # 1. Check consolidated patterns
-        pattern_matches = self.consolidated_store.find_matching_patterns(
-            tags=tags,
-            priority=priority,
-            title=title,
-            min_confidence=0.4,
-            limit=limit,
-        )
+        # 1. Check consolidated patterns (cached per tag set, priority and title)
+        pattern_matches = self.working_memory.get_pattern_matches(tags, priority, title, limit)
+        if pattern_matches is None:
+            pattern_matches = [
+                {
+                    "pattern_id": pattern.id,
+                    "pattern_name": pattern.name,
+                    "target_instance": pattern.target_instance,
+                    "score": score,
+                }
+                for pattern, score in self.consolidated_store.find_matching_patterns(
+                    tags=tags,
+                    priority=priority,
+                    title=title,
+                    min_confidence=0.4,
+                    limit=limit,
+                )
+            ]
+            self.working_memory.set_pattern_matches(tags, priority, title, limit, pattern_matches)
 
-        for pattern, score in pattern_matches:
+        for match in pattern_matches:
             suggestions.append(
                 RoutingSuggestion.from_pattern(
-                    target_instance=pattern.target_instance,
-                    confidence=score,
-                    pattern_id=pattern.id,
-                    pattern_name=pattern.name,
+                    target_instance=match["target_instance"],
+                    confidence=match["score"],
+                    pattern_id=match["pattern_id"],
+                    pattern_name=match["pattern_name"],
                 )
             )
 
@@ -216,7 +259,14 @@ class LearningEngine:
 
         # Sort by confidence and return top suggestions
         suggestions.sort(key=lambda s: s.confidence, reverse=True)
-        return suggestions[:limit]
+        suggestions = suggestions[:limit]
+
+        if use_cache:
+            self.working_memory.set_suggestions(
+                task.id, limit, [suggestion.to_dict() for suggestion in suggestions]
+            )
+
+        return suggestions
 
     def _analyze_similar_tasks(
         self,
@@ -226,26 +276,29 @@ class LearningEngine:
         if not similar_tasks:
             return None
 
-        # Count successful routings by instance
-        instance_successes: Counter[str] = Counter()
-        instance_totals: Counter[str] = Counter()
+        # Tally [successes, total, task_ids] per instance in one pass, mutating
+        # the entry in place so each task costs one dict lookup
+        instance_stats: dict[str, list[Any]] = {}
 
         for task in similar_tasks:
             if task.routed_to:
-                instance_totals[task.routed_to] += 1
+                # Instance IDs repeat across tasks; interning makes key lookups pointer compares
+                instance_id = sys.intern(task.routed_to)
+                stats = instance_stats.get(instance_id)
+                if stats is None:
+                    stats = instance_stats[instance_id] = [0, 0, []]
                 if task.outcome_success:
-                    instance_successes[task.routed_to] += 1
-
-        if not instance_totals:
-            return None
+                    stats[0] += 1
+                stats[1] += 1
+                stats[2].append(task.task_id)
 
         # Find best instance
         best_instance = None
         best_score = 0.0
+        best_rate = 0.0
 
-        for instance_id, total in instance_totals.items():
-            successes = instance_successes[instance_id]
-            success_rate = successes / total if total > 0 else 0
+        for instance_id, (successes, total, _) in instance_stats.items():
+            success_rate = successes / total
 
             # Score based on success rate and volume
             score = success_rate * min(1.0, total / 3)  # Cap volume bonus at 3 tasks
@@ -253,17 +306,14 @@ class LearningEngine:
             if score > best_score:
                 best_score = score
                 best_instance = instance_id
+                best_rate = success_rate
 
         if best_instance and best_score > 0.3:
-            total = instance_totals[best_instance]
-            successes = instance_successes[best_instance]
-            success_rate = successes / total if total > 0 else 0
-
             return RoutingSuggestion.from_similar_tasks(
                 target_instance=best_instance,
                 confidence=best_score,
-                similar_task_ids=[t.task_id for t in similar_tasks if t.routed_to == best_instance],
-                success_rate=success_rate,
+                similar_task_ids=instance_stats[best_instance][2],
+                success_rate=best_rate,
             )
 
         return None
@@ -291,12 +341,15 @@ class LearningEngine:
         Returns:
             Created RoutingEpisode
         """
-        # Build decision factors
-        factors = {}
+        # Build decision factors (only what the suggestion carries, to keep
+        # the per-episode JSON payload small)
+        factors: dict[str, Any] = {}
         if suggestion:
             factors["source"] = suggestion.source.value
-            factors["pattern_id"] = suggestion.pattern_id
-            factors["similar_task_ids"] = suggestion.similar_task_ids
+            if suggestion.pattern_id:
+                factors["pattern_id"] = suggestion.pattern_id
+            if suggestion.similar_task_ids:
+                factors["similar_task_ids"] = suggestion.similar_task_ids
 
         # Get available instances from context
         context = self.working_memory.get_context(task.id)
@@ -342,30 +395,30 @@ class LearningEngine:
         Returns:
             LearningResult summarizing updates
         """
-        result = LearningResult()
+        self.working_memory.invalidate_suggestions(task_id)
 
         # Get latest episode for task
         episode = self.episodic_store.get_latest_episode_for_task(task_id)
-        if episode:
-            # Update episode outcome
-            self.episodic_store.record_outcome(
-                episode_id=episode.id,
-                success=success,
-                duration=duration,
-                notes=notes,
-            )
-            result.episodes_created = 1
+        if episode is None:
+            return _EMPTY_RESULT
+
+        # Update episode outcome
+        self.episodic_store.record_outcome(
+            episode_id=episode.id,
+            success=success,
+            duration=duration,
+            notes=notes,
+        )
 
-            # Update pattern confidence if used
-            if episode.decision_factors:
-                pattern_id = episode.decision_factors.get("pattern_id")
-                if pattern_id:
-                    self.consolidated_store.update_pattern_confidence(
-                        pattern_id, success
-                    )
-                    result.patterns_updated = 1
+        # Update pattern confidence if used
+        patterns_updated = 0
+        if episode.decision_factors:
+            pattern_id = episode.decision_factors.get("pattern_id")
+            if pattern_id:
+                self._queue_pattern_update(pattern_id, success)
+                patterns_updated = 1
 
-        return result
+        return LearningResult(episodes_created=1, patterns_updated=patterns_updated)
 
     def process_feedback(
         self,
@@ -388,10 +441,11 @@ class LearningEngine:
         Returns:
             LearningResult summarizing updates
         """
-        result = LearningResult()
+        self.working_memory.invalidate_suggestions(task_id)
 
-        # Record feedback
-        feedback = self.feedback_store.record_feedback(
+        # Record feedback (the feedback store also records the outcome on
+        # the task's latest episode and hands that episode back)
+        feedback, episode = self.feedback_store.record_feedback_with_episode(
             task_id=task_id,
             was_good_match=was_good_match,
             routing_feedback=routing_feedback,
@@ -399,27 +453,18 @@ class LearningEngine:
             **kwargs,
         )
 
-        if feedback:
-            result.feedback_processed = 1
+        if feedback is None:
+            return _EMPTY_RESULT
 
-            # Update episode outcome based on feedback
-            episode = self.episodic_store.get_latest_episode_for_task(task_id)
-            if episode:
-                if was_good_match:
-                    episode.mark_success(notes=routing_feedback)
-                else:
-                    episode.mark_failure(notes=routing_feedback)
+        # Update pattern confidence
+        patterns_updated = 0
+        if episode and episode.decision_factors:
+            pattern_id = episode.decision_factors.get("pattern_id")
+            if pattern_id:
+                self._queue_pattern_update(pattern_id, was_good_match)
+                patterns_updated = 1
 
-                # Update pattern confidence
-                if episode.decision_factors:
-                    pattern_id = episode.decision_factors.get("pattern_id")
-                    if pattern_id:
-                        self.consolidated_store.update_pattern_confidence(
-                            pattern_id, was_good_match
-                        )
-                        result.patterns_updated = 1
-
-        return result
+        return LearningResult(feedback_processed=1, patterns_updated=patterns_updated)
 
     def run_consolidation(
         self,
@@ -437,15 +482,70 @@ class LearningEngine:
         if since is None:
             since = datetime.utcnow() - timedelta(days=7)
 
+        # Consolidation reads pattern stats, so apply buffered updates first
+        self.flush_pattern_updates()
+
         consolidation = self._pattern_extractor.run_consolidation(
             since=since,
             min_confidence=0.5,
         )
+        self._patterns_changed()
 
         return LearningResult(
             patterns_created=consolidation["patterns_created"],
         )
 
+    def flush_pattern_updates(self) -> int:
+        """
+        Write buffered pattern confidence updates in one batch.
+
+        Returns:
+            Number of updates applied
+        """
+        if not self._pending_pattern_updates:
+            return 0
+
+        pending, self._pending_pattern_updates = self._pending_pattern_updates, []
+        self.consolidated_store.update_pattern_confidences(pending)
+        self._patterns_changed()
+
+        return len(pending)
+
+    def _queue_pattern_update(self, pattern_id: str, success: bool) -> None:
+        """Buffer a pattern confidence update, flushing when the batch is full."""
+        self._pending_pattern_updates.append((pattern_id, success))
+        if len(self._pending_pattern_updates) >= self.pattern_batch_size:
+            self.flush_pattern_updates()
+
+    def _flush_before_commit(self, session: Session) -> None:
+        """Session hook so buffered updates are never lost on commit."""
+        self.flush_pattern_updates()
+
+    def _discard_after_rollback(self, session: Session) -> None:
+        """Session hook dropping buffered updates from a rolled-back transaction."""
+        if self._pending_pattern_updates:
+            logger.warning(
+                "Discarding %d buffered pattern updates after rollback",
+                len(self._pending_pattern_updates),
+            )
+            self._pending_pattern_updates = []
+
+    def close(self) -> None:
+        """
+        Flush buffered pattern updates and detach from the session.
+
+        Engines with a pattern_batch_size above 1 hook into their session,
+        which keeps them alive until close() is called.
+        """
+        self.flush_pattern_updates()
+        if event.contains(self.session, "before_commit", self._flush_before_commit):
+            event.remove(self.session, "before_commit", self._flush_before_commit)
+            event.remove(self.session, "after_rollback", self._discard_after_rollback)
+
+    def _patterns_changed(self) -> None:
+        """Drop cached pattern matches and suggestions after patterns change."""
+        self.working_memory.clear_pattern_matches()
+
     def get_statistics(self) -> dict[str, Any]:
         """Get learning engine statistics."""
         episodic_stats = self.episodic_store.get_statistics()
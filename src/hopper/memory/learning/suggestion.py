@@ -2,12 +2,18 @@
 Routing suggestion types.
 """
 
+from collections.abc import Sequence
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import UTC, datetime
 from enum import Enum
 from typing import Any
 
 
+def _utc_now() -> datetime:
+    """Get current UTC time (timezone-aware)."""
+    return datetime.now(UTC)
+
+
 class SuggestionSource(Enum):
     """Source of a routing suggestion."""
 
@@ -17,7 +23,7 @@ class SuggestionSource(Enum):
     DEFAULT = "default"  # Default routing
 
 
-@dataclass
+@dataclass(slots=True)
 class RoutingSuggestion:
     """A routing suggestion from the learning system."""
 
@@ -28,11 +34,11 @@ class RoutingSuggestion:
 
     # Supporting data
     pattern_id: str | None = None
-    similar_task_ids: list[str] = field(default_factory=list)
-    factors: dict[str, Any] = field(default_factory=dict)
+    similar_task_ids: tuple[str, ...] = ()
+    factors: dict[str, Any] | None = None  # None rather than a fresh {} per suggestion
 
     # Metadata
-    created_at: datetime = field(default_factory=datetime.utcnow)
+    created_at: datetime = field(default_factory=_utc_now)
 
     def to_dict(self) -> dict[str, Any]:
         """Convert to dictionary."""
@@ -43,10 +49,24 @@ class RoutingSuggestion:
             "reasoning": self.reasoning,
             "pattern_id": self.pattern_id,
             "similar_task_ids": self.similar_task_ids,
-            "factors": self.factors,
+            "factors": self.factors or {},
             "created_at": self.created_at.isoformat(),
         }
 
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "RoutingSuggestion":
+        """Create from dictionary."""
+        return cls(
+            target_instance=data["target_instance"],
+            confidence=data["confidence"],
+            source=SuggestionSource(data["source"]),
+            reasoning=data["reasoning"],
+            pattern_id=data.get("pattern_id"),
+            similar_task_ids=tuple(data.get("similar_task_ids", ())),
+            factors=data.get("factors") or None,
+            created_at=datetime.fromisoformat(data["created_at"]),
+        )
+
     @classmethod
     def from_pattern(
         cls,
@@ -69,7 +89,7 @@ class RoutingSuggestion:
         cls,
         target_instance: str,
         confidence: float,
-        similar_task_ids: list[str],
+        similar_task_ids: Sequence[str],
         success_rate: float,
     ) -> "RoutingSuggestion":
         """Create suggestion from similar task analysis."""
@@ -78,6 +98,6 @@ class RoutingSuggestion:
             confidence=confidence,
             source=SuggestionSource.SIMILAR_TASK,
             reasoning=f"Based on {len(similar_task_ids)} similar tasks ({success_rate:.0%} success rate)",
-            similar_task_ids=similar_task_ids,
+            similar_task_ids=tuple(similar_task_ids),
             factors={"success_rate": success_rate},
         )
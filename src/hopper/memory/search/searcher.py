@@ -3,11 +3,15 @@ Task searcher for finding similar tasks in the database.
 """
 
 import logging
+import os
+import pickle
+import tempfile
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import ColumnElement, func, select
 from sqlalchemy.orm import Session
 
 from hopper.models import Task, TaskStatus
@@ -62,6 +66,7 @@ class TaskSearcher:
         tag_weight: float = 0.4,
         max_corpus_size: int = 10000,
         corpus_max_age_days: int = 90,
+        persist_path: str | Path | None = None,
     ):
         """
         Initialize task searcher.
@@ -72,10 +77,15 @@ class TaskSearcher:
             tag_weight: Weight for tag similarity
             max_corpus_size: Maximum corpus size
             corpus_max_age_days: Only index tasks from this many days ago
+            persist_path: File to snapshot the index to. A later searcher
+                loads it instead of re-indexing while the tasks it covers are
+                unchanged. The file is a pickle, so it must only be writable
+                by this service.
         """
         self.session = session
         self.max_corpus_size = max_corpus_size
         self.corpus_max_age_days = corpus_max_age_days
+        self.persist_path = Path(persist_path) if persist_path else None
 
         self._similarity = TaskSimilarity(
             text_weight=text_weight,
@@ -104,56 +114,128 @@ class TaskSearcher:
         if self._indexed and not force:
             return self._similarity.get_corpus_size()
 
+        filters: list[ColumnElement[bool]] = []
+        if status_filter:
+            filters.append(Task.status.in_(status_filter))
+        if self.corpus_max_age_days > 0:
+            cutoff = datetime.utcnow() - timedelta(days=self.corpus_max_age_days)
+            filters.append(Task.created_at >= cutoff)
+
+        persist_path = self.persist_path
+        version = None
+        if persist_path is not None:
+            version = self._index_version(filters, status_filter)
+            if not force and self._load_snapshot(persist_path, version):
+                self._indexed = True
+                count = self._similarity.get_corpus_size()
+                logger.info(f"Loaded {count} indexed tasks from {persist_path}")
+                return count
+
         # Clear existing index
         self._similarity.clear()
         self._task_cache.clear()
 
-        # Build query
-        query = select(Task).order_by(Task.created_at.desc())
-
-        # Apply status filter
-        if status_filter:
-            query = query.where(Task.status.in_(status_filter))
-
-        # Apply age filter
-        if self.corpus_max_age_days > 0:
-            cutoff = datetime.utcnow() - timedelta(days=self.corpus_max_age_days)
-            query = query.where(Task.created_at >= cutoff)
+        # Build query over just the indexed columns, so rows come back as
+        # tuples rather than hydrated Task instances
+        query = select(
+            Task.id,
+            Task.title,
+            Task.description,
+            Task.tags,
+            Task.project,
+            Task.instance_id,
+            Task.status,
+            Task.created_at,
+        ).where(*filters).order_by(Task.created_at.desc())
 
         # Limit size
         query = query.limit(self.max_corpus_size)
 
-        result = self.session.execute(query)
-        tasks = result.scalars().all()
+        result = self.session.execute(
+            query,
+            execution_options={"stream_results": True, "yield_per": 1000},
+        )
 
         # Index each task
-        for task in tasks:
-            text = f"{task.title or ''} {task.description or ''}"
-            tags = task.tags or {}
-
-            self._similarity.add_document(
-                task_id=task.id,
-                text=text,
-                tags=tags,
-            )
-
-            # Cache metadata
-            self._task_cache[task.id] = {
-                "title": task.title,
-                "project": task.project,
-                "tags": tags,
-                "instance_id": task.instance_id,
-                "status": task.status.value if hasattr(task.status, "value") else str(task.status),
-                "created_at": task.created_at,
-            }
+        for row in result:
+            self._index_row(row)
 
         self._indexed = True
         count = self._similarity.get_corpus_size()
 
         logger.info(f"Indexed {count} tasks for similarity search")
 
+        if persist_path is not None and version is not None:
+            self._save_snapshot(persist_path, version)
+
         return count
 
+    def _index_version(
+        self,
+        filters: list[Any],
+        status_filter: list[TaskStatus] | None,
+    ) -> tuple[Any, ...]:
+        """
+        Identify the indexed task set and settings for snapshot reuse.
+
+        Any insert, update or task ageing out of the window changes the
+        count or latest update time of the filtered tasks.
+        """
+        count, last_updated = self.session.execute(
+            select(func.count(Task.id), func.max(Task.updated_at)).where(*filters)
+        ).one()
+        statuses = sorted(
+            s.value if hasattr(s, "value") else str(s) for s in status_filter or []
+        )
+        return (
+            count,
+            last_updated,
+            tuple(statuses),
+            self.max_corpus_size,
+            self.corpus_max_age_days,
+            self._similarity.text_weight,
+            self._similarity.tag_weight,
+        )
+
+    def _load_snapshot(self, path: Path, version: tuple[Any, ...]) -> bool:
+        """Restore the index from the snapshot file if it matches version."""
+        try:
+            with open(path, "rb") as f:
+                snapshot = pickle.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable search index snapshot: {e}")
+            return False
+
+        if snapshot.get("version") != version:
+            return False
+
+        self._similarity = snapshot["similarity"]
+        self._task_cache = snapshot["task_cache"]
+        return True
+
+    def _save_snapshot(self, path: Path, version: tuple[Any, ...]) -> None:
+        """Write the index to the snapshot file atomically."""
+        snapshot = {
+            "version": version,
+            "similarity": self._similarity,
+            "task_cache": self._task_cache,
+        }
+        directory = path.parent
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning(f"Could not write search index snapshot: {e}")
+
     def search(
         self,
         text: str,
@@ -263,12 +345,19 @@ class TaskSearcher:
         Args:
             task: Task to add
         """
-        text = f"{task.title or ''} {task.description or ''}"
+        self._index_row(task)
+
+    def _index_row(self, task: Any) -> None:
+        """
+        Add a task to the similarity corpus and cache its metadata.
+
+        Accepts a Task or a row with the same attribute names.
+        """
         tags = task.tags or {}
 
         self._similarity.add_document(
             task_id=task.id,
-            text=text,
+            text=(task.title or "", task.description or ""),
             tags=tags,
         )
 
@@ -2,12 +2,28 @@
 Task similarity calculations using TF-IDF and tag matching.
 """
 
+import heapq
 import math
 import re
-from collections import Counter
+import sys
+from collections import Counter, defaultdict
 from dataclasses import dataclass, field
+from functools import lru_cache
+from operator import itemgetter
 from typing import Any
 
+# Sublinear TF for small counts. Counter counts are always >= 1, and sharing
+# these float objects means most postings reference one of a handful of values
+# instead of each holding its own.
+_SUBLINEAR_TF = tuple(1 + math.log(count) if count else 0.0 for count in range(64))
+
+
+def _sublinear_tf(count: int) -> float:
+    """Return 1 + log(count), shared for common counts."""
+    if count < len(_SUBLINEAR_TF):
+        return _SUBLINEAR_TF[count]
+    return 1 + math.log(count)
+
 
 @dataclass
 class SimilarityResult:
@@ -53,6 +69,8 @@ class TaskSimilarity:
         "down", "over", "under", "again", "further", "about", "through",
     }
 
+    _TOKEN_RE = re.compile(r"\b[a-z][a-z0-9_-]*\b")
+
     def __init__(
         self,
         text_weight: float = 0.6,
@@ -74,8 +92,38 @@ class TaskSimilarity:
         # Document frequency cache for IDF
         self._doc_count = 0
         self._doc_freq: Counter[str] = Counter()
-        self._corpus_vectors: dict[str, dict[str, float]] = {}
-        self._corpus_tags: dict[str, set[str]] = {}
+        self._corpus_terms: dict[str, tuple[str, ...]] = {}
+
+        # Insertion sequence per document, so equal scores rank in corpus
+        # order however the candidate set happens to iterate
+        self._doc_seq: dict[str, int] = {}
+        self._next_seq = 0
+
+        # Tags are numbered on first sight and each document keeps its tag
+        # set as a bitmask, so Jaccard is two bit ops and two popcounts
+        self._tag_bits: dict[str, int] = {}
+        self._tag_names: list[str] = []
+        self._corpus_tag_masks: dict[str, int] = {}
+
+        # Inverted indexes so queries only touch documents sharing a term
+        # or tag: term -> {task_id: tf} and tag -> {task_id}. The term
+        # postings are the only copy of the TF weights.
+        self._postings: dict[str, dict[str, float]] = {}
+        self._tag_postings: dict[str, set[str]] = {}
+
+        # IDF is log(N) - log(df). Only log(df) is cached per term, and each
+        # document's squared TF-IDF norm is kept expanded as
+        #     L^2 * A - 2 * L * B + C,   L = log(N)
+        # with A = sum(tf^2), B = sum(tf^2 * log df), C = sum(tf^2 * log^2 df).
+        # A change in N then costs nothing, and a change in a term's df only
+        # touches documents containing that term, refreshed lazily.
+        self._log_df: dict[str, float] = {}
+        self._norm_sums: dict[str, list[float]] = {}
+        self._idf_dirty: set[str] = set()
+
+        # Query TF vectors keyed by text. TF does not depend on the corpus,
+        # so repeated queries skip tokenizing without any invalidation.
+        self._query_tf = lru_cache(maxsize=512)(self._compute_query_tf)
 
     def tokenize(self, text: str) -> list[str]:
         """
@@ -90,16 +138,30 @@ class TaskSimilarity:
         if not text:
             return []
 
-        # Lowercase and extract words
-        text = text.lower()
-        words = re.findall(r"\b[a-z][a-z0-9_-]*\b", text)
-
-        # Filter stop words and short tokens
-        tokens = [
-            w for w in words
-            if w not in self.STOP_WORDS and len(w) >= self.min_token_length
+        # Lowercase, extract words and filter stop words and short tokens
+        # in one pass. Tokens are interned since they become dict keys in
+        # the postings and query vectors.
+        stop_words = self.STOP_WORDS
+        min_length = self.min_token_length
+        return [
+            sys.intern(word)
+            for word in self._TOKEN_RE.findall(text.lower())
+            if len(word) >= min_length and word not in stop_words
         ]
 
+    def tokenize_many(self, *texts: str) -> list[str]:
+        """
+        Tokenize several texts as if joined by spaces, without joining them.
+
+        Args:
+            texts: Texts to tokenize, e.g. title and description
+
+        Returns:
+            List of tokens
+        """
+        tokens: list[str] = []
+        for text in texts:
+            tokens.extend(self.tokenize(text))
         return tokens
 
     def compute_tf(self, tokens: list[str]) -> dict[str, float]:
@@ -117,11 +179,7 @@ class TaskSimilarity:
         if not tokens:
             return {}
 
-        counts = Counter(tokens)
-        tf = {}
-        for term, count in counts.items():
-            tf[term] = 1 + math.log(count) if count > 0 else 0
-        return tf
+        return {term: _sublinear_tf(count) for term, count in Counter(tokens).items()}
 
     def compute_idf(self, term: str) -> float:
         """
@@ -133,14 +191,60 @@ class TaskSimilarity:
         Returns:
             IDF score
         """
-        if self._doc_count == 0:
-            return 0.0
-
-        doc_freq = self._doc_freq.get(term, 0)
-        if doc_freq == 0:
+        self._refresh_idf()
+        log_df = self._log_df.get(term)
+        if log_df is None:
             return 0.0
-
-        return math.log(self._doc_count / doc_freq)
+        return math.log(self._doc_count) - log_df
+
+    def _refresh_idf(self) -> None:
+        """Update cached log(df) and norm sums for terms whose df changed."""
+        if not self._idf_dirty:
+            return
+
+        affected: set[str] = set()
+        for term in self._idf_dirty:
+            freq = self._doc_freq.get(term)
+            if freq:
+                self._log_df[term] = math.log(freq)
+                affected.update(self._postings[term])
+            else:
+                self._log_df.pop(term, None)
+        self._idf_dirty.clear()
+
+        log_df = self._log_df
+        postings = self._postings
+        for task_id in affected:
+            b = c = 0.0
+            for term in self._corpus_terms[task_id]:
+                weight = postings[term][task_id] ** 2
+                log_freq = log_df[term]
+                b += weight * log_freq
+                c += weight * log_freq * log_freq
+            sums = self._norm_sums[task_id]
+            sums[1] = b
+            sums[2] = c
+
+    def _doc_norm(self, task_id: str, log_n: float) -> float:
+        """TF-IDF norm of a document given L = log(N)."""
+        a, b, c = self._norm_sums[task_id]
+        # Clamp rounding error when every term's IDF is close to zero
+        return math.sqrt(max(log_n * log_n * a - 2 * log_n * b + c, 0.0))
+
+    def __getstate__(self) -> dict[str, Any]:
+        """Pickle the corpus without the per-instance query cache."""
+        state = self.__dict__.copy()
+        del state["_query_tf"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        """Restore the corpus and recreate the query cache."""
+        self.__dict__.update(state)
+        self._query_tf = lru_cache(maxsize=512)(self._compute_query_tf)
+
+    def _compute_query_tf(self, text: str) -> dict[str, float]:
+        """Tokenize query text and compute its TF vector."""
+        return self.compute_tf(self.tokenize(text))
 
     def compute_tfidf(self, tokens: list[str]) -> dict[str, float]:
         """
@@ -159,10 +263,21 @@ class TaskSimilarity:
             tfidf[term] = tf_score * idf
         return tfidf
 
+    def _normalize_tags(
+        self,
+        tags: list[str] | set[str] | dict[str, Any] | None,
+    ) -> set[str]:
+        """Normalize the accepted tag shapes to a set of tag names."""
+        if isinstance(tags, dict):
+            return set(tags.keys())
+        if isinstance(tags, (list, set)):
+            return set(tags)
+        return set()
+
     def add_document(
         self,
         task_id: str,
-        text: str,
+        text: str | tuple[str, ...],
         tags: list[str] | set[str] | dict[str, Any] | None = None,
     ) -> None:
         """
@@ -170,10 +285,18 @@ class TaskSimilarity:
 
         Args:
             task_id: Task ID
-            text: Task text (title + description)
+            text: Task text, or its parts (e.g. title, description) to be
+                tokenized separately instead of concatenated
             tags: Task tags
         """
-        tokens = self.tokenize(text)
+        # Re-adding a task replaces it rather than double-counting its terms
+        self.remove_document(task_id)
+
+        # The ID keys every posting the document appears in; interning shares
+        # one string across them, the same as tokens
+        task_id = sys.intern(task_id)
+
+        tokens = self.tokenize(text) if isinstance(text, str) else self.tokenize_many(*text)
 
         # Update document frequency
         unique_terms = set(tokens)
@@ -181,21 +304,26 @@ class TaskSimilarity:
             self._doc_freq[term] += 1
         self._doc_count += 1
 
-        # Store TF vector (we'll compute TF-IDF at query time)
+        # Store TF weights in the postings; the IDF-dependent norm sums are
+        # filled in by _refresh_idf since every term here is now dirty
         tf = self.compute_tf(tokens)
-        self._corpus_vectors[task_id] = tf
-
-        # Normalize tags
-        if tags is None:
-            tag_set = set()
-        elif isinstance(tags, dict):
-            tag_set = set(tags.keys())
-        elif isinstance(tags, (list, set)):
-            tag_set = set(tags)
-        else:
-            tag_set = set()
-
-        self._corpus_tags[task_id] = tag_set
+        self._corpus_terms[task_id] = tuple(tf)
+        self._doc_seq[task_id] = self._next_seq
+        self._next_seq += 1
+        for term, tf_score in tf.items():
+            self._postings.setdefault(term, {})[task_id] = tf_score
+        self._norm_sums[task_id] = [sum(v * v for v in tf.values()), 0.0, 0.0]
+        self._idf_dirty.update(unique_terms)
+
+        mask = 0
+        for tag in self._normalize_tags(tags):
+            bit = self._tag_bits.get(tag)
+            if bit is None:
+                bit = self._tag_bits[tag] = len(self._tag_names)
+                self._tag_names.append(tag)
+            mask |= 1 << bit
+            self._tag_postings.setdefault(tag, set()).add(task_id)
+        self._corpus_tag_masks[task_id] = mask
 
     def remove_document(self, task_id: str) -> bool:
         """
@@ -207,19 +335,36 @@ class TaskSimilarity:
         Returns:
             True if removed
         """
-        if task_id not in self._corpus_vectors:
+        terms = self._corpus_terms.pop(task_id, None)
+        if terms is None:
             return False
+        del self._doc_seq[task_id]
 
         # Update document frequency
-        tf = self._corpus_vectors[task_id]
-        for term in tf.keys():
+        for term in terms:
             self._doc_freq[term] -= 1
             if self._doc_freq[term] <= 0:
                 del self._doc_freq[term]
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(task_id, None)
+                if not postings:
+                    del self._postings[term]
+
+        mask = self._corpus_tag_masks.pop(task_id, 0)
+        while mask:
+            low = mask & -mask
+            mask ^= low
+            tag = self._tag_names[low.bit_length() - 1]
+            tagged = self._tag_postings.get(tag)
+            if tagged is not None:
+                tagged.discard(task_id)
+                if not tagged:
+                    del self._tag_postings[tag]
 
         self._doc_count -= 1
-        del self._corpus_vectors[task_id]
-        self._corpus_tags.pop(task_id, None)
+        del self._norm_sums[task_id]
+        self._idf_dirty.update(terms)
 
         return True
 
@@ -306,59 +451,112 @@ class TaskSimilarity:
         """
         exclude_ids = exclude_ids or set()
 
-        # Compute query vector
-        query_tokens = self.tokenize(text)
-        query_tfidf = self.compute_tfidf(query_tokens)
-
-        # Normalize query tags
-        if tags is None:
-            query_tags = set()
-        elif isinstance(tags, dict):
-            query_tags = set(tags.keys())
-        elif isinstance(tags, (list, set)):
-            query_tags = set(tags)
-        else:
-            query_tags = set()
-
-        results = []
-
-        for task_id, corpus_tf in self._corpus_vectors.items():
+        self._refresh_idf()
+        log_n = math.log(self._doc_count) if self._doc_count else 0.0
+
+        # Each query term contributes q_t * tf_dt * idf_t to a document's dot
+        # product, with q_t = tf_qt * idf_t / |q|. Fold everything but tf_dt
+        # into one factor per term so the scatter below is one multiply per
+        # posting. Terms unknown to the corpus or in every document carry no
+        # weight.
+        log_df = self._log_df
+        query_terms: list[tuple[str, float]] = []
+        query_sq = 0.0
+        for term, tf_score in self._query_tf(text).items():
+            term_log_df = log_df.get(term)
+            if term_log_df is None or term_log_df == log_n:
+                continue
+            term_idf = log_n - term_log_df
+            weight = tf_score * term_idf
+            query_terms.append((term, weight * term_idf))
+            query_sq += weight * weight
+        query_norm = math.sqrt(query_sq)
+
+        query_tags = self._normalize_tags(tags)
+
+        # Tags unknown to the corpus have no bit but still count towards
+        # the Jaccard union
+        query_mask = 0
+        unknown_tags = 0
+        for tag in query_tags:
+            bit = self._tag_bits.get(tag)
+            if bit is None:
+                unknown_tags += 1
+            else:
+                query_mask |= 1 << bit
+
+        # Accumulate dot products from the postings of the query terms, so
+        # only documents sharing a term with the query are touched.
+        dots: defaultdict[str, float] = defaultdict(float)
+        postings = self._postings
+        for term, factor in query_terms:
+            factor /= query_norm
+            for task_id, tf_score in postings[term].items():
+                dots[task_id] += factor * tf_score
+
+        # Only documents sharing a term or a tag with the query can score
+        # above zero
+        candidates = set(dots)
+        for tag in query_tags:
+            candidates.update(self._tag_postings.get(tag, ()))
+
+        # Plain (score, text_score, tag_score, task_id) rows; result objects
+        # are only built for the top ``limit`` survivors.
+        scored: list[tuple[float, float, float, str]] = []
+
+        # Hoist attribute and method lookups out of the per-candidate loop
+        get_dot = dots.get
+        doc_norm = self._doc_norm
+        tag_masks = self._corpus_tag_masks
+        text_weight = self.text_weight
+        tag_weight = self.tag_weight
+
+        # Score in corpus order: nlargest keeps ties in input order, so the
+        # results don't depend on set iteration order (i.e. the hash seed)
+        for task_id in sorted(candidates, key=self._doc_seq.__getitem__):
             if task_id in exclude_ids:
                 continue
 
-            # Compute TF-IDF for corpus document
-            corpus_tfidf = {
-                term: tf_score * self.compute_idf(term)
-                for term, tf_score in corpus_tf.items()
-            }
-
-            # Text similarity
-            text_score = self.cosine_similarity(query_tfidf, corpus_tfidf)
-
-            # Tag similarity
-            corpus_tags = self._corpus_tags.get(task_id, set())
-            tag_score = self.jaccard_similarity(query_tags, corpus_tags)
+            # Text similarity: cosine of query against the TF-IDF document
+            dot = get_dot(task_id, 0.0)
+            text_score = dot / doc_norm(task_id, log_n) if dot else 0.0
+
+            # Tag similarity: Jaccard over the tag bitmasks (zero for an
+            # untagged query or document)
+            tag_score = 0.0
+            mask = tag_masks[task_id]
+            if query_tags and mask:
+                tag_score = (query_mask & mask).bit_count() / (
+                    (query_mask | mask).bit_count() + unknown_tags
+                )
 
             # Combined score
-            score = (
-                self.text_weight * text_score
-                + self.tag_weight * tag_score
-            )
+            score = text_weight * text_score + tag_weight * tag_score
 
             if score >= min_score:
-                results.append(
-                    SimilarityResult(
-                        task_id=task_id,
-                        score=score,
-                        text_score=text_score,
-                        tag_score=tag_score,
-                    )
-                )
-
-        # Sort by score descending
-        results.sort(key=lambda r: r.score, reverse=True)
-
-        return results[:limit]
+                scored.append((score, text_score, tag_score, task_id))
+
+        # Bounded top-k by score instead of sorting every match
+        top = heapq.nlargest(limit, scored, key=itemgetter(0))
+
+        # Every other document scores zero; those only pad a short result
+        # when a zero score passes the threshold.
+        if min_score <= 0 and len(top) < limit:
+            for task_id in self._corpus_terms:
+                if len(top) >= limit:
+                    break
+                if task_id not in candidates and task_id not in exclude_ids:
+                    top.append((0.0, 0.0, 0.0, task_id))
+
+        return [
+            SimilarityResult(
+                task_id=task_id,
+                score=score,
+                text_score=text_score,
+                tag_score=tag_score,
+            )
+            for score, text_score, tag_score, task_id in top
+        ]
 
     def get_corpus_size(self) -> int:
         """Get number of documents in corpus."""
@@ -368,5 +566,13 @@ class TaskSimilarity:
         """Clear the corpus."""
         self._doc_count = 0
         self._doc_freq.clear()
-        self._corpus_vectors.clear()
-        self._corpus_tags.clear()
+        self._corpus_terms.clear()
+        self._doc_seq.clear()
+        self._tag_bits.clear()
+        self._tag_names.clear()
+        self._corpus_tag_masks.clear()
+        self._postings.clear()
+        self._tag_postings.clear()
+        self._log_df.clear()
+        self._norm_sums.clear()
+        self._idf_dirty.clear()
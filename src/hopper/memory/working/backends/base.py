@@ -3,7 +3,7 @@ Base backend interface for working memory.
 """
 
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, cast
 
 
 class BaseBackend(ABC):
@@ -13,6 +13,9 @@ class BaseBackend(ABC):
     All backends must implement these methods.
     """
 
+    # Whether other processes read and write the same entries
+    shared: bool = False
+
     @abstractmethod
     def get(self, key: str) -> dict[str, Any] | None:
         """
@@ -41,6 +44,98 @@ class BaseBackend(ABC):
         """
         pass
 
+    def get_many(self, keys: list[str]) -> dict[str, dict[str, Any]]:
+        """
+        Get several values at once.
+
+        Backends with per-call round-trips should override this to fetch
+        in a single batch.
+
+        Args:
+            keys: The keys to retrieve
+
+        Returns:
+            Mapping of key to value for keys that were found
+        """
+        values = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                values[key] = value
+        return values
+
+    def set_many(self, items: dict[str, dict[str, Any]], ttl: int | None = None) -> bool:
+        """
+        Set several values at once with the same optional TTL.
+
+        Backends with per-call round-trips should override this to write
+        in a single batch.
+
+        Args:
+            items: Mapping of key to value (values must be JSON-serializable)
+            ttl: Time-to-live in seconds (None for no expiry)
+
+        Returns:
+            True if successful
+        """
+        for key, value in items.items():
+            self.set(key, value, ttl)
+        return True
+
+    def add_to_sets(self, keys: list[str], member: str, ttl: int | None = None) -> bool:
+        """
+        Add a member to several sets, refreshing each set's TTL.
+
+        Sets are stored as {"members": [...]} values by default; backends
+        with a native set type should override this and get_members().
+
+        Args:
+            keys: Keys of the sets to add to
+            member: The member to add
+            ttl: Time-to-live in seconds (None for no expiry)
+
+        Returns:
+            True if successful
+        """
+        sets = self.get_many(keys)
+        items = {}
+        for key in keys:
+            members = sets.get(key, {}).get("members", [])
+            if member not in members:
+                members = [*members, member]
+            items[key] = {"members": members}
+        return self.set_many(items, ttl)
+
+    def get_members(self, key: str) -> list[str]:
+        """
+        Get the members of a set written with add_to_sets().
+
+        Args:
+            key: The key of the set
+
+        Returns:
+            List of members (empty if the set does not exist)
+        """
+        value = self.get(key)
+        if value is None:
+            return []
+        return cast(list[str], value["members"])
+
+    def get_set_values(self, key: str) -> dict[str, dict[str, Any]]:
+        """
+        Get the values stored under each member of a set.
+
+        Backends that can resolve the set server-side should override this
+        to fetch members and values in a single round-trip.
+
+        Args:
+            key: The key of a set written with add_to_sets()
+
+        Returns:
+            Mapping of member to value for members that were found
+        """
+        return self.get_many(self.get_members(key))
+
     @abstractmethod
     def delete(self, key: str) -> bool:
         """
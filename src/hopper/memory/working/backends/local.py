@@ -1,15 +1,48 @@
 """
 Local in-memory backend for working memory.
 
-Simple dict-based storage with TTL support.
+Simple dict-based storage with TTL support. Expiry times come from the
+monotonic clock, so wall-clock adjustments don't shorten or extend TTLs.
 """
 
 import fnmatch
+import heapq
+import re
 import threading
 import time
-from typing import Any
+import zlib
+from collections import OrderedDict
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any, cast
 
 from .base import BaseBackend
+from .serialization import dumps, loads
+
+_GLOB_CHARS = frozenset("*?[")
+
+
+@lru_cache(maxsize=256)
+def _key_matcher(pattern: str) -> Callable[[str], bool] | None:
+    """
+    Build a predicate for a glob key pattern.
+
+    Returns None for ``*``. Plain ``prefix*`` and ``*suffix`` patterns
+    become string comparisons; anything else is compiled once as a regex.
+    """
+    if pattern == "*":
+        return None
+
+    body = pattern[:-1] if pattern.endswith("*") else pattern
+    if not _GLOB_CHARS.intersection(body):
+        return body.__eq__ if body == pattern else lambda key: key.startswith(body)
+
+    body = pattern[1:] if pattern.startswith("*") else pattern
+    if body != pattern and not _GLOB_CHARS.intersection(body):
+        return lambda key: key.endswith(body)
+
+    regex = re.compile(fnmatch.translate(pattern))
+    return lambda key: regex.match(key) is not None
 
 
 class LocalBackend(BaseBackend):
@@ -19,17 +52,31 @@ class LocalBackend(BaseBackend):
     Thread-safe with TTL support.
     """
 
-    def __init__(self, max_entries: int = 10000):
+    def __init__(self, max_entries: int = 10000, compress: bool = False):
         """
         Initialize the local backend.
 
         Args:
             max_entries: Maximum number of entries (LRU eviction when exceeded)
+            compress: Store values as zlib-compressed JSON instead of live
+                dicts. Uses far less memory for large caches at the cost of
+                encoding on set and decoding on get; values must then be
+                JSON-serializable, as with the Redis backend.
         """
-        self._store: dict[str, tuple[dict[str, Any], float | None]] = {}
-        self._lock = threading.RLock()
+        # Ordered least to most recently used; get() and set() move a key
+        # to the end, so eviction keeps hot entries rather than the newest.
+        self._store: OrderedDict[str, tuple[dict[str, Any] | bytes, float | None]] = OrderedDict()
+        self._compress = compress
+        # Critical sections are short and never re-enter, so a plain Lock
+        # is enough and cheaper to take than an RLock.
+        self._lock = threading.Lock()
         self._max_entries = max_entries
 
+        # Min-heap of (expires_at, key). Entries go stale when a key is
+        # overwritten or deleted; they are recognised on pop because the
+        # stored expiry no longer matches.
+        self._expiry_heap: list[tuple[float, str]] = []
+
     def get(self, key: str) -> dict[str, Any] | None:
         """Get a value by key."""
         with self._lock:
@@ -39,25 +86,48 @@ class LocalBackend(BaseBackend):
             value, expires_at = self._store[key]
 
             # Check expiration
-            if expires_at is not None and time.time() > expires_at:
+            if expires_at is not None and time.monotonic() > expires_at:
                 del self._store[key]
                 return None
 
-            return value
+            self._store.move_to_end(key)
+
+        if self._compress:
+            return loads(zlib.decompress(cast(bytes, value)))
+        return cast(dict[str, Any], value)
 
     def set(self, key: str, value: dict[str, Any], ttl: int | None = None) -> bool:
         """Set a value with optional TTL."""
+        stored: dict[str, Any] | bytes = value
+        if self._compress:
+            stored = zlib.compress(dumps(value))
+
         with self._lock:
             # Calculate expiration time
-            expires_at = time.time() + ttl if ttl is not None else None
+            expires_at = time.monotonic() + ttl if ttl is not None else None
 
             # Evict if at capacity
             if len(self._store) >= self._max_entries and key not in self._store:
                 self._evict_oldest()
 
-            self._store[key] = (value, expires_at)
+            self._store[key] = (stored, expires_at)
+            self._store.move_to_end(key)
+            if expires_at is not None:
+                self._push_expiry(expires_at, key)
             return True
 
+    def _push_expiry(self, expires_at: float, key: str) -> None:
+        """Queue a key's expiry, compacting the heap if stale entries pile up."""
+        heap = self._expiry_heap
+        heapq.heappush(heap, (expires_at, key))
+        if len(heap) > 2 * len(self._store) + 64:
+            heap[:] = [
+                (entry_expires, entry_key)
+                for entry_key, (_, entry_expires) in self._store.items()
+                if entry_expires is not None
+            ]
+            heapq.heapify(heap)
+
     def delete(self, key: str) -> bool:
         """Delete a key."""
         with self._lock:
@@ -73,7 +143,7 @@ class LocalBackend(BaseBackend):
                 return False
 
             _, expires_at = self._store[key]
-            if expires_at is not None and time.time() > expires_at:
+            if expires_at is not None and time.monotonic() > expires_at:
                 del self._store[key]
                 return False
 
@@ -84,49 +154,53 @@ class LocalBackend(BaseBackend):
         with self._lock:
             count = len(self._store)
             self._store.clear()
+            self._expiry_heap.clear()
             return count
 
     def clear_expired(self) -> int:
         """Remove expired entries."""
         with self._lock:
-            now = time.time()
-            expired_keys = [
-                key
-                for key, (_, expires_at) in self._store.items()
-                if expires_at is not None and now > expires_at
-            ]
-            for key in expired_keys:
+            return self._expire_due()
+
+    def _expire_due(self) -> int:
+        """Pop due entries off the expiry heap. Caller must hold the lock."""
+        now = time.monotonic()
+        heap = self._expiry_heap
+        removed = 0
+        while heap and heap[0][0] < now:
+            expires_at, key = heapq.heappop(heap)
+            entry = self._store.get(key)
+            if entry is not None and entry[1] == expires_at:
                 del self._store[key]
-            return len(expired_keys)
+                removed += 1
+        return removed
 
     def keys(self, pattern: str = "*") -> list[str]:
         """Get keys matching a pattern."""
+        match = _key_matcher(pattern)
         with self._lock:
-            # First clear expired
-            self.clear_expired()
+            self._expire_due()
 
-            if pattern == "*":
-                return list(self._store.keys())
+            if match is None:
+                return list(self._store)
 
-            return [key for key in self._store.keys() if fnmatch.fnmatch(key, pattern)]
+            return [key for key in self._store if match(key)]
 
     def size(self) -> int:
         """Get the number of entries."""
         with self._lock:
-            self.clear_expired()
+            self._expire_due()
             return len(self._store)
 
     def _evict_oldest(self) -> None:
-        """Evict the oldest entry (simple LRU approximation)."""
+        """Evict the least recently used entry."""
         if self._store:
-            # Remove first key (oldest insertion)
-            oldest_key = next(iter(self._store))
-            del self._store[oldest_key]
+            self._store.popitem(last=False)
 
     def get_stats(self) -> dict[str, Any]:
         """Get backend statistics."""
         with self._lock:
-            now = time.time()
+            now = time.monotonic()
             total = len(self._store)
             expired = sum(
                 1
@@ -4,8 +4,13 @@ Redis backend for working memory.
 Provides persistence across restarts and shared state across processes.
 """
 
-import json
-from typing import Any
+import logging
+import re
+import threading
+import time
+from collections.abc import Iterator
+from itertools import count, islice
+from typing import Any, cast
 
 try:
     import redis
@@ -13,6 +18,74 @@ except ImportError:
     redis = None  # type: ignore
 
 from .base import BaseBackend
+from .serialization import dumps as _dumps
+from .serialization import loads as _loads
+
+logger = logging.getLogger(__name__)
+
+
+# Characters SCAN MATCH treats as glob syntax
+_GLOB_SPECIAL = re.compile(r"([\\*?\[\]])")
+
+# Registry writes between prunes of its expired keys
+_REGISTRY_PRUNE_INTERVAL = 1000
+
+# Connection pools shared by every backend on the same URL
+_POOLS: dict[str, Any] = {}
+
+
+def _get_pool(url: str) -> Any:
+    """Get the shared connection pool for a URL, creating it on first use."""
+    pool = _POOLS.get(url)
+    if pool is None:
+        # Health checks stop the first call after an idle spell from
+        # stalling on a connection the server already dropped
+        pool = _POOLS.setdefault(
+            url,
+            redis.ConnectionPool.from_url(
+                url,
+                decode_responses=True,
+                max_connections=64,
+                health_check_interval=30,
+            ),
+        )
+    return pool
+
+
+# Resolve a set of unprefixed keys and fetch their values in one call,
+# with one MGET per ARGV[2] members: unpack() fails on tables larger than
+# Lua's C stack (about 8000 entries). Members whose values are gone are
+# removed, since refreshing the set's TTL on every add keeps a busy set
+# alive indefinitely. The member keys are not declared in KEYS, so this
+# needs a non-cluster deployment, like the rest of the prefix-scoped
+# backend.
+_GET_SET_VALUES_LUA = """
+local members = redis.call('SMEMBERS', KEYS[1])
+local batch_size = tonumber(ARGV[2])
+local result = {}
+for start = 1, #members, batch_size do
+    local stop = math.min(start + batch_size - 1, #members)
+    local full_keys = {}
+    for i = start, stop do
+        full_keys[#full_keys + 1] = ARGV[1] .. members[i]
+    end
+    local values = redis.call('MGET', unpack(full_keys))
+    local dead = {}
+    for i = start, stop do
+        local value = values[i - start + 1]
+        if value then
+            result[#result + 1] = members[i]
+            result[#result + 1] = value
+        else
+            dead[#dead + 1] = members[i]
+        end
+    end
+    if #dead > 0 then
+        redis.call('SREM', KEYS[1], unpack(dead))
+    end
+end
+return result
+"""
 
 
 class RedisBackend(BaseBackend):
@@ -23,10 +96,17 @@ class RedisBackend(BaseBackend):
     Requires redis package: pip install redis
     """
 
+    shared = True
+
     def __init__(
         self,
         url: str = "redis://localhost:6379/0",
         key_prefix: str = "hopper:working:",
+        scan_count: int = 1000,
+        batch_size: int = 500,
+        write_behind_prefixes: tuple[str, ...] = (),
+        flush_interval: float = 0.01,
+        retry_interval: float = 1.0,
     ):
         """
         Initialize the Redis backend.
@@ -34,84 +114,292 @@ class RedisBackend(BaseBackend):
         Args:
             url: Redis connection URL
             key_prefix: Prefix for all keys
+            scan_count: SCAN page size hint when iterating our keys
+            batch_size: Keys per DEL, MGET or pipeline flush in bulk operations
+            write_behind_prefixes: Keys with these prefixes are written by a
+                background thread, coalesced into pipelined batches, and
+                set() returns without waiting for Redis. Use only for
+                best-effort data; call flush() before shutdown.
+            flush_interval: Seconds the writer waits for more writes to
+                coalesce before flushing
+            retry_interval: Seconds the writer waits before retrying a
+                failed flush
         """
         if redis is None:
             raise ImportError(
                 "Redis package not installed. Install with: pip install redis"
             )
 
-        self._client = redis.from_url(url, decode_responses=True)
+        self._client = redis.Redis(connection_pool=_get_pool(url))
         self._prefix = key_prefix
+        self._prefix_len = len(key_prefix)
+        self._match_prefix = _GLOB_SPECIAL.sub(r"\\\1", key_prefix)
+        self._scan_count = scan_count
+        self._batch_size = batch_size
+        # Sorted set of our keys scored by expiry time, so size() can count
+        # live entries without scanning. A plain counter would drift, since
+        # Redis expires keys without telling us.
+        self._registry_key = f"{key_prefix}__keys__"
+        self._registrations = count(1)
+        self._get_set_values = self._client.register_script(_GET_SET_VALUES_LUA)
+
+        # Write-behind state: queued writes by full key, the batch being
+        # written, and a lock serializing flushes against deletes
+        self._write_behind_prefixes = write_behind_prefixes
+        self._flush_interval = flush_interval
+        self._retry_interval = retry_interval
+        self._pending: dict[str, tuple[bytes, int | None]] = {}
+        self._inflight: dict[str, tuple[bytes, int | None]] = {}
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        if write_behind_prefixes:
+            threading.Thread(
+                target=self._write_behind_loop,
+                name="redis-write-behind",
+                daemon=True,
+            ).start()
 
     def _make_key(self, key: str) -> str:
         """Create full key with prefix."""
-        return f"{self._prefix}{key}"
+        return self._prefix + key
+
+    def _register(self, pipe: Any, full_key: str, ttl: int | None) -> None:
+        """Queue recording a key and its expiry time in the size registry."""
+        expires = time.time() + ttl if ttl is not None else "+inf"
+        pipe.zadd(self._registry_key, {full_key: expires})
+        # Prune on a sample of writes, so the registry stays bounded by the
+        # live keys even when size() is never called, without adding a
+        # registry-wide command to every write
+        if next(self._registrations) % _REGISTRY_PRUNE_INTERVAL == 0:
+            self._prune_registry(pipe)
+
+    def _prune_registry(self, pipe: Any) -> None:
+        """Queue dropping expired keys from the size registry."""
+        pipe.zremrangebyscore(self._registry_key, "-inf", time.time())
+
+    def _write_behind_loop(self) -> None:
+        """Flush queued writes whenever some arrive."""
+        while True:
+            self._wake.wait()
+            time.sleep(self._flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # flush() requeued the batch; try again after a pause
+                logger.exception("Write-behind flush to Redis failed, retrying")
+                time.sleep(self._retry_interval)
+                self._wake.set()
+
+    def _queued(self, full_key: str) -> bytes | None:
+        """Get a queued or in-flight serialized value for a key."""
+        queued = self._pending.get(full_key) or self._inflight.get(full_key)
+        return queued[0] if queued is not None else None
+
+    def _drop_queued(self, full_keys: list[str] | None = None) -> None:
+        """Drop queued writes for some keys (default: all), after any in flight."""
+        with self._flush_lock, self._pending_lock:
+            if full_keys is None:
+                self._pending.clear()
+            else:
+                for full_key in full_keys:
+                    self._pending.pop(full_key, None)
+
+    def flush(self) -> None:
+        """
+        Write queued write-behind values to Redis now.
+
+        If Redis fails, the values stay queued for the next flush and the
+        error is raised.
+        """
+        with self._flush_lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            try:
+                if batch:
+                    with self._client.pipeline(transaction=False) as pipe:
+                        for i, (full_key, (payload, ttl)) in enumerate(batch.items(), 1):
+                            pipe.set(full_key, payload, ex=ttl)
+                            self._register(pipe, full_key, ttl)
+                            if i % self._batch_size == 0:
+                                pipe.execute()
+                        pipe.execute()
+            except Exception:
+                # Requeue the batch for the next flush, except keys written
+                # again since it was taken, whose newer values win
+                with self._pending_lock:
+                    self._pending = {**batch, **self._pending}
+                raise
+            finally:
+                self._inflight = {}
+
+    def _scan(self, pattern: str = "*") -> Iterator[str]:
+        """
+        Iterate full keys matching a pattern under our prefix.
+
+        Uses SCAN rather than KEYS, which blocks the server for the whole
+        keyspace walk. Glob characters in the prefix are escaped, so they
+        only match themselves.
+        """
+        # The pool decodes replies, so keys come back as str
+        return cast(
+            Iterator[str],
+            self._client.scan_iter(match=f"{self._match_prefix}{pattern}", count=self._scan_count),
+        )
 
     def get(self, key: str) -> dict[str, Any] | None:
         """Get a value by key."""
         full_key = self._make_key(key)
-        value = self._client.get(full_key)
+        value = self._queued(full_key) or self._client.get(full_key)
         if value is None:
             return None
-        return json.loads(value)
+        return _loads(value)
 
     def set(self, key: str, value: dict[str, Any], ttl: int | None = None) -> bool:
         """Set a value with optional TTL."""
         full_key = self._make_key(key)
-        json_value = json.dumps(value)
+        if key.startswith(self._write_behind_prefixes):
+            with self._pending_lock:
+                self._pending[full_key] = (_dumps(value), ttl)
+            self._wake.set()
+            return True
 
-        if ttl is not None:
-            self._client.setex(full_key, ttl, json_value)
-        else:
-            self._client.set(full_key, json_value)
+        with self._client.pipeline(transaction=False) as pipe:
+            pipe.set(full_key, _dumps(value), ex=ttl)
+            self._register(pipe, full_key, ttl)
+            pipe.execute()
+        return True
 
+    def get_many(self, keys: list[str]) -> dict[str, dict[str, Any]]:
+        """Get several values with one MGET per batch."""
+        values = {}
+        for start in range(0, len(keys), self._batch_size):
+            batch = keys[start:start + self._batch_size]
+            full_keys = [self._make_key(key) for key in batch]
+            raw = self._client.mget(full_keys)
+            for key, full_key, value in zip(batch, full_keys, raw, strict=True):
+                value = self._queued(full_key) or value
+                if value is not None:
+                    values[key] = _loads(value)
+        return values
+
+    def set_many(self, items: dict[str, dict[str, Any]], ttl: int | None = None) -> bool:
+        """Set several values with one pipelined round-trip per batch."""
+        if not items:
+            return True
+        if self._write_behind_prefixes:
+            direct = {}
+            for key, value in items.items():
+                if key.startswith(self._write_behind_prefixes):
+                    self.set(key, value, ttl)
+                else:
+                    direct[key] = value
+            items = direct
+        with self._client.pipeline(transaction=False) as pipe:
+            for i, (key, value) in enumerate(items.items(), 1):
+                full_key = self._make_key(key)
+                pipe.set(full_key, _dumps(value), ex=ttl)
+                self._register(pipe, full_key, ttl)
+                if i % self._batch_size == 0:
+                    pipe.execute()
+            pipe.execute()
+        return True
+
+    def add_to_sets(self, keys: list[str], member: str, ttl: int | None = None) -> bool:
+        """Add a member to several native Redis sets in one round-trip."""
+        if not keys:
+            return True
+        with self._client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                full_key = self._make_key(key)
+                pipe.sadd(full_key, member)
+                if ttl is not None:
+                    pipe.expire(full_key, ttl)
+                self._register(pipe, full_key, ttl)
+            pipe.execute()
         return True
 
+    def get_members(self, key: str) -> list[str]:
+        """Get the members of a native Redis set."""
+        return list(cast(set[str], self._client.smembers(self._make_key(key))))
+
+    def get_set_values(self, key: str) -> dict[str, dict[str, Any]]:
+        """Get the values under a set's members with one server-side script."""
+        # The script reads Redis directly, so land queued writes first
+        if self._pending or self._inflight:
+            self.flush()
+        flat = self._get_set_values(
+            keys=[self._make_key(key)], args=[self._prefix, self._batch_size]
+        )
+        return {
+            member: _loads(value)
+            for member, value in zip(flat[::2], flat[1::2], strict=True)
+        }
+
     def delete(self, key: str) -> bool:
         """Delete a key."""
         full_key = self._make_key(key)
-        return bool(self._client.delete(full_key))
+        queued = self._queued(full_key) is not None
+        if self._write_behind_prefixes:
+            self._drop_queued([full_key])
+        with self._client.pipeline(transaction=False) as pipe:
+            pipe.delete(full_key)
+            pipe.zrem(self._registry_key, full_key)
+            deleted, _ = pipe.execute()
+        return bool(deleted) or queued
 
     def exists(self, key: str) -> bool:
         """Check if a key exists."""
         full_key = self._make_key(key)
-        return bool(self._client.exists(full_key))
+        return self._queued(full_key) is not None or bool(self._client.exists(full_key))
 
     def clear(self) -> int:
         """Clear all entries with our prefix."""
-        pattern = f"{self._prefix}*"
-        keys = self._client.keys(pattern)
-        if keys:
-            return self._client.delete(*keys)
-        return 0
+        if self._write_behind_prefixes:
+            self._drop_queued()
+        deleted = 0
+        keys = (key for key in self._scan() if key != self._registry_key)
+        while batch := list(islice(keys, self._batch_size)):
+            deleted += self._client.delete(*batch)
+        self._client.delete(self._registry_key)
+        return deleted
 
     def clear_expired(self) -> int:
         """
         Remove expired entries.
 
-        Note: Redis handles TTL automatically, so this is a no-op.
-        Returns 0 since Redis already cleaned up.
+        Redis expires the keys themselves; this drops them from the size
+        registry and returns how many were dropped.
         """
-        return 0
+        return int(
+            self._client.zremrangebyscore(self._registry_key, "-inf", time.time())
+        )
 
     def keys(self, pattern: str = "*") -> list[str]:
         """Get keys matching a pattern."""
-        redis_pattern = f"{self._prefix}{pattern}"
-        full_keys = self._client.keys(redis_pattern)
-        # Strip prefix from returned keys
-        prefix_len = len(self._prefix)
-        return [k[prefix_len:] for k in full_keys]
+        # Strip prefix from returned keys. SCAN may repeat a key when the
+        # keyspace is rehashed mid-iteration, so deduplicate.
+        prefix_len = self._prefix_len
+        return list(
+            dict.fromkeys(
+                k[prefix_len:] for k in self._scan(pattern) if k != self._registry_key
+            )
+        )
 
     def size(self) -> int:
-        """Get the number of entries."""
-        pattern = f"{self._prefix}*"
-        return len(self._client.keys(pattern))
+        """Get the number of entries, from the registry rather than a scan."""
+        with self._client.pipeline(transaction=False) as pipe:
+            self._prune_registry(pipe)
+            pipe.zcard(self._registry_key)
+            _, count = pipe.execute()
+        return int(count)
 
     def get_stats(self) -> dict[str, Any]:
         """Get backend statistics."""
         info = self._client.info("memory")
-        pattern = f"{self._prefix}*"
-        our_keys = len(self._client.keys(pattern))
+        our_keys = self.size()
 
         return {
             "total_entries": our_keys,
@@ -0,0 +1,27 @@
+"""
+Value serialization shared by working memory backends.
+
+Uses orjson when installed, falling back to the standard library.
+"""
+
+import json
+from collections.abc import Callable
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+
+def dumps(value: dict[str, Any]) -> bytes:
+    """Serialize a value to compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+# Both accept str as well as bytes, e.g. replies from a decode_responses client
+loads: Callable[[bytes | str], dict[str, Any]] = (
+    orjson.loads if orjson is not None else json.loads
+)
@@ -9,7 +9,7 @@ from datetime import datetime
 from typing import Any
 
 
-@dataclass
+@dataclass(slots=True)
 class SimilarTask:
     """Reference to a similar past task."""
 
@@ -20,7 +20,7 @@ class SimilarTask:
     outcome_success: bool | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class InstanceInfo:
     """Information about an available instance."""
 
@@ -33,7 +33,7 @@ class InstanceInfo:
     max_capacity: int = 10
 
 
-@dataclass
+@dataclass(slots=True)
 class RecentDecision:
     """A recent routing decision for context."""
 
@@ -45,7 +45,7 @@ class RecentDecision:
     outcome: str | None = None  # success, failure, pending
 
 
-@dataclass
+@dataclass(slots=True)
 class RoutingContext:
     """
     Context for making routing decisions.
@@ -79,6 +79,12 @@ class RoutingContext:
     # Additional context
     metadata: dict[str, Any] = field(default_factory=dict)
 
+    # instance_id lookup, built on first use for the current instances list
+    # and rebuilt when the list is replaced or resized
+    _instance_index: tuple[list[InstanceInfo], int, dict[str, InstanceInfo]] | None = (
+        field(default=None, init=False, repr=False, compare=False)
+    )
+
     def to_dict(self) -> dict[str, Any]:
         """Convert to dictionary for storage."""
         return {
@@ -129,38 +135,22 @@ class RoutingContext:
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> "RoutingContext":
         """Create from dictionary."""
-        similar_tasks = [
-            SimilarTask(
-                task_id=st["task_id"],
-                title=st["title"],
-                similarity_score=st["similarity_score"],
-                routed_to=st.get("routed_to"),
-                outcome_success=st.get("outcome_success"),
-            )
-            for st in data.get("similar_tasks", [])
-        ]
-
+        # Nested entries are stored under their field names, so they unpack
+        # straight into the dataclasses; omitted keys take the field defaults.
+        similar_tasks = [SimilarTask(**st) for st in data.get("similar_tasks", [])]
         available_instances = [
-            InstanceInfo(
-                instance_id=inst["instance_id"],
-                name=inst["name"],
-                scope=inst["scope"],
-                status=inst["status"],
-                capabilities=inst.get("capabilities", []),
-                current_load=inst.get("current_load", 0),
-                max_capacity=inst.get("max_capacity", 10),
-            )
-            for inst in data.get("available_instances", [])
+            InstanceInfo(**inst) for inst in data.get("available_instances", [])
         ]
 
+        # routed_at needs parsing, so pass the fields positionally
         recent_decisions = [
             RecentDecision(
-                task_id=rd["task_id"],
-                task_title=rd["task_title"],
-                routed_to=rd["routed_to"],
-                routed_at=datetime.fromisoformat(rd["routed_at"]),
-                confidence=rd["confidence"],
-                outcome=rd.get("outcome"),
+                rd["task_id"],
+                rd["task_title"],
+                rd["routed_to"],
+                datetime.fromisoformat(rd["routed_at"]),
+                rd["confidence"],
+                rd.get("outcome"),
             )
             for rd in data.get("recent_decisions", [])
         ]
@@ -190,15 +180,19 @@ class RoutingContext:
 
     def get_instance_by_id(self, instance_id: str) -> InstanceInfo | None:
         """Get instance info by ID."""
-        for inst in self.available_instances:
-            if inst.instance_id == instance_id:
-                return inst
-        return None
+        instances = self.available_instances
+        index = self._instance_index
+        if index is None or index[0] is not instances or index[1] != len(instances):
+            # Reversed so the first instance wins on duplicate IDs
+            by_id = {inst.instance_id: inst for inst in reversed(instances)}
+            index = self._instance_index = (instances, len(instances), by_id)
+        return index[2].get(instance_id)
 
     def get_instances_with_capacity(self) -> list[InstanceInfo]:
         """Get instances that have capacity for more tasks."""
+        # Status first: it rules out stopped instances without the load check
         return [
             inst
             for inst in self.available_instances
-            if inst.current_load < inst.max_capacity and inst.status == "running"
+            if inst.status == "running" and inst.current_load < inst.max_capacity
         ]
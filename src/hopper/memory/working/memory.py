@@ -4,9 +4,13 @@ Working Memory implementation.
 Provides immediate context storage for routing decisions.
 """
 
+import json
 import logging
+import math
+import time
 from datetime import datetime, timedelta
-from typing import Any
+from hashlib import blake2b
+from typing import Any, cast
 
 from sqlalchemy.orm import Session
 
@@ -35,6 +39,8 @@ class WorkingMemory:
         default_ttl: int = 3600,  # 1 hour
         max_similar_tasks: int = 10,
         max_recent_decisions: int = 20,
+        pattern_ttl: int = 60,
+        context_cache_ttl: int | None = None,
     ):
         """
         Initialize working memory.
@@ -44,11 +50,22 @@ class WorkingMemory:
             default_ttl: Default TTL in seconds
             max_similar_tasks: Max similar tasks to include
             max_recent_decisions: Max recent decisions to include
+            pattern_ttl: TTL in seconds for cached pattern matches and suggestions
+            context_cache_ttl: Seconds to keep decoded contexts in process
+                (0 disables). Defaults to min(60, default_ttl // 10), or off
+                with a shared backend such as Redis, whose other writers
+                can't invalidate it.
         """
         self._backend = backend or LocalBackend()
         self._default_ttl = default_ttl
+        self._default_ttl_delta = timedelta(seconds=default_ttl)
         self._max_similar_tasks = max_similar_tasks
         self._max_recent_decisions = max_recent_decisions
+        self._pattern_ttl = pattern_ttl
+        if context_cache_ttl is None:
+            context_cache_ttl = 0 if self._backend.shared else min(60, default_ttl // 10)
+        self._context_cache_ttl = context_cache_ttl
+        self._context_cache = LocalBackend(max_entries=1024)
 
     @classmethod
     def from_config(cls, config: dict[str, Any]) -> "WorkingMemory":
@@ -60,12 +77,16 @@ class WorkingMemory:
                 - backend: "local" or "redis"
                 - default_ttl: TTL in seconds
                 - max_entries: Max entries (for local)
+                - compress: Store compressed values (for local)
                 - redis_url: Redis URL (for redis)
+                - write_behind: Write contexts in the background (for redis)
         """
         backend_type = config.get("backend", "local")
         default_ttl = config.get("default_ttl", 3600)
         max_similar = config.get("max_similar_tasks", 10)
         max_recent = config.get("max_recent_decisions", 20)
+        pattern_ttl = config.get("pattern_ttl", 60)
+        context_cache_ttl = config.get("context_cache_ttl")
 
         if backend_type == "redis":
             from .backends.redis import RedisBackend
@@ -73,10 +94,12 @@ class WorkingMemory:
             backend = RedisBackend(
                 url=config.get("redis_url", "redis://localhost:6379/0"),
                 key_prefix=config.get("key_prefix", "hopper:working:"),
+                write_behind_prefixes=("context:",) if config.get("write_behind") else (),
             )
         else:
             backend = LocalBackend(
                 max_entries=config.get("max_entries", 10000),
+                compress=config.get("compress", False),
             )
 
         return cls(
@@ -84,31 +107,113 @@ class WorkingMemory:
             default_ttl=default_ttl,
             max_similar_tasks=max_similar,
             max_recent_decisions=max_recent,
+            pattern_ttl=pattern_ttl,
+            context_cache_ttl=context_cache_ttl,
         )
 
     def _context_key(self, task_id: str) -> str:
         """Generate context key for a task."""
-        return f"context:{task_id}"
+        return "context:" + task_id
+
+    def _decision_index_key(self, task_id: str) -> str:
+        """Generate key for the set of contexts recording a task's decision."""
+        return "decision_index:" + task_id
 
     def _session_key(self, session_id: str) -> str:
         """Generate key for session context."""
-        return f"session:{session_id}"
+        return "session:" + session_id
+
+    def _pattern_generation(self) -> int:
+        """
+        Get the generation that cached pattern matches and suggestions belong to.
 
-    def get_context(self, task_id: str) -> RoutingContext | None:
+        Their keys embed it, so bumping it drops them all in one write; old
+        entries are never read again and expire on their TTL.
+        """
+        data = self._backend.get("pattern_generation")
+        if data is None:
+            # Start a fresh generation rather than 0 when the entry is
+            # missing (e.g. evicted), so older entries can't come back
+            return self._new_pattern_generation()
+        return int(data["generation"])
+
+    def _new_pattern_generation(self) -> int:
+        """Start a new pattern generation."""
+        generation = time.time_ns()
+        self._backend.set("pattern_generation", {"generation": generation})
+        return generation
+
+    def _pattern_key(
+        self,
+        tags: dict[str, Any] | list[str] | None,
+        priority: str | None,
+        title: str | None,
+        limit: int,
+    ) -> str:
+        """Generate pattern-match key from the fields patterns match on."""
+        criteria = json.dumps(
+            {
+                "tags": sorted(tags) if tags is not None else None,
+                "priority": priority,
+                "title": title.lower() if title else None,
+                "limit": limit,
+            },
+            sort_keys=True,
+        )
+        digest = blake2b(criteria.encode(), digest_size=16).hexdigest()
+        return f"patterns:{self._pattern_generation()}:{digest}"
+
+    def _suggestions_key(self, task_id: str) -> str:
+        """Generate suggestions key for a task."""
+        return f"suggestions:{self._pattern_generation()}:{task_id}"
+
+    def get_context(self, task_id: str, cache: bool = True) -> RoutingContext | None:
         """
         Get stored routing context for a task.
 
+        Decoded contexts are briefly cached in process, so repeated reads
+        return the same shared object: treat it as read-only. To change a
+        context, read it with cache=False and store it with set_context().
+        Only contexts stored through this instance are cached, since their
+        backend expiry is known, and never past that expiry.
+
         Args:
             task_id: Task ID
+            cache: Use the in-process cache; False always decodes a fresh,
+                private copy from the backend
 
         Returns:
             RoutingContext or None if not found
         """
         key = self._context_key(task_id)
+        entry = self._context_cache.get(key) if cache else None
+        if entry is not None and time.monotonic() < entry.get("fresh_until", 0.0):
+            return cast(RoutingContext, entry["context"])
+
         data = self._backend.get(key)
         if data is None:
             return None
-        return RoutingContext.from_dict(data)
+
+        context = RoutingContext.from_dict(data)
+        if entry is not None:
+            now = time.monotonic()
+            expires = entry["expires"]
+            if expires > now:
+                self._context_cache.set(
+                    key,
+                    {
+                        "expires": expires,
+                        "context": context,
+                        "fresh_until": min(now + self._context_cache_ttl, expires),
+                    },
+                    math.ceil(expires - now),
+                )
+        return context
+
+    def _track_context_expiry(self, key: str, ttl: int) -> None:
+        """Record when a context just written to the backend expires there."""
+        if self._context_cache_ttl > 0:
+            self._context_cache.set(key, {"expires": time.monotonic() + ttl}, ttl)
 
     def set_context(
         self,
@@ -126,11 +231,22 @@ class WorkingMemory:
             True if successful
         """
         key = self._context_key(context.task_id)
-        return self._backend.set(
-            key,
-            context.to_dict(),
-            ttl or self._default_ttl,
+        ttl = ttl or self._default_ttl
+        self._track_context_expiry(key, ttl)
+        stored = self._backend.set(key, context.to_dict(), ttl)
+
+        # Index the context under each decision it records, so outcome
+        # updates can find it without scanning every context. The context
+        # is written first: index reads drop members with no value.
+        index_keys = list(
+            dict.fromkeys(
+                self._decision_index_key(decision.task_id)
+                for decision in context.recent_decisions
+            )
         )
+        self._backend.add_to_sets(index_keys, key, ttl)
+
+        return stored
 
     def delete_context(self, task_id: str) -> bool:
         """
@@ -143,8 +259,126 @@ class WorkingMemory:
             True if deleted
         """
         key = self._context_key(task_id)
+        self._context_cache.delete(key)
         return self._backend.delete(key)
 
+    def get_pattern_matches(
+        self,
+        tags: dict[str, Any] | list[str] | None,
+        priority: str | None,
+        title: str | None,
+        limit: int,
+    ) -> list[dict[str, Any]] | None:
+        """
+        Get cached pattern matches for a set of task criteria.
+
+        Args:
+            tags: Task tags (only the tag names are significant)
+            priority: Task priority
+            title: Task title
+            limit: Maximum matches the lookup was made with
+
+        Returns:
+            List of match dicts, or None if not cached
+        """
+        data = self._backend.get(self._pattern_key(tags, priority, title, limit))
+        if data is None:
+            return None
+        return cast(list[dict[str, Any]], data["matches"])
+
+    def set_pattern_matches(
+        self,
+        tags: dict[str, Any] | list[str] | None,
+        priority: str | None,
+        title: str | None,
+        limit: int,
+        matches: list[dict[str, Any]],
+        ttl: int | None = None,
+    ) -> bool:
+        """
+        Cache pattern matches for a set of task criteria.
+
+        Args:
+            tags: Task tags (only the tag names are significant)
+            priority: Task priority
+            title: Task title
+            limit: Maximum matches the lookup was made with
+            matches: Match dicts to cache
+            ttl: TTL in seconds (default: self._pattern_ttl)
+
+        Returns:
+            True if successful
+        """
+        return self._backend.set(
+            self._pattern_key(tags, priority, title, limit),
+            {"matches": matches},
+            ttl or self._pattern_ttl,
+        )
+
+    def clear_pattern_matches(self) -> None:
+        """
+        Drop all cached pattern matches and the suggestions built from them.
+
+        Called when patterns change so suggestions never lag behind them.
+        """
+        self._new_pattern_generation()
+
+    def get_suggestions(self, task_id: str, limit: int) -> list[dict[str, Any]] | None:
+        """
+        Get cached routing suggestions for a task.
+
+        Args:
+            task_id: Task ID
+            limit: Maximum suggestions wanted
+
+        Returns:
+            List of suggestion dicts, or None if not cached for this limit
+        """
+        data = self._backend.get(self._suggestions_key(task_id))
+        if data is None or data["limit"] < limit:
+            return None
+        return cast(list[dict[str, Any]], data["suggestions"][:limit])
+
+    def set_suggestions(
+        self,
+        task_id: str,
+        limit: int,
+        suggestions: list[dict[str, Any]],
+        ttl: int | None = None,
+    ) -> bool:
+        """
+        Cache routing suggestions for a task.
+
+        One entry is kept per task, holding the longest list looked up so
+        far; get_suggestions() slices it for smaller limits.
+
+        Args:
+            task_id: Task ID
+            limit: Maximum suggestions the lookup was made with
+            suggestions: Suggestion dicts to cache
+            ttl: TTL in seconds (default: self._pattern_ttl)
+
+        Returns:
+            True if successful
+        """
+        return self._backend.set(
+            self._suggestions_key(task_id),
+            {"suggestions": suggestions, "limit": limit},
+            ttl or self._pattern_ttl,
+        )
+
+    def invalidate_suggestions(self, task_id: str) -> bool:
+        """
+        Drop cached routing suggestions for a task.
+
+        Args:
+            task_id: Task ID
+
+        Returns:
+            True if suggestions were cached
+        """
+        return self._backend.delete(self._suggestions_key(task_id))
+
     def build_routing_context(
         self,
         task: Task,
@@ -183,6 +417,7 @@ class WorkingMemory:
                 tags = task.tags
 
         # Build context
+        now = datetime.utcnow()
         context = RoutingContext(
             task_id=task.id,
             task_title=task.title,
@@ -192,8 +427,8 @@ class WorkingMemory:
             available_instances=available_instances,
             recent_decisions=recent_decisions,
             session_id=session_id,
-            created_at=datetime.utcnow(),
-            expires_at=datetime.utcnow() + timedelta(seconds=self._default_ttl),
+            created_at=now,
+            expires_at=now + self._default_ttl_delta,
         )
 
         # Store the context
@@ -215,8 +450,9 @@ class WorkingMemory:
             InstanceInfo(
                 instance_id=inst.id,
                 name=inst.name,
-                scope=inst.scope.value if hasattr(inst.scope, "value") else str(inst.scope),
-                status=inst.status.value if hasattr(inst.status, "value") else str(inst.status),
+                # Enum columns always load as enum members
+                scope=inst.scope.value,
+                status=inst.status.value,
                 capabilities=inst.config.get("capabilities", []) if inst.config else [],
                 current_load=inst.runtime_metadata.get("active_tasks", 0)
                 if inst.runtime_metadata
@@ -232,33 +468,32 @@ class WorkingMemory:
         """Get recent routing decisions."""
         from sqlalchemy import select
 
+        # Join the task title in the same query rather than lazy-loading
+        # each decision's task
         query = (
-            select(RoutingDecision)
+            select(
+                RoutingDecision.task_id,
+                Task.title,
+                RoutingDecision.project,
+                RoutingDecision.decided_at,
+                RoutingDecision.confidence,
+            )
+            .outerjoin(Task, Task.id == RoutingDecision.task_id)
             .order_by(RoutingDecision.decided_at.desc())
             .limit(self._max_recent_decisions)
         )
-        result = session.execute(query)
-        decisions = result.scalars().all()
-
-        recent = []
-        for decision in decisions:
-            # Get task title
-            task_title = ""
-            if decision.task:
-                task_title = decision.task.title
-
-            recent.append(
-                RecentDecision(
-                    task_id=decision.task_id,
-                    task_title=task_title,
-                    routed_to=decision.target_project or "",
-                    routed_at=decision.decided_at,
-                    confidence=decision.confidence_score or 0.0,
-                    outcome=None,  # Will be enhanced with feedback
-                )
-            )
 
-        return recent
+        return [
+            RecentDecision(
+                task_id=task_id,
+                task_title=task_title or "",
+                routed_to=project or "",
+                routed_at=decided_at,
+                confidence=confidence or 0.0,
+                outcome=None,  # Will be enhanced with feedback
+            )
+            for task_id, task_title, project, decided_at, confidence in session.execute(query)
+        ]
 
     def add_similar_tasks(
         self,
@@ -277,7 +512,7 @@ class WorkingMemory:
         Returns:
             True if successful
         """
-        context = self.get_context(task_id)
+        context = self.get_context(task_id, cache=False)
         if context is None:
             return False
 
@@ -299,22 +534,32 @@ class WorkingMemory:
         Returns:
             True if successful
         """
-        # Update in recent decisions across all contexts
-        # This is a simplified implementation - production would
-        # use a more efficient approach
-        for key in self._backend.keys("context:*"):
-            data = self._backend.get(key)
-            if data:
-                context = RoutingContext.from_dict(data)
-                updated = False
-                for decision in context.recent_decisions:
-                    if decision.task_id == task_id:
-                        decision.outcome = outcome
-                        updated = True
-                if updated:
-                    self._backend.set(key, context.to_dict())
-
-        return True
+        # Update in recent decisions of the contexts indexed under the task:
+        # one read of the index and its contexts, one batched write of just
+        # the changed contexts. Index entries may be stale (context deleted
+        # or rewritten without the decision); those are missing or unchanged.
+        changed = {}
+        index_key = self._decision_index_key(task_id)
+        for key, data in self._backend.get_set_values(index_key).items():
+            context = RoutingContext.from_dict(data)
+            updated = False
+            for decision in context.recent_decisions:
+                if decision.task_id == task_id:
+                    decision.outcome = outcome
+                    updated = True
+            if updated:
+                changed[key] = context.to_dict()
+
+        for key in changed:
+            self._track_context_expiry(key, self._default_ttl)
+
+        # Rewritten contexts get a fresh default TTL rather than none
+        return self._backend.set_many(changed, self._default_ttl)
+
+    def flush(self) -> None:
+        """Write any contexts the backend is still holding for a background write."""
+        if hasattr(self._backend, "flush"):
+            self._backend.flush()
 
     def clear_expired(self) -> int:
         """Clear expired entries."""
@@ -322,6 +567,7 @@ class WorkingMemory:
 
     def clear_all(self) -> int:
         """Clear all entries."""
+        self._context_cache.clear()
         return self._backend.clear()
 
     def get_stats(self) -> dict[str, Any]:
@@ -19,6 +19,7 @@ from .enums import (
 )
 from .external_mapping import ExternalMapping
 from .hopper_instance import HopperInstance
+from .instance_closure import InstanceClosure
 from .project import Project
 from .routing_decision import RoutingDecision
 from .task import Task
@@ -34,6 +35,7 @@ __all__ = [
     "TaskFeedback",
     "ExternalMapping",
     "HopperInstance",
+    "InstanceClosure",
     "TaskDelegation",
     "DelegationType",
     "DelegationStatus",
@@ -2,16 +2,45 @@
 Hopper Instance model for multi-instance support.
 """
 
+from collections import defaultdict
 from datetime import datetime
-from typing import Any, Optional
-
-from sqlalchemy import DateTime, Enum as SQLEnum, ForeignKey, String, Text
+from typing import Any, Optional, cast
+
+from sqlalchemy import (
+    DateTime,
+    Enum as SQLEnum,
+    ForeignKey,
+    Index,
+    String,
+    Table,
+    Text,
+    delete,
+    event,
+    func,
+    insert,
+    inspect,
+    literal,
+    or_,
+    select,
+    text,
+    true,
+)
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import Mapped, mapped_column, relationship, synonym
+from sqlalchemy.orm import (
+    Mapped,
+    Session,
+    mapped_column,
+    object_session,
+    relationship,
+    synonym,
+)
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.types import JSON
 
 from .base import Base, TimestampMixin
 from .enums import HopperScope, InstanceStatus, InstanceType
+from .instance_closure import InstanceClosure
+from .task import Task
 
 
 class HopperInstance(Base, TimestampMixin):
@@ -81,6 +110,20 @@ class HopperInstance(Base, TimestampMixin):
     )
     tasks: Mapped[list["Task"]] = relationship("Task", back_populates="instance")
 
+    # Indexes
+    __table_args__ = (
+        # Routing looks up a parent's children by scope and status
+        Index("idx_hopper_instances_parent_scope_status", "parent_id", "scope", "status"),
+        # Routing only considers available instances, a small slice of all
+        # rows; the enum is stored by name
+        Index(
+            "idx_hopper_instances_available",
+            "id",
+            postgresql_where=text("status IN ('RUNNING', 'CREATED')"),
+            sqlite_where=text("status IN ('RUNNING', 'CREATED')"),
+        ),
+    )
+
     def __init__(self, **kwargs):
         """Initialize with support for backward compatibility aliases."""
         # Handle backward compatibility aliases
@@ -102,12 +145,38 @@ class HopperInstance(Base, TimestampMixin):
     def __repr__(self) -> str:
         return f"<HopperInstance(id={self.id}, name={self.name}, scope={self.scope.value}, status={self.status.value})>"
 
+    def _closure_ancestors(self, session: Session) -> list["HopperInstance"] | None:
+        """Load ancestors from the closure table, nearest first.
+
+        Returns:
+            List of ancestors, or None if this instance has no closure rows
+            (e.g. it predates the table and rebuild_closure() was not run).
+        """
+        rows = session.scalars(
+            select(HopperInstance)
+            .join(InstanceClosure, InstanceClosure.ancestor_id == HopperInstance.id)
+            .where(InstanceClosure.descendant_id == self.id)
+            .order_by(InstanceClosure.depth)
+        ).all()
+        if not rows or rows[0].id != self.id:
+            return None
+        return list(rows[1:])
+
     def get_ancestors(self) -> list["HopperInstance"]:
         """Get all ancestor instances in the hierarchy.
 
+        Instances attached to a session are resolved with one closure table
+        query rather than a lazy load per level.
+
         Returns:
             List of ancestor instances from immediate parent to root.
         """
+        session = object_session(self)
+        if session is not None:
+            ancestors = self._closure_ancestors(session)
+            if ancestors is not None:
+                return ancestors
+
         ancestors = []
         current = self.parent
         while current is not None:
@@ -118,25 +187,125 @@ class HopperInstance(Base, TimestampMixin):
     def get_descendants(self) -> list["HopperInstance"]:
         """Get all descendant instances in the hierarchy.
 
+        Instances attached to a session are loaded with one query rather
+        than a lazy load per node.
+
         Returns:
-            List of all descendant instances (children, grandchildren, etc.).
+            List of all descendant instances (children, grandchildren, etc.),
+            depth-first.
         """
+        session = object_session(self)
+        if session is not None:
+            return self.query_descendants(session, self.id)
+
+        # Transient instance: only the in-memory children are known. Walk
+        # them with an explicit stack, so deep trees can't hit the
+        # recursion limit.
         descendants = []
+        stack = self.children[::-1]
+        while stack:
+            child = stack.pop()
+            descendants.append(child)
+            stack.extend(reversed(child.children))
+        return descendants
 
-        def collect_descendants(instance: "HopperInstance") -> None:
-            for child in instance.children:
-                descendants.append(child)
-                collect_descendants(child)
+    @classmethod
+    def query_descendants(cls, session: Session, root_id: str) -> list["HopperInstance"]:
+        """Load all descendants of an instance with one query.
+
+        Reads the closure table, falling back to a recursive query over
+        parent_id when the instance has no closure rows.
+
+        Args:
+            session: Database session
+            root_id: ID of the instance whose descendants to load
+
+        Returns:
+            List of all descendant instances, depth-first.
+        """
+        rows = session.scalars(
+            select(cls)
+            .join(InstanceClosure, InstanceClosure.descendant_id == cls.id)
+            .where(InstanceClosure.ancestor_id == root_id)
+        ).all()
+        if not any(instance.id == root_id for instance in rows):
+            tree = (
+                select(cls.id)
+                .where(cls.parent_id == root_id)
+                .cte("descendants", recursive=True)
+            )
+            # UNION rather than UNION ALL so a corrupt parent cycle terminates
+            tree = tree.union(select(cls.id).where(cls.parent_id == tree.c.id))
+            rows = session.scalars(select(cls).join(tree, cls.id == tree.c.id)).all()
+
+        # Order depth-first, as walking the children relationships would
+        children_of: dict[str | None, list[HopperInstance]] = defaultdict(list)
+        for instance in rows:
+            children_of[instance.parent_id].append(instance)
 
-        collect_descendants(self)
+        descendants = []
+        seen = {root_id}
+        stack = children_of[root_id][::-1]
+        while stack:
+            instance = stack.pop()
+            if instance.id in seen:
+                continue
+            seen.add(instance.id)
+            descendants.append(instance)
+            stack.extend(reversed(children_of[instance.id]))
         return descendants
 
+    @classmethod
+    def load_tree(
+        cls, session: Session, root_id: str, with_tasks: bool = True
+    ) -> Optional["HopperInstance"]:
+        """Load an instance with its whole subtree preloaded.
+
+        Fills the children (and optionally tasks) collections of every
+        instance in the subtree from a fixed number of queries, so walking
+        the tree afterwards issues none.
+
+        Args:
+            session: Database session
+            root_id: ID of the instance at the root of the tree
+            with_tasks: Also preload each instance's tasks
+
+        Returns:
+            The root instance, or None if it does not exist.
+        """
+        root = session.get(cls, root_id)
+        if root is None:
+            return None
+        instances = [root, *cls.query_descendants(session, root_id)]
+
+        children_of: dict[str | None, list[HopperInstance]] = defaultdict(list)
+        for instance in instances[1:]:
+            children_of[instance.parent_id].append(instance)
+        for instance in instances:
+            set_committed_value(instance, "children", children_of[instance.id])
+
+        if with_tasks:
+            tasks_of: dict[str | None, list[Task]] = defaultdict(list)
+            for task in session.scalars(
+                select(Task).where(Task.instance_id.in_([i.id for i in instances]))
+            ):
+                tasks_of[task.instance_id].append(task)
+            for instance in instances:
+                set_committed_value(instance, "tasks", tasks_of[instance.id])
+        return root
+
     def get_root(self) -> "HopperInstance":
         """Get the root instance in the hierarchy.
 
         Returns:
             The root instance (instance with no parent).
         """
+        session = object_session(self)
+        if session is not None:
+            ancestors = self._closure_ancestors(session)
+            if ancestors is not None:
+                return ancestors[-1] if ancestors else self
+
         current = self
         while current.parent is not None:
             current = current.parent
@@ -156,9 +325,146 @@ class HopperInstance(Base, TimestampMixin):
         Returns:
             Depth level (0 for root, 1 for immediate children, etc.).
         """
+        session = object_session(self)
+        if session is not None:
+            depth = session.scalar(
+                select(func.max(InstanceClosure.depth)).where(
+                    InstanceClosure.descendant_id == self.id
+                )
+            )
+            if depth is not None:
+                return depth
+
         depth = 0
         current = self.parent
         while current is not None:
             depth += 1
             current = current.parent
         return depth
+
+    @classmethod
+    def rebuild_closure(cls, session: Session) -> int:
+        """Rebuild the closure table from parent_id links.
+
+        Run once for instances created before the closure table existed, or
+        after writes that bypassed the ORM.
+
+        Args:
+            session: Database session
+
+        Returns:
+            Number of closure rows written
+        """
+        session.flush()
+        pairs = select(
+            cls.id.label("ancestor_id"),
+            cls.id.label("descendant_id"),
+            literal(0).label("depth"),
+        ).cte("pairs", recursive=True)
+        pairs = pairs.union(
+            select(pairs.c.ancestor_id, cls.id, pairs.c.depth + 1).where(
+                cls.parent_id == pairs.c.descendant_id
+            )
+        )
+
+        session.execute(delete(InstanceClosure))
+        session.execute(
+            insert(InstanceClosure).from_select(
+                ["ancestor_id", "descendant_id", "depth"], select(pairs)
+            )
+        )
+        return session.scalar(select(func.count()).select_from(InstanceClosure)) or 0
+
+
+def _parents_first(parent_of: dict[str, str | None]) -> list[str]:
+    """Order instance IDs so each comes after its parent, when both are listed."""
+    ordered: list[str] = []
+    placed: set[str] = set()
+    for instance_id in parent_of:
+        chain = []
+        current: str | None = instance_id
+        while current is not None and current in parent_of and current not in placed:
+            placed.add(current)
+            chain.append(current)
+            current = parent_of[current]
+        ordered.extend(reversed(chain))
+    return ordered
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_instance_closure(session: Session, flush_context: Any) -> None:
+    """Keep instance_closure in step with flushed instance inserts, moves and deletes."""
+    deleted = {obj.id for obj in session.deleted if isinstance(obj, HopperInstance)}
+    added = {
+        obj.id: obj.parent_id for obj in session.new if isinstance(obj, HopperInstance)
+    }
+    moved = []
+    for obj in session.dirty:
+        if isinstance(obj, HopperInstance) and obj.id not in deleted:
+            attrs = inspect(obj).attrs
+            if attrs.parent_id.history.has_changes() or attrs.parent.history.has_changes():
+                moved.append(obj)
+    if not (deleted or added or moved):
+        return
+
+    closure = cast(Table, InstanceClosure.__table__)
+    connection = session.connection()
+
+    if deleted:
+        connection.execute(
+            delete(closure).where(
+                or_(
+                    closure.c.ancestor_id.in_(deleted),
+                    closure.c.descendant_id.in_(deleted),
+                )
+            )
+        )
+
+    # New instances copy their parent's ancestor rows, so parents go first
+    for instance_id in _parents_first(added):
+        connection.execute(
+            insert(closure).values(ancestor_id=instance_id, descendant_id=instance_id, depth=0)
+        )
+        parent_id = added[instance_id]
+        if parent_id is not None:
+            connection.execute(
+                insert(closure).from_select(
+                    ["ancestor_id", "descendant_id", "depth"],
+                    select(
+                        closure.c.ancestor_id, literal(instance_id), closure.c.depth + 1
+                    ).where(closure.c.descendant_id == parent_id),
+                )
+            )
+
+    # Moved instances take their subtree with them: unlink it from the old
+    # ancestors, then link it under each of the new parent's ancestors
+    for instance in moved:
+        subtree = select(closure.c.descendant_id).where(closure.c.ancestor_id == instance.id)
+        old_ancestors = select(closure.c.ancestor_id).where(
+            closure.c.descendant_id == instance.id,
+            closure.c.ancestor_id != instance.id,
+        )
+        connection.execute(
+            delete(closure).where(
+                closure.c.descendant_id.in_(subtree),
+                closure.c.ancestor_id.in_(old_ancestors),
+            )
+        )
+        if instance.parent_id is not None:
+            above = closure.alias("above")
+            below = closure.alias("below")
+            connection.execute(
+                insert(closure).from_select(
+                    ["ancestor_id", "descendant_id", "depth"],
+                    select(
+                        above.c.ancestor_id,
+                        below.c.descendant_id,
+                        above.c.depth + below.c.depth + 1,
+                    )
+                    .select_from(above.join(below, true()))
+                    .where(
+                        above.c.descendant_id == instance.parent_id,
+                        below.c.ancestor_id == instance.id,
+                    ),
+                )
+            )
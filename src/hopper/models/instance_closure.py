@@ -0,0 +1,45 @@
+"""
+Instance closure model for hierarchy queries.
+"""
+
+from sqlalchemy import ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class InstanceClosure(Base):
+    """Ancestor/descendant pairs of the instance hierarchy.
+
+    Holds one row per (ancestor, descendant) pair, including a depth-0 row
+    pairing each instance with itself, so ancestor, descendant, root and
+    depth lookups are single indexed queries. Rows are kept in step with
+    HopperInstance on flush.
+    """
+
+    __tablename__ = "instance_closure"
+
+    # Composite primary key, which also serves lookups by ancestor
+    ancestor_id: Mapped[str] = mapped_column(
+        String(100),
+        ForeignKey("hopper_instances.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    descendant_id: Mapped[str] = mapped_column(
+        String(100),
+        ForeignKey("hopper_instances.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    # Levels between ancestor and descendant (0 for the instance itself)
+    depth: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("idx_instance_closure_descendant", "descendant_id", "depth"),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<InstanceClosure(ancestor_id={self.ancestor_id}, "
+            f"descendant_id={self.descendant_id}, depth={self.depth})>"
+        )
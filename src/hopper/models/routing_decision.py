@@ -5,7 +5,7 @@ Routing Decision model for Hopper.
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import DateTime, Float, ForeignKey, String, Text
+from sqlalchemy import DateTime, Float, ForeignKey, Index, String, Text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.types import JSON
@@ -26,9 +26,16 @@ class RoutingDecision(Base):
         String(100), ForeignKey("projects.name"), nullable=True
     )
     confidence: Mapped[float | None] = mapped_column(Float, nullable=True)
-    reasoning: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Large, rarely read payloads load together on first access, keeping
+    # them out of bulk decision queries
+    reasoning: Mapped[str | None] = mapped_column(
+        Text, nullable=True, deferred=True, deferred_group="details"
+    )
     alternatives: Mapped[dict[str, Any] | None] = mapped_column(
-        JSONB().with_variant(JSON(), "sqlite"), nullable=True
+        JSONB().with_variant(JSON(), "sqlite"),
+        nullable=True,
+        deferred=True,
+        deferred_group="details",
     )
 
     # Decision metadata
@@ -38,14 +45,30 @@ class RoutingDecision(Base):
 
     # Context snapshot
     workload_snapshot: Mapped[dict[str, Any] | None] = mapped_column(
-        JSONB().with_variant(JSON(), "sqlite"), nullable=True
+        JSONB().with_variant(JSON(), "sqlite"),
+        nullable=True,
+        deferred=True,
+        deferred_group="details",
     )
     context: Mapped[dict[str, Any] | None] = mapped_column(
-        JSONB().with_variant(JSON(), "sqlite"), nullable=True
+        JSONB().with_variant(JSON(), "sqlite"),
+        nullable=True,
+        deferred=True,
+        deferred_group="details",
     )
 
     # Relationships
     task: Mapped["Task"] = relationship("Task", back_populates="routing_decision")
 
+    # Indexes
+    __table_args__ = (
+        # Decisions by project, and by project over a time range
+        Index("idx_routing_decisions_project_decided_at", "project", "decided_at"),
+        # Recent decisions across projects
+        Index("idx_routing_decisions_decided_at", "decided_at"),
+        # Low-confidence review
+        Index("idx_routing_decisions_confidence", "confidence"),
+    )
+
     def __repr__(self) -> str:
         return f"<RoutingDecision(task_id={self.task_id}, project={self.project})>"
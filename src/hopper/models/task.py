@@ -4,7 +4,7 @@ Task model for Hopper.
 
 from typing import Any, Optional
 
-from sqlalchemy import Float, ForeignKey, Index, String, Text
+from sqlalchemy import Float, ForeignKey, Index, String, Text, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.types import JSON
@@ -86,8 +86,22 @@ class Task(Base, TimestampMixin):
         Index("idx_tasks_project", "project"),
         Index("idx_tasks_status", "status"),
         Index("idx_tasks_created_at", "created_at"),
-        # GIN index for JSONB tags (PostgreSQL only)
-        # Index("idx_tasks_tags", "tags", postgresql_using="gin"),
+        # An instance's open work queue; finished tasks stay out of the index
+        Index(
+            "idx_tasks_instance_active",
+            "instance_id",
+            "created_at",
+            postgresql_where=text("status IN ('pending', 'claimed', 'in_progress')"),
+            sqlite_where=text("status IN ('pending', 'claimed', 'in_progress')"),
+        ),
+        # GIN index for tag containment filters (PostgreSQL only);
+        # jsonb_path_ops serves @> only, at a fraction of the default size
+        Index(
+            "idx_tasks_tags",
+            "tags",
+            postgresql_using="gin",
+            postgresql_ops={"tags": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
     )
 
     def __repr__(self) -> str:
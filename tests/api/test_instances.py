@@ -7,7 +7,14 @@ Tests the instance API endpoints for CRUD operations, hierarchy, and lifecycle.
 import pytest
 from sqlalchemy.orm import Session
 
-from hopper.models import HopperInstance, HopperScope, InstanceStatus, InstanceType
+from hopper.models import (
+    HopperInstance,
+    HopperScope,
+    InstanceClosure,
+    InstanceStatus,
+    InstanceType,
+    Task,
+)
 from hopper.api.schemas.hopper_instance import (
     InstanceCreate,
     InstanceUpdate,
@@ -283,6 +290,89 @@ class TestInstanceModel:
         assert retrieved_l2.get_depth() == 2
 
 
+    def test_instance_get_descendants(self, count_statements, clean_db: Session):
+        """Test descendants load depth-first in a single query."""
+        clean_db.add_all([
+            HopperInstance(id="desc-root", name="Root", scope=HopperScope.GLOBAL),
+            HopperInstance(id="desc-a", name="A", scope=HopperScope.PROJECT, parent_id="desc-root"),
+            HopperInstance(id="desc-b", name="B", scope=HopperScope.PROJECT, parent_id="desc-root"),
+            HopperInstance(id="desc-a1", name="A1", scope=HopperScope.ORCHESTRATION, parent_id="desc-a"),
+            HopperInstance(id="desc-other", name="Other", scope=HopperScope.GLOBAL),
+        ])
+        clean_db.commit()
+        root = clean_db.get(HopperInstance, "desc-root")
+
+        with count_statements() as statements:
+            descendants = root.get_descendants()
+
+        assert len(statements) == 1
+        ids = [inst.id for inst in descendants]
+        assert sorted(ids) == ["desc-a", "desc-a1", "desc-b"]
+        assert ids.index("desc-a1") == ids.index("desc-a") + 1
+
+        leaf = HopperInstance(id="transient", name="T", scope=HopperScope.GLOBAL)
+        assert leaf.get_descendants() == []
+
+    def test_instance_load_tree(self, count_statements, clean_db: Session):
+        """Test a subtree and its tasks load in a fixed number of queries."""
+        clean_db.add_all([
+            HopperInstance(id="tree-root", name="Root", scope=HopperScope.GLOBAL),
+            HopperInstance(id="tree-a", name="A", scope=HopperScope.PROJECT, parent_id="tree-root"),
+            HopperInstance(id="tree-b", name="B", scope=HopperScope.PROJECT, parent_id="tree-root"),
+            HopperInstance(id="tree-a1", name="A1", scope=HopperScope.ORCHESTRATION, parent_id="tree-a"),
+            Task(id="TREE-1", title="Root task", instance_id="tree-root"),
+            Task(id="TREE-2", title="Leaf task", instance_id="tree-a1"),
+        ])
+        clean_db.commit()
+        clean_db.expunge_all()
+
+        with count_statements() as statements:
+            root = HopperInstance.load_tree(clean_db, "tree-root")
+            children = {child.id: child for child in root.children}
+            leaf = children["tree-a"].children[0]
+            tasks = {inst.id: [task.id for task in inst.tasks] for inst in [root, leaf, children["tree-b"]]}
+
+        assert len(statements) == 3
+        assert sorted(children) == ["tree-a", "tree-b"]
+        assert leaf.id == "tree-a1"
+        assert leaf.children == []
+        assert tasks == {"tree-root": ["TREE-1"], "tree-a1": ["TREE-2"], "tree-b": []}
+        assert HopperInstance.load_tree(clean_db, "missing") is None
+
+    def test_instance_closure_follows_moves_and_deletes(self, clean_db: Session):
+        """Test closure rows track inserts, subtree moves, deletes and rebuilds."""
+        root_a = HopperInstance(id="move-a", name="A", scope=HopperScope.GLOBAL)
+        root_b = HopperInstance(id="move-b", name="B", scope=HopperScope.GLOBAL)
+        child = HopperInstance(id="move-child", name="C", scope=HopperScope.PROJECT, parent=root_a)
+        leaf = HopperInstance(id="move-leaf", name="L", scope=HopperScope.ORCHESTRATION, parent=child)
+        clean_db.add_all([leaf, child, root_b, root_a])
+        clean_db.commit()
+
+        assert [inst.id for inst in leaf.get_ancestors()] == ["move-child", "move-a"]
+        assert leaf.get_depth() == 2
+
+        def closure_rows() -> set[tuple[str, str, int]]:
+            return {
+                (row.ancestor_id, row.descendant_id, row.depth)
+                for row in clean_db.query(InstanceClosure).all()
+            }
+
+        child.parent = root_b
+        clean_db.commit()
+        assert leaf.get_root().id == "move-b"
+        assert [inst.id for inst in root_a.get_descendants()] == []
+        assert [inst.id for inst in root_b.get_descendants()] == ["move-child", "move-leaf"]
+
+        moved = closure_rows()
+        clean_db.query(InstanceClosure).delete()
+        assert leaf.get_depth() == 2  # falls back to the parent walk
+        assert HopperInstance.rebuild_closure(clean_db) == len(moved)
+        assert closure_rows() == moved
+
+        clean_db.delete(leaf)
+        clean_db.commit()
+        assert all("move-leaf" not in row[:2] for row in closure_rows())
+
 class TestEnumAlignment:
     """Test that schema enums align with model enums."""
 
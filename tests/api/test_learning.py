@@ -348,6 +348,18 @@ class TestPatternModel:
 class TestFeedbackIntegration:
     """Integration tests for feedback functionality."""
 
+    def test_learning_components_share_working_memory(self):
+        """Test every request's learning engine uses the same working memory."""
+        from sqlalchemy.ext.asyncio import AsyncSession
+
+        from hopper.api.routes.learning import _get_sync_components
+
+        first = _get_sync_components(AsyncSession())["learning_engine"]
+        second = _get_sync_components(AsyncSession())["learning_engine"]
+
+        assert first is not second
+        assert first.working_memory is second.working_memory
+
     def test_feedback_with_learning_engine(self, db_session: Session):
         """Test feedback processed by learning engine."""
         from hopper.memory import FeedbackStore, EpisodicStore, LearningEngine
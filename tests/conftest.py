@@ -11,7 +11,8 @@ This module provides comprehensive fixtures for:
 """
 
 import os
-from collections.abc import Generator
+from collections.abc import Callable, Generator
+from contextlib import AbstractContextManager, contextmanager
 from pathlib import Path
 from unittest.mock import Mock
 
@@ -109,6 +110,34 @@ def clean_db(db_session: Session) -> Session:
     return db_session
 
 
+@pytest.fixture(scope="function")
+def count_statements(
+    db_session: Session,
+) -> Callable[[], AbstractContextManager[list[str]]]:
+    """
+    Record the SQL statements executed on the test engine.
+
+    Usage: ``with count_statements() as statements: ...`` then assert on
+    ``len(statements)`` to guard query counts against N+1 regressions.
+    """
+
+    @contextmanager
+    def counter() -> Generator[list[str], None, None]:
+        statements: list[str] = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = db_session.get_bind().engine
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+    return counter
+
+
 @pytest.fixture(scope="session")
 def postgres_engine() -> Generator[Engine, None, None]:
     """
@@ -430,6 +459,23 @@ def reset_environment():
     os.environ.update(original_env)
 
 
+@pytest.fixture(autouse=True)
+def reset_memory_caches():
+    """
+    Clear process-wide memoized statistics after each test.
+
+    The session-scoped engine is shared by every test, so results cached
+    for it would otherwise outlive the rolled-back data they came from.
+    """
+    yield
+
+    from hopper.memory.episodic.store import clear_statistics_cache
+    from hopper.memory.feedback.analytics import clear_summary_cache
+
+    clear_statistics_cache()
+    clear_summary_cache()
+
+
 @pytest.fixture
 def cleanup_temp_files():
     """
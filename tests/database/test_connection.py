@@ -5,12 +5,14 @@ Tests for database connection management.
 import os
 
 import pytest
-from sqlalchemy import text
+from sqlalchemy import JSON, Column, Integer, MetaData, Table, insert, select, text
 
 from hopper.database.connection import (
     create_sync_engine,
     get_database_url,
     get_sync_session,
+    json_engine_options,
+    pool_engine_options,
     reset_session_factories,
 )
 
@@ -68,6 +70,41 @@ def test_create_sync_engine_sqlite():
         assert result.scalar() == 1
 
 
+def test_create_sync_engine_json_roundtrip():
+    """Test JSON columns round-trip through the configured serializer."""
+    engine = create_sync_engine("sqlite:///:memory:")
+    metadata = MetaData()
+    table = Table("json_test", metadata, Column("id", Integer, primary_key=True), Column("data", JSON))
+    metadata.create_all(engine)
+
+    payload = {"tags": ["python", "api"], "nested": {"score": 0.5}, "empty": None}
+    with engine.begin() as conn:
+        conn.execute(insert(table).values(id=1, data=payload))
+        assert conn.execute(select(table.c.data)).scalar() == payload
+
+
+def test_json_engine_options():
+    """Test JSON engine options are either empty or a full serializer pair."""
+    options = json_engine_options()
+    assert set(options) in (set(), {"json_serializer", "json_deserializer"})
+
+
+def test_pool_engine_options(monkeypatch):
+    """Test pool options default sizing and environment overrides."""
+    monkeypatch.delenv("DB_POOL_SIZE", raising=False)
+    monkeypatch.delenv("DB_MAX_OVERFLOW", raising=False)
+    options = pool_engine_options()
+    assert options["pool_size"] == 10
+    assert options["max_overflow"] == 20
+    assert options["pool_pre_ping"] is True
+
+    monkeypatch.setenv("DB_POOL_SIZE", "3")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "0")
+    options = pool_engine_options()
+    assert options["pool_size"] == 3
+    assert options["max_overflow"] == 0
+
+
 def test_sync_session_context_manager():
     """Test synchronous session context manager."""
     # Use in-memory SQLite for testing
@@ -3,6 +3,7 @@ Tests for RoutingDecision model.
 """
 
 import pytest
+from sqlalchemy import inspect
 from sqlalchemy.orm import Session
 
 from hopper.models import HopperInstance, HopperScope, Project, RoutingDecision, Task
@@ -205,3 +206,36 @@ def test_routing_decision_without_project(clean_db: Session) -> None:
     assert retrieved.project is None
     assert retrieved.confidence == 0.0
     assert "No suitable project" in retrieved.reasoning
+
+
+def test_routing_decision_details_are_deferred(clean_db: Session) -> None:
+    """Test large decision payloads load together only when accessed."""
+    instance = HopperInstance(
+        instance_id="test-instance",
+        scope=HopperScope.GLOBAL.value,
+    )
+    task = Task(id="TASK-001", instance_id="test-instance", title="Test task")
+    clean_db.add_all([instance, task])
+    clean_db.commit()
+
+    clean_db.add(
+        RoutingDecision(
+            task_id="TASK-001",
+            reasoning="Matched on tags",
+            alternatives={"sark": 0.4},
+            workload_snapshot={"czarina": 3},
+            context={"tags": ["api"]},
+        )
+    )
+    clean_db.commit()
+    clean_db.expunge_all()
+
+    retrieved = clean_db.query(RoutingDecision).filter_by(task_id="TASK-001").one()
+    unloaded = inspect(retrieved).unloaded
+    assert {"reasoning", "alternatives", "workload_snapshot", "context"} <= unloaded
+
+    assert retrieved.reasoning == "Matched on tags"
+    assert inspect(retrieved).unloaded.isdisjoint(
+        {"alternatives", "workload_snapshot", "context"}
+    )
+    assert retrieved.context == {"tags": ["api"]}
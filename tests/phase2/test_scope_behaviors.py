@@ -7,6 +7,7 @@ Tests Global, Project, and Orchestration scope behaviors.
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
+
 from hopper.intelligence.scopes.base import TaskAction, TaskActionType
 from hopper.intelligence.scopes.factory import (
     get_behavior_for_scope,
@@ -16,7 +17,7 @@ from hopper.intelligence.scopes.factory import (
     ProjectScopeBehavior,
     OrchestrationScopeBehavior,
 )
-from hopper.models import HopperScope, TaskStatus
+from hopper.models import HopperInstance, HopperScope, InstanceStatus, TaskStatus
 
 
 class TestScopeBehaviorFactory:
@@ -145,7 +146,7 @@ class TestProjectScopeBehavior:
 
     @pytest.mark.asyncio
     async def test_handle_incoming_task_routes_to_orchestration(
-        self, db_session, project_instance, orchestration_instance, sample_task
+        self, count_statements, db_session, project_instance, orchestration_instance, sample_task
     ):
         """Test that project routes tasks to orchestration instances."""
         behavior = ProjectScopeBehavior(db_session)
@@ -172,6 +173,30 @@ class TestProjectScopeBehavior:
         assert action.action_type == TaskActionType.HANDLE
 
 
+    @pytest.mark.asyncio
+    async def test_find_delegation_target_prefers_least_loaded(
+        self, count_statements, db_session, project_instance, orchestration_instance, sample_task
+    ):
+        """Test the least-loaded orchestration is picked with task counts from one query."""
+        behavior = ProjectScopeBehavior(db_session)
+        idle = HopperInstance(
+            id="orch-idle",
+            name="Idle Worker",
+            scope=HopperScope.ORCHESTRATION,
+            status=InstanceStatus.RUNNING,
+            parent_id=project_instance.id,
+        )
+        db_session.add(idle)
+        sample_task.instance_id = orchestration_instance.id
+        db_session.flush()
+
+        with count_statements() as statements:
+            target = await behavior.find_delegation_target(sample_task, project_instance)
+
+        assert target.id == "orch-idle"
+        assert len(statements) == 1
+
+
 class TestOrchestrationScopeBehavior:
     """Tests for OrchestrationScopeBehavior."""
 
@@ -3,12 +3,16 @@ Phase 3 specific fixtures for memory system testing.
 """
 
 import pytest
+from collections.abc import Generator
 from datetime import datetime
 from uuid import uuid4
 
-from sqlalchemy.orm import Session
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from hopper.models import (
+    Base,
     HopperInstance,
     HopperScope,
     InstanceStatus,
@@ -22,6 +26,23 @@ from hopper.memory.working.backends import LocalBackend
 from hopper.memory.working.context import InstanceInfo, RecentDecision, SimilarTask
 
 
+@pytest.fixture
+def other_db_session() -> Generator[Session, None, None]:
+    """Create a session on a second, empty in-memory database."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    yield session
+
+    session.close()
+    engine.dispose()
+
+
 @pytest.fixture
 def local_backend() -> LocalBackend:
     """Create a local backend for testing."""
@@ -257,6 +257,24 @@ class TestConsolidatedStore:
 
         assert updated.usage_count == initial_usage + 1
 
+    def test_update_pattern_confidences_batch(self, consolidated_store, sample_pattern):
+        """Test a batch of outcomes matches applying them one at a time."""
+        other = consolidated_store.create_pattern(
+            name="other-pattern",
+            target_instance="web-instance",
+            confidence=0.6,
+        )
+        outcomes = [(sample_pattern.id, True)] * 4 + [(sample_pattern.id, False)] * 2
+        outcomes += [(other.id, True), ("nonexistent", True)]
+
+        updated = consolidated_store.update_pattern_confidences(outcomes)
+
+        assert {p.id for p in updated} == {sample_pattern.id, other.id}
+        assert sample_pattern.usage_count == 6
+        assert sample_pattern.success_count == 4
+        assert sample_pattern.failure_count == 2
+        assert other.usage_count == 1
+
     def test_deactivate_pattern(self, consolidated_store, sample_pattern):
         """Test deactivating a pattern."""
         result = consolidated_store.deactivate_pattern(sample_pattern.id)
@@ -6,6 +6,8 @@ import pytest
 from datetime import datetime, timedelta
 from uuid import uuid4
 
+from sqlalchemy import inspect, select, text
+
 from hopper.memory.episodic import EpisodicStore, RoutingEpisode
 from hopper.models import Task, TaskStatus, RoutingDecision
 
@@ -151,6 +153,20 @@ class TestEpisodicStore:
         assert episode.confidence == 0.9
         assert len(episode.available_instances) == 2
 
+    def test_record_episodes_batch(self, db_session, episodic_store, task_for_episode):
+        """Test recording several episodes in one batch."""
+        episodes = episodic_store.record_episodes(
+            [
+                {"task": task_for_episode, "chosen_instance": "api-project", "confidence": 0.9},
+                {"task": task_for_episode, "chosen_instance": "web-project"},
+            ]
+        )
+
+        assert [ep.chosen_instance for ep in episodes] == ["api-project", "web-project"]
+        assert episodes[0].confidence == 0.9
+        assert len(episodic_store.get_episodes_for_task(task_for_episode.id)) == 2
+        assert episodic_store.record_episodes([]) == []
+
     def test_record_episode_creates_snapshot(self, episodic_store, task_for_episode):
         """Test that episode captures task snapshot."""
         episode = episodic_store.record_episode(
@@ -210,6 +226,23 @@ class TestEpisodicStore:
         assert retrieved is not None
         assert retrieved.id == episode.id
 
+    def test_get_episode_lite(self, db_session, episodic_store, task_for_episode):
+        """Test lite fetch defers the JSON columns."""
+        episode = episodic_store.record_episode(
+            task=task_for_episode,
+            chosen_instance="api-project",
+            decision_factors={"source": "rules"},
+        )
+        db_session.expunge_all()
+
+        lite = episodic_store.get_episode_lite(episode.id)
+
+        assert lite.chosen_instance == "api-project"
+        assert "task_snapshot" in inspect(lite).unloaded
+        assert "decision_factors" in inspect(lite).unloaded
+        # Deferred columns still load on access
+        assert lite.decision_factors == {"source": "rules"}
+
     def test_get_episode_not_found(self, episodic_store):
         """Test getting nonexistent episode."""
         result = episodic_store.get_episode("nonexistent")
@@ -250,6 +283,46 @@ class TestEpisodicStore:
         assert latest.id == second.id
         assert latest.chosen_instance == "second-project"
 
+    def test_get_latest_episode_for_task_uses_index(self, db_session, episodic_store, task_for_episode):
+        """Test the latest-episode lookup is served by the (task_id, routed_at) index."""
+        query = (
+            select(RoutingEpisode)
+            .where(RoutingEpisode.task_id == task_for_episode.id)
+            .order_by(RoutingEpisode.routed_at.desc())
+            .limit(1)
+        )
+        compiled = query.compile(db_session.get_bind(), compile_kwargs={"literal_binds": True})
+
+        plan = db_session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+
+        details = " ".join(row[-1] for row in plan)
+        assert "idx_routing_episodes_task_routed" in details
+        assert "TEMP B-TREE" not in details
+
+    def test_get_latest_episodes_for_tasks(self, db_session, episodic_store, task_for_episode):
+        """Test batched latest-episode lookup."""
+        other_task = Task(
+            id=f"task-{uuid4().hex[:8]}",
+            title="Other task",
+            project="test",
+            status=TaskStatus.PENDING,
+            created_at=datetime.utcnow(),
+        )
+        db_session.add(other_task)
+        db_session.flush()
+
+        old = episodic_store.record_episode(task=task_for_episode, chosen_instance="first")
+        old.routed_at = datetime.utcnow() - timedelta(hours=1)
+        latest = episodic_store.record_episode(task=task_for_episode, chosen_instance="second")
+        other = episodic_store.record_episode(task=other_task, chosen_instance="third")
+
+        episodes = episodic_store.get_latest_episodes_for_tasks(
+            [task_for_episode.id, other_task.id, "task-missing"]
+        )
+
+        assert episodes == {task_for_episode.id: latest, other_task.id: other}
+        assert episodic_store.get_latest_episodes_for_tasks([]) == {}
+
     def test_get_episodes_for_instance(self, episodic_store, task_for_episode):
         """Test getting episodes for a specific instance."""
         # Create episodes for different instances
@@ -373,6 +446,61 @@ class TestEpisodicStore:
         # Success rate: 5 / (5+2) = 0.714...
         assert 0.71 < stats["success_rate"] < 0.72
 
+    def test_get_statistics_cached_until_write(self, episodic_store, task_for_episode):
+        """Test statistics are memoized and invalidated by store writes."""
+        episodic_store.record_episode(task=task_for_episode, chosen_instance="api-project")
+
+        assert episodic_store.get_statistics()["total_episodes"] == 1
+
+        # Direct inserts bypass the store, so the memoized result is served
+        episodic_store.session.add(
+            RoutingEpisode(
+                id=f"ep-{uuid4().hex[:12]}",
+                task_id=task_for_episode.id,
+                task_snapshot={},
+                routed_at=datetime.utcnow(),
+            )
+        )
+        episodic_store.session.flush()
+        assert episodic_store.get_statistics()["total_episodes"] == 1
+
+        # Recording through the store invalidates the cache
+        episodic_store.record_episode(task=task_for_episode, chosen_instance="api-project")
+        assert episodic_store.get_statistics()["total_episodes"] == 3
+
+    def test_get_statistics_shared_across_stores(self, db_session, task_for_episode):
+        """Test memoized statistics are shared by stores on the same database."""
+        first = EpisodicStore(db_session)
+        first.record_episode(task=task_for_episode, chosen_instance="api-project")
+        assert first.get_statistics()["total_episodes"] == 1
+
+        # A store built later (as the API does per request) reuses the result
+        db_session.add(
+            RoutingEpisode(
+                id=f"ep-{uuid4().hex[:12]}",
+                task_id=task_for_episode.id,
+                task_snapshot={},
+                routed_at=datetime.utcnow(),
+            )
+        )
+        db_session.flush()
+        second = EpisodicStore(db_session)
+        assert second.get_statistics()["total_episodes"] == 1
+
+        # A write through any store invalidates it for all of them
+        second.record_episode(task=task_for_episode, chosen_instance="api-project")
+        assert first.get_statistics()["total_episodes"] == 3
+
+    def test_get_statistics_not_shared_across_databases(
+        self, db_session, other_db_session, task_for_episode
+    ):
+        """Test in-memory databases with the same URL don't share statistics."""
+        store = EpisodicStore(db_session)
+        store.record_episode(task=task_for_episode, chosen_instance="api-project")
+        assert store.get_statistics()["total_episodes"] == 1
+
+        assert EpisodicStore(other_db_session).get_statistics()["total_episodes"] == 0
+
     def test_find_similar_episodes(self, db_session, episodic_store):
         """Test finding episodes with similar tags."""
         # Create task with python tag
@@ -417,6 +545,40 @@ class TestEpisodicStore:
         assert len(similar) == 1
         assert similar[0].task_id == task1.id
 
+    def test_find_similar_episodes_beyond_recent_window(self, db_session, episodic_store):
+        """Test matches are found even behind many newer non-matching episodes."""
+        old_task = Task(
+            id=f"task-{uuid4().hex[:8]}",
+            title="Tagged task",
+            project="test",
+            status=TaskStatus.PENDING,
+            tags=["python", "api"],
+            created_at=datetime.utcnow(),
+        )
+        db_session.add(old_task)
+        db_session.flush()
+
+        match = episodic_store.record_episode(task=old_task, chosen_instance="python-project")
+        match.routed_at = datetime.utcnow() - timedelta(days=1)
+        match.mark_success()
+
+        for i in range(5):
+            task = Task(
+                id=f"task-{uuid4().hex[:8]}",
+                title=f"Other task {i}",
+                project="test",
+                status=TaskStatus.PENDING,
+                tags={"frontend": True},
+                created_at=datetime.utcnow(),
+            )
+            db_session.add(task)
+            db_session.flush()
+            episodic_store.record_episode(task=task, chosen_instance="web").mark_success()
+
+        similar = episodic_store.find_similar_episodes(["python"], limit=1)
+
+        assert [ep.id for ep in similar] == [match.id]
+
 
 class TestEpisodicStoreCleanup:
     """Tests for episodic store cleanup."""
@@ -467,3 +629,25 @@ class TestEpisodicStoreCleanup:
 
         # Verify old episode is gone
         assert episodic_store.get_episode(old_episode.id) is None
+
+    def test_cleanup_old_episodes_in_batches(self, db_session, episodic_store):
+        """Test cleanup removes everything past retention across several chunks."""
+        old_task = Task(
+            id=f"task-{uuid4().hex[:8]}",
+            title="Old task",
+            project="test",
+            status=TaskStatus.DONE,
+            created_at=datetime.utcnow() - timedelta(days=100),
+        )
+        db_session.add(old_task)
+        db_session.flush()
+
+        episodes = episodic_store.record_episodes([{"task": old_task} for _ in range(5)])
+        for episode in episodes:
+            episode.routed_at = datetime.utcnow() - timedelta(days=100)
+        db_session.flush()
+
+        deleted = episodic_store.cleanup_old_episodes(retention_days=90, batch_size=2)
+
+        assert deleted == 5
+        assert episodic_store.get_episodes_for_task(old_task.id) == []
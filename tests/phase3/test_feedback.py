@@ -6,6 +6,8 @@ import pytest
 from datetime import datetime, timedelta
 from uuid import uuid4
 
+from sqlalchemy import inspect
+
 from hopper.memory.feedback import FeedbackStore, FeedbackAnalytics
 from hopper.memory.episodic import EpisodicStore
 from hopper.models import Task, TaskFeedback, TaskStatus
@@ -172,6 +174,38 @@ class TestFeedbackStore:
         assert updated.was_good_match is False
         assert updated.routing_feedback == "Updated feedback"
 
+    def test_record_feedback_single_upsert(self, count_statements, db_session, feedback_store, sample_task):
+        """Test recording feedback is one upsert plus the episode lookup."""
+        feedback_store.record_feedback(
+            task_id=sample_task.id,
+            was_good_match=True,
+            notes="Keep me",
+        )
+
+        with count_statements() as statements:
+            updated = feedback_store.record_feedback(
+                task_id=sample_task.id,
+                was_good_match=False,
+                quality_score=2.0,
+            )
+
+        assert len(statements) == 2
+        assert updated.was_good_match is False
+        assert updated.quality_score == 2.0
+        assert updated.notes == "Keep me"
+
+    def test_record_feedback_stamps_utc_created_at(self, feedback_store, sample_task):
+        """Test upserted feedback gets a naive UTC created_at that updates keep."""
+        before = datetime.utcnow().replace(microsecond=0)
+        feedback = feedback_store.record_feedback(task_id=sample_task.id, was_good_match=True)
+        after = datetime.utcnow()
+
+        assert feedback.created_at.tzinfo is None
+        assert before <= feedback.created_at <= after
+
+        updated = feedback_store.record_feedback(task_id=sample_task.id, was_good_match=False)
+        assert updated.created_at == feedback.created_at
+
     def test_get_feedback(self, feedback_store, sample_task):
         """Test getting feedback."""
         feedback_store.record_feedback(
@@ -215,6 +249,36 @@ class TestFeedbackStore:
         assert len(good_only) == 3  # tasks 0, 2, 4
         assert len(bad_only) == 2  # tasks 1, 3
 
+    def test_get_all_feedback_paginated(self, feedback_store, multiple_tasks):
+        """Test limit and offset rebind on the cached statement."""
+        for task in multiple_tasks:
+            feedback_store.record_feedback(
+                task_id=task.id,
+                was_good_match=True,
+            )
+
+        first_page = feedback_store.get_all_feedback(limit=2)
+        second_page = feedback_store.get_all_feedback(limit=2, offset=2)
+        last_page = feedback_store.get_all_feedback(limit=2, offset=4)
+
+        assert len(first_page) == 2
+        assert len(second_page) == 2
+        assert len(last_page) == 1
+        page_ids = {fb.task_id for fb in first_page + second_page + last_page}
+        assert page_ids == {t.id for t in multiple_tasks}
+
+    def test_iter_all_feedback(self, feedback_store, multiple_tasks):
+        """Test streaming all feedback in small batches."""
+        for task in multiple_tasks:
+            feedback_store.record_feedback(
+                task_id=task.id,
+                was_good_match=True,
+            )
+
+        streamed = list(feedback_store.iter_all_feedback(batch_size=2))
+
+        assert {fb.task_id for fb in streamed} == {t.id for t in multiple_tasks}
+
     def test_get_feedback_for_instance(self, feedback_store, multiple_tasks):
         """Test getting feedback for specific instance."""
         for task in multiple_tasks:
@@ -229,6 +293,20 @@ class TestFeedbackStore:
         assert len(api_feedback) == 3
         assert len(web_feedback) == 2
 
+    def test_get_feedback_for_instance_loads_task(self, db_session, feedback_store, multiple_tasks):
+        """Test instance feedback comes back with its task already loaded."""
+        for task in multiple_tasks:
+            feedback_store.record_feedback(
+                task_id=task.id,
+                was_good_match=True,
+            )
+        db_session.expunge_all()
+
+        api_feedback = feedback_store.get_feedback_for_instance("api-instance")
+
+        assert all("task" not in inspect(fb).unloaded for fb in api_feedback)
+        assert all(fb.task.instance_id == "api-instance" for fb in api_feedback)
+
     def test_get_misrouted_feedback(self, feedback_store, multiple_tasks):
         """Test getting misrouted feedback."""
         for i, task in enumerate(multiple_tasks):
@@ -313,6 +391,32 @@ class TestFeedbackStore:
         assert updated_episode.outcome_success is True
         assert updated_episode.outcome_duration == "2h"
 
+    def test_record_feedback_bulk(self, db_session, feedback_store, episodic_store, multiple_tasks):
+        """Test bulk feedback inserts new rows, updates existing ones and skips unknown tasks."""
+        feedback_store.record_feedback(task_id=multiple_tasks[0].id, was_good_match=True)
+        episode = episodic_store.record_episode(task=multiple_tasks[1], chosen_instance="api-instance")
+
+        recorded = feedback_store.record_feedback_bulk(
+            [
+                {"task_id": multiple_tasks[0].id, "was_good_match": False, "notes": "Revised"},
+                {"task_id": multiple_tasks[1].id, "was_good_match": False, "unexpected_blockers": ["auth"]},
+                {"task_id": "nonexistent", "was_good_match": True},
+                {"task_id": multiple_tasks[2].id, "was_good_match": True, "quality_score": 4.0},
+            ]
+        )
+
+        assert [fb.task_id for fb in recorded] == [t.id for t in multiple_tasks[:3]]
+        assert feedback_store.get_feedback(multiple_tasks[0].id).was_good_match is False
+        assert feedback_store.get_feedback(multiple_tasks[0].id).notes == "Revised"
+        assert feedback_store.get_feedback(multiple_tasks[1].id).unexpected_blockers == {"blockers": ["auth"]}
+        assert feedback_store.get_feedback(multiple_tasks[2].id).quality_score == 4.0
+        assert episodic_store.get_episode(episode.id).outcome_success is False
+        assert episodic_store.get_episode(episode.id).feedback_id == multiple_tasks[1].id
+
+    def test_record_feedback_bulk_empty(self, feedback_store):
+        """Test bulk feedback with no items is a no-op."""
+        assert feedback_store.record_feedback_bulk([]) == []
+
 
 class TestFeedbackAnalytics:
     """Tests for FeedbackAnalytics."""
@@ -347,6 +451,18 @@ class TestFeedbackAnalytics:
         assert report.bad_matches == 2
         assert report.accuracy_rate == 0.6
 
+    def test_routing_accuracy_query_count(self, count_statements, db_session, feedback_with_data):
+        """Test routing accuracy issues only the planned queries (no N+1)."""
+        analytics = FeedbackAnalytics(db_session)
+        db_session.expire_all()
+
+        with count_statements() as statements:
+            report = analytics.get_routing_accuracy()
+
+        # Totals, misrouting targets and per-instance GROUP BY - no per-row queries
+        assert len(statements) == 3
+        assert set(report.by_instance) == {"api-instance", "web-instance"}
+
     def test_get_routing_accuracy_by_period(self, db_session, feedback_with_data):
         """Test routing accuracy with time filter."""
         analytics = FeedbackAnalytics(db_session)
@@ -390,6 +506,12 @@ class TestFeedbackAnalytics:
         assert len(report.by_complexity) == 5
         assert 1 in report.by_complexity
         assert 5 in report.by_complexity
+        assert report.by_complexity[5] == {
+            "count": 1,
+            "average_quality": 5.0,
+            "rework_count": 1,
+            "good_matches": 0,
+        }
 
     def test_get_misrouting_patterns(self, db_session, feedback_with_data):
         """Test misrouting pattern analysis."""
@@ -400,6 +522,20 @@ class TestFeedbackAnalytics:
         # Should identify patterns for bad matches
         assert len(patterns) > 0
 
+    def test_misrouting_pattern_details(self, db_session, feedback_with_data):
+        """Test misrouting buckets carry counts, common tags and examples."""
+        analytics = FeedbackAnalytics(db_session)
+
+        patterns = analytics.get_misrouting_patterns()
+
+        assert len(patterns) == 1
+        pattern = patterns[0]
+        assert pattern["routed_to"] == "web-instance"
+        assert pattern["should_have_been"] == "other-instance"
+        assert pattern["count"] == 2
+        assert pattern["common_tags"] == [("frontend", 2)]
+        assert len(pattern["examples"]) == 2
+
     def test_get_summary(self, db_session, feedback_with_data):
         """Test summary report."""
         analytics = FeedbackAnalytics(db_session)
@@ -410,6 +546,43 @@ class TestFeedbackAnalytics:
         assert "quality_metrics" in summary
         assert summary["period_days"] == 30
 
+        accuracy = summary["routing_accuracy"]
+        assert accuracy["total_feedback"] == 5
+        assert accuracy["good_matches"] == 3
+        assert accuracy["common_misrouting_targets"] == [
+            {"target": "other-instance", "count": 2}
+        ]
+        assert summary["quality_metrics"]["rework_rate"] == 0.2
+
+    def test_get_summary_shared_until_feedback_changes(
+        self, monkeypatch, db_session, feedback_with_data, multiple_tasks
+    ):
+        """Test summaries are shared across instances and dropped on feedback writes."""
+        first = FeedbackAnalytics(db_session).get_summary(days=30)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("summary should be served from the process cache")
+
+        # A fresh instance, as the API builds per request, still hits the cache
+        analytics = FeedbackAnalytics(db_session)
+        monkeypatch.setattr(analytics, "_aggregate_feedback", fail)
+        assert analytics.get_summary(days=30) == first
+        monkeypatch.undo()
+
+        feedback_with_data.record_feedback(task_id=multiple_tasks[3].id, was_good_match=True)
+        summary = FeedbackAnalytics(db_session).get_summary(days=30)
+        assert summary["routing_accuracy"]["good_matches"] == 4
+
+    def test_get_summary_not_shared_across_databases(
+        self, db_session, other_db_session, feedback_with_data
+    ):
+        """Test in-memory databases with the same URL don't share summaries."""
+        summary = FeedbackAnalytics(db_session).get_summary(days=30)
+        assert summary["routing_accuracy"]["total_feedback"] == 5
+
+        other = FeedbackAnalytics(other_db_session).get_summary(days=30)
+        assert other["routing_accuracy"]["total_feedback"] == 0
+
     def test_routing_accuracy_to_dict(self, db_session, feedback_with_data):
         """Test report serialization."""
         analytics = FeedbackAnalytics(db_session)
@@ -443,3 +616,18 @@ class TestFeedbackAnalytics:
 
         quality = analytics.get_quality_report()
         assert quality.total_tasks == 0
+
+    def test_empty_period_skips_breakdowns(self, count_statements, db_session, feedback_with_data):
+        """Test an empty period is answered by the aggregate query alone."""
+        analytics = FeedbackAnalytics(db_session, summary_cache_ttl=0)
+
+        with count_statements() as statements:
+            future = datetime.utcnow() + timedelta(days=1)
+            accuracy = analytics.get_routing_accuracy(since=future)
+            quality = analytics.get_quality_report(since=future)
+
+        assert len(statements) == 2
+        assert accuracy.total_feedback == 0
+        assert accuracy.period_start == future
+        assert quality.total_tasks == 0
+        assert quality.by_complexity == {}
@@ -3,10 +3,14 @@ Tests for the learning loop integration.
 """
 
 import pytest
+from dataclasses import FrozenInstanceError
 from datetime import datetime
 from uuid import uuid4
 
+from sqlalchemy import event
+
 from hopper.memory.learning import LearningEngine, RoutingSuggestion, SuggestionSource
+from hopper.memory.learning.engine import LearningResult
 from hopper.memory.working import WorkingMemory
 from hopper.memory.working.context import InstanceInfo, SimilarTask
 from hopper.memory.episodic import EpisodicStore
@@ -136,6 +140,21 @@ class TestRoutingSuggestion:
         assert data["target_instance"] == "test"
         assert data["confidence"] == 0.9
         assert data["source"] == "rules"
+        assert data["similar_task_ids"] == ()
+        assert data["factors"] == {}
+
+    def test_from_dict_roundtrip(self):
+        """Test suggestions survive a to_dict/from_dict round trip."""
+        suggestion = RoutingSuggestion.from_similar_tasks(
+            target_instance="api-instance",
+            confidence=0.75,
+            similar_task_ids=["task-1", "task-2"],
+            success_rate=0.5,
+        )
+
+        restored = RoutingSuggestion.from_dict(suggestion.to_dict())
+
+        assert restored == suggestion
 
 
 class TestLearningEngine:
@@ -157,6 +176,38 @@ class TestLearningEngine:
         # Should get same object from cache
         assert context1.task_id == context2.task_id
 
+    def test_find_similar_tasks_single_episode_query(
+        self, count_statements, db_session, learning_engine, sample_task, test_instances
+    ):
+        """Test similar-task outcomes are loaded in one episode query (no N+1)."""
+        for i in range(3):
+            task = Task(
+                id=f"similar-task-{uuid4().hex[:8]}",
+                title=f"Implement API endpoint {i}",
+                project="backend",
+                status=TaskStatus.DONE,
+                instance_id="api-instance",
+                tags={"api": True, "python": True, "backend": True},
+                created_at=datetime.utcnow(),
+            )
+            db_session.add(task)
+            db_session.flush()
+            episode = learning_engine.episodic_store.record_episode(
+                task=task,
+                chosen_instance="api-instance",
+                confidence=0.8,
+            )
+            episode.mark_success()
+        db_session.flush()
+
+        with count_statements() as statements:
+            similar = learning_engine._find_similar_tasks(sample_task)
+
+        assert similar
+        assert all(s.outcome_success is True for s in similar)
+        episode_queries = [s for s in statements if "routing_episodes" in s]
+        assert len(episode_queries) == 1
+
     def test_get_routing_suggestions_empty(self, learning_engine, sample_task):
         """Test suggestions with no patterns or history."""
         suggestions = learning_engine.get_routing_suggestions(sample_task)
@@ -180,6 +231,65 @@ class TestLearningEngine:
         assert any(s.source == SuggestionSource.PATTERN for s in suggestions)
         assert any(s.target_instance == "api-instance" for s in suggestions)
 
+    def test_get_routing_suggestions_caches_pattern_matches(
+        self, monkeypatch, learning_engine, sample_task
+    ):
+        """Test pattern matches are reused until patterns change."""
+        learning_engine.consolidated_store.create_pattern(
+            name="api-python-pattern",
+            target_instance="api-instance",
+            tag_criteria={"required": ["api", "python"]},
+            confidence=0.85,
+        )
+        learning_engine.get_routing_suggestions(sample_task)
+        learning_engine.working_memory.invalidate_suggestions(sample_task.id)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("pattern lookup should be served from working memory")
+
+        monkeypatch.setattr(learning_engine.consolidated_store, "find_matching_patterns", fail)
+        suggestions = learning_engine.get_routing_suggestions(sample_task)
+
+        assert any(s.source == SuggestionSource.PATTERN for s in suggestions)
+
+    def test_get_routing_suggestions_cached_per_task(self, monkeypatch, learning_engine, sample_task):
+        """Test repeated suggestion requests for a task are served from working memory."""
+        learning_engine.consolidated_store.create_pattern(
+            name="api-python-pattern",
+            target_instance="api-instance",
+            tag_criteria={"required": ["api", "python"]},
+            confidence=0.85,
+        )
+        first = learning_engine.get_routing_suggestions(sample_task)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("suggestions should be served from working memory")
+
+        monkeypatch.setattr(learning_engine, "build_context", fail)
+        second = learning_engine.get_routing_suggestions(sample_task)
+
+        assert [s.to_dict() for s in second] == [s.to_dict() for s in first]
+
+        # Recording an outcome invalidates the cached suggestions
+        learning_engine.record_outcome(sample_task.id, success=True)
+        assert learning_engine.working_memory.get_suggestions(sample_task.id, 3) is None
+
+    def test_analyze_similar_tasks(self, learning_engine):
+        """Test similar-task analysis picks the instance with the best track record."""
+        similar = [
+            SimilarTask(task_id="t1", title="A", similarity_score=0.9, routed_to="api-instance", outcome_success=True),
+            SimilarTask(task_id="t2", title="B", similarity_score=0.8, routed_to="api-instance", outcome_success=True),
+            SimilarTask(task_id="t3", title="C", similarity_score=0.7, routed_to="api-instance", outcome_success=False),
+            SimilarTask(task_id="t4", title="D", similarity_score=0.6, routed_to="web-instance", outcome_success=True),
+            SimilarTask(task_id="t5", title="E", similarity_score=0.5, routed_to=None, outcome_success=True),
+        ]
+
+        suggestion = learning_engine._analyze_similar_tasks(similar)
+
+        assert suggestion.target_instance == "api-instance"
+        assert suggestion.confidence == pytest.approx(2 / 3)
+        assert suggestion.similar_task_ids == ("t1", "t2", "t3")
+
     def test_record_routing(self, learning_engine, sample_task):
         """Test recording a routing decision."""
         episode = learning_engine.record_routing(
@@ -213,6 +323,7 @@ class TestLearningEngine:
 
         assert episode.decision_factors["pattern_id"] == "pat-123"
         assert episode.decision_factors["source"] == "pattern"
+        assert "similar_task_ids" not in episode.decision_factors
 
     def test_record_outcome(self, learning_engine, sample_task):
         """Test recording routing outcome."""
@@ -276,6 +387,92 @@ class TestLearningEngine:
         assert updated_pattern.usage_count == 1
         assert updated_pattern.success_count == 1
 
+    def test_pattern_updates_batched(self, db_session, sample_task):
+        """Test buffered pattern updates are written when the batch fills or on commit."""
+        engine = LearningEngine(db_session, pattern_batch_size=3)
+        pattern = engine.consolidated_store.create_pattern(
+            name="test-pattern",
+            target_instance="api-instance",
+            tag_criteria={"required": ["api"]},
+            confidence=0.7,
+        )
+        suggestion = RoutingSuggestion.from_pattern(
+            target_instance="api-instance",
+            confidence=0.7,
+            pattern_id=pattern.id,
+            pattern_name=pattern.name,
+        )
+
+        for success in (True, False):
+            engine.record_routing(sample_task, "api-instance", 0.7, suggestion=suggestion)
+            result = engine.record_outcome(sample_task.id, success=success)
+            assert result.patterns_updated == 1
+
+        # Still buffered
+        assert pattern.usage_count == 0
+
+        # Committing the session writes the buffer
+        db_session.commit()
+        assert pattern.usage_count == 2
+        assert pattern.success_count == 1
+        assert engine.flush_pattern_updates() == 0
+
+    def test_pattern_updates_dropped_on_rollback(self, caplog, db_session, sample_task):
+        """Test buffered pattern updates from a rolled-back transaction are discarded."""
+        engine = LearningEngine(db_session, pattern_batch_size=3)
+        pattern = engine.consolidated_store.create_pattern(
+            name="test-pattern",
+            target_instance="api-instance",
+            tag_criteria={"required": ["api"]},
+            confidence=0.7,
+        )
+        suggestion = RoutingSuggestion.from_pattern(
+            target_instance="api-instance",
+            confidence=0.7,
+            pattern_id=pattern.id,
+            pattern_name=pattern.name,
+        )
+        engine.record_routing(sample_task, "api-instance", 0.7, suggestion=suggestion)
+        engine.record_outcome(sample_task.id, success=True)
+
+        db_session.rollback()
+
+        assert engine.flush_pattern_updates() == 0
+        assert "Discarding 1 buffered pattern updates" in caplog.text
+
+    def test_close_detaches_from_session(self, db_session, sample_task):
+        """Test close() writes buffered updates and removes the session hooks."""
+        engine = LearningEngine(db_session, pattern_batch_size=3)
+        pattern = engine.consolidated_store.create_pattern(
+            name="test-pattern",
+            target_instance="api-instance",
+            tag_criteria={"required": ["api"]},
+            confidence=0.7,
+        )
+        suggestion = RoutingSuggestion.from_pattern(
+            target_instance="api-instance",
+            confidence=0.7,
+            pattern_id=pattern.id,
+            pattern_name=pattern.name,
+        )
+        engine.record_routing(sample_task, "api-instance", 0.7, suggestion=suggestion)
+        engine.record_outcome(sample_task.id, success=True)
+
+        engine.close()
+
+        assert pattern.usage_count == 1
+        assert not event.contains(db_session, "before_commit", engine._flush_before_commit)
+        assert not event.contains(db_session, "after_rollback", engine._discard_after_rollback)
+        engine.close()
+
+    def test_record_outcome_without_episode(self, learning_engine, sample_task):
+        """Test outcomes for unrouted tasks return an empty, immutable result."""
+        result = learning_engine.record_outcome(sample_task.id, success=True)
+
+        assert result.to_dict() == LearningResult().to_dict()
+        with pytest.raises(FrozenInstanceError):
+            result.episodes_created = 1
+
     def test_process_feedback(self, learning_engine, sample_task):
         """Test processing user feedback."""
         # Record routing first
@@ -294,6 +491,39 @@ class TestLearningEngine:
 
         assert result.feedback_processed == 1
 
+    def test_process_feedback_single_episode_lookup(self, count_statements, db_session, learning_engine, sample_task):
+        """Test feedback updates the episode and pattern with one episode lookup."""
+        pattern = learning_engine.consolidated_store.create_pattern(
+            name="api-python-pattern",
+            target_instance="api-instance",
+            tag_criteria={"required": ["api", "python"]},
+            confidence=0.5,
+        )
+        episode = learning_engine.record_routing(
+            task=sample_task,
+            chosen_instance="api-instance",
+            confidence=0.8,
+            suggestion=RoutingSuggestion.from_pattern(
+                target_instance="api-instance",
+                confidence=0.8,
+                pattern_id=pattern.id,
+                pattern_name=pattern.name,
+            ),
+        )
+
+        with count_statements() as statements:
+            result = learning_engine.process_feedback(
+                task_id=sample_task.id,
+                was_good_match=True,
+            )
+
+        assert result.patterns_updated == 1
+        assert episode.outcome_success is True
+        episode_selects = [
+            s for s in statements if s.startswith("SELECT") and "FROM routing_episodes" in s
+        ]
+        assert len(episode_selects) == 1
+
     def test_process_feedback_bad_match(self, learning_engine, sample_task):
         """Test processing negative feedback."""
         learning_engine.record_routing(
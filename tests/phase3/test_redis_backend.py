@@ -0,0 +1,375 @@
+"""
+Tests for the Redis working memory backend, run against fakeredis.
+"""
+
+import time
+
+import pytest
+import redis
+
+from hopper.memory.working.backends import redis as redis_backend
+from hopper.memory.working.backends.redis import RedisBackend
+
+fakeredis = pytest.importorskip("fakeredis")
+
+REDIS_URL = "redis://fake-redis:6379/0"
+PREFIX = "hopper:working:"
+
+
+@pytest.fixture
+def fake_server():
+    """Create an in-memory Redis server."""
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def make_backend(monkeypatch, fake_server):
+    """Build RedisBackends whose shared pools connect to the fake server."""
+    pools = {}
+    monkeypatch.setattr(redis_backend, "_POOLS", pools)
+
+    def make(**kwargs) -> RedisBackend:
+        if REDIS_URL not in pools:
+            client = fakeredis.FakeRedis(server=fake_server, decode_responses=True)
+            pools[REDIS_URL] = client.connection_pool
+        kwargs.setdefault("key_prefix", PREFIX)
+        return RedisBackend(url=REDIS_URL, **kwargs)
+
+    return make
+
+
+@pytest.fixture
+def raw(fake_server):
+    """A plain client for checking what actually reached Redis."""
+    return fakeredis.FakeRedis(server=fake_server, decode_responses=True)
+
+
+def fail_next_pipeline(monkeypatch, backend: RedisBackend, before_raise=None) -> None:
+    """Make the backend's next pipeline fail on execute, as if Redis went away."""
+    real_pipeline = backend._client.pipeline
+    failed = []
+
+    def pipeline(*args, **kwargs):
+        pipe = real_pipeline(*args, **kwargs)
+        if not failed:
+            failed.append(True)
+
+            def execute(*args, **kwargs):
+                if before_raise is not None:
+                    before_raise()
+                raise redis.ConnectionError("Connection refused")
+
+            pipe.execute = execute
+        return pipe
+
+    monkeypatch.setattr(backend._client, "pipeline", pipeline)
+
+
+def wait_for(condition, timeout: float = 2.0) -> bool:
+    """Poll until a condition holds or the timeout passes."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+class TestRedisWriteBehind:
+    """Tests for write-behind keys."""
+
+    def test_background_thread_writes(self, make_backend, raw):
+        """Test queued writes reach Redis without an explicit flush."""
+        backend = make_backend(write_behind_prefixes=("context:",))
+
+        assert backend.set("context:t1", {"task": "t1"}, ttl=60) is True
+
+        assert wait_for(lambda: raw.exists(PREFIX + "context:t1"))
+        assert 0 < raw.ttl(PREFIX + "context:t1") <= 60
+
+    def test_reads_see_queued_writes(self, make_backend, raw):
+        """Test reads return writes the thread has not flushed yet."""
+        backend = make_backend(write_behind_prefixes=("context:",), flush_interval=60)
+        backend.set("context:t1", {"task": "t1"})
+
+        assert raw.get(PREFIX + "context:t1") is None
+        assert backend.get("context:t1") == {"task": "t1"}
+        assert backend.get_many(["context:t1", "context:t2"]) == {"context:t1": {"task": "t1"}}
+        assert backend.exists("context:t1") is True
+
+    def test_other_keys_write_through(self, make_backend, raw):
+        """Test keys outside the write-behind prefixes are written immediately."""
+        backend = make_backend(write_behind_prefixes=("context:",), flush_interval=60)
+        backend.set("session:s1", {"session": "s1"})
+
+        assert raw.exists(PREFIX + "session:s1")
+
+    def test_delete_drops_queued_write(self, make_backend, raw):
+        """Test deleting a queued key stops it being written later."""
+        backend = make_backend(write_behind_prefixes=("context:",), flush_interval=60)
+        backend.set("context:t1", {"task": "t1"})
+
+        assert backend.delete("context:t1") is True
+        backend.flush()
+
+        assert backend.get("context:t1") is None
+        assert not raw.exists(PREFIX + "context:t1")
+
+    def test_clear_drops_queued_writes(self, make_backend, raw):
+        """Test clearing drops every queued write."""
+        backend = make_backend(write_behind_prefixes=("context:",), flush_interval=60)
+        backend.set("context:t1", {"task": "t1"})
+        backend.set("context:t2", {"task": "t2"})
+
+        backend.clear()
+        backend.flush()
+
+        assert backend.keys() == []
+        assert raw.keys(PREFIX + "*") == []
+
+    def test_failed_flush_requeues(self, monkeypatch, make_backend, raw):
+        """Test a failed flush keeps the batch queued and raises."""
+        backend = make_backend(write_behind_prefixes=("context:",), flush_interval=60)
+        backend.set("context:t1", {"task": "t1"})
+        fail_next_pipeline(monkeypatch, backend)
+
+        with pytest.raises(redis.ConnectionError):
+            backend.flush()
+        assert backend.get("context:t1") == {"task": "t1"}
+
+        backend.flush()
+        assert raw.exists(PREFIX + "context:t1")
+
+    def test_failed_flush_keeps_newer_writes(self, monkeypatch, make_backend):
+        """Test requeued values don't overwrite writes made during the failed flush."""
+        backend = make_backend(write_behind_prefixes=("context:",), flush_interval=60)
+        backend.set("context:t1", {"version": 1})
+        backend.set("context:t2", {"version": 1})
+        fail_next_pipeline(
+            monkeypatch, backend, lambda: backend.set("context:t1", {"version": 2})
+        )
+
+        with pytest.raises(redis.ConnectionError):
+            backend.flush()
+        backend.flush()
+
+        assert backend.get_many(["context:t1", "context:t2"]) == {
+            "context:t1": {"version": 2},
+            "context:t2": {"version": 1},
+        }
+
+    def test_background_thread_retries(self, monkeypatch, make_backend, raw):
+        """Test the writer retries a failed flush on its own."""
+        backend = make_backend(write_behind_prefixes=("context:",), retry_interval=0.01)
+        fail_next_pipeline(monkeypatch, backend)
+
+        backend.set("context:t1", {"task": "t1"})
+
+        assert wait_for(lambda: raw.exists(PREFIX + "context:t1"))
+
+
+class TestRedisSets:
+    """Tests for native Redis sets and the set-values script."""
+
+    def test_get_set_values(self, make_backend):
+        """Test members are paired with their own values, skipping missing ones."""
+        backend = make_backend(batch_size=3)
+        members = [f"context:t{i}" for i in range(7)]
+        for member in members:
+            backend.add_to_sets(["index"], member)
+        backend.set_many({member: {"id": member} for member in members[1:]})
+
+        assert backend.get_set_values("index") == {
+            member: {"id": member} for member in members[1:]
+        }
+
+    def test_get_set_values_empty(self, make_backend):
+        """Test a missing set has no values."""
+        backend = make_backend()
+
+        assert backend.get_set_values("missing") == {}
+
+    def test_get_set_values_large_set(self, make_backend, raw):
+        """Test sets too large for a single unpacked MGET are read in chunks."""
+        backend = make_backend()
+        members = [f"context:t{i}" for i in range(9000)]
+        raw.sadd(PREFIX + "index", *members)
+        live = members[::1000]
+        backend.set_many({member: {"id": member} for member in live})
+
+        assert backend.get_set_values("index") == {member: {"id": member} for member in live}
+
+    def test_get_set_values_prunes_dead_members(self, make_backend, raw):
+        """Test members whose values are gone are removed from the set."""
+        backend = make_backend()
+        backend.set_many({"context:live": {"id": "live"}, "context:gone": {"id": "gone"}})
+        backend.add_to_sets(["index"], "context:live", ttl=60)
+        backend.add_to_sets(["index"], "context:gone", ttl=60)
+        backend.add_to_sets(["index"], "context:never-written", ttl=60)
+        raw.delete(PREFIX + "context:gone")
+
+        assert backend.get_set_values("index") == {"context:live": {"id": "live"}}
+        assert backend.get_members("index") == ["context:live"]
+
+
+class TestRedisSize:
+    """Tests for size accounting through the key registry."""
+
+    def test_size_counts_writes_once(self, make_backend):
+        """Test every kind of write is counted, and rewrites only once."""
+        backend = make_backend()
+        backend.set("a", {"n": 1})
+        backend.set("a", {"n": 2})
+        backend.set_many({"b": {"n": 1}, "c": {"n": 1}})
+        backend.add_to_sets(["index"], "a", ttl=60)
+
+        assert backend.size() == 4
+
+    def test_size_after_delete_and_clear(self, make_backend):
+        """Test deleted and cleared keys are no longer counted."""
+        backend = make_backend()
+        backend.set_many({"a": {"n": 1}, "b": {"n": 1}})
+
+        backend.delete("a")
+        assert backend.size() == 1
+
+        backend.clear()
+        assert backend.size() == 0
+
+    def test_size_excludes_expired_keys(self, make_backend, raw):
+        """Test expired keys stay in the registry until size() or clear_expired()."""
+        backend = make_backend()
+        backend.set("short", {"n": 1}, ttl=1)
+        backend.set("long", {"n": 1}, ttl=60)
+
+        time.sleep(1.1)
+        backend.set("other", {"n": 1})
+
+        assert raw.zcard(PREFIX + "__keys__") == 3
+        assert backend.size() == 2
+        assert raw.zcard(PREFIX + "__keys__") == 2
+
+    def test_clear_expired_prunes_registry(self, make_backend):
+        """Test clear_expired() reports the expired keys it dropped from the registry."""
+        backend = make_backend()
+        backend.set("short", {"n": 1}, ttl=1)
+        backend.set("long", {"n": 1})
+
+        time.sleep(1.1)
+
+        assert backend.clear_expired() == 1
+        assert backend.clear_expired() == 0
+        assert backend.size() == 1
+
+    def test_writes_prune_registry_periodically(self, monkeypatch, make_backend, raw):
+        """Test the registry is pruned on a sample of writes."""
+        monkeypatch.setattr(redis_backend, "_REGISTRY_PRUNE_INTERVAL", 3)
+        backend = make_backend()
+        backend.set("short", {"n": 1}, ttl=1)
+        time.sleep(1.1)
+
+        backend.set("a", {"n": 1})
+        assert raw.zcard(PREFIX + "__keys__") == 2
+        backend.set("b", {"n": 1})
+        assert raw.zcard(PREFIX + "__keys__") == 2
+
+
+class TestRedisKeys:
+    """Tests for key listing and clearing, which SCAN under our prefix."""
+
+    def test_keys_strips_prefix(self, make_backend, raw):
+        """Test keys are listed without the prefix, across SCAN pages."""
+        backend = make_backend(scan_count=2)
+        backend.set_many({f"context:t{i}": {"n": i} for i in range(5)})
+        backend.set("session:s1", {"n": 1})
+        raw.set("other:context:t9", "{}")
+
+        assert sorted(backend.keys("context:*")) == [f"context:t{i}" for i in range(5)]
+        assert len(backend.keys()) == 6
+
+    def test_prefix_glob_characters_are_literal(self, make_backend, raw):
+        """Test glob characters in the prefix don't match other prefixes."""
+        backend = make_backend(key_prefix="app[1]:")
+        backend.set("a", {"n": 1})
+        raw.set("app1:b", "{}")
+
+        assert backend.keys() == ["a"]
+        assert backend.clear() == 1
+        assert raw.exists("app1:b")
+
+    def test_clear_leaves_other_prefixes(self, make_backend, raw):
+        """Test clearing only deletes our keys, in batches."""
+        backend = make_backend(batch_size=2)
+        backend.set_many({f"k{i}": {"n": i} for i in range(5)})
+        raw.set("other:k1", "{}")
+
+        assert backend.clear() == 5
+        assert raw.keys("*") == ["other:k1"]
+
+
+class TestRedisBatching:
+    """Tests for bulk operations split at batch_size."""
+
+    @pytest.mark.parametrize(
+        "count, mget_sizes",
+        [(1, [2]), (2, [3]), (3, [3, 1]), (5, [3, 3]), (6, [3, 3, 1])],
+    )
+    def test_set_many_and_get_many(self, monkeypatch, make_backend, raw, count, mget_sizes):
+        """Test every item survives batch boundaries, with one MGET per batch."""
+        backend = make_backend(batch_size=3)
+        items = {f"k{i}": {"n": i} for i in range(count)}
+        mget_calls = []
+        real_mget = backend._client.mget
+        monkeypatch.setattr(
+            backend._client, "mget", lambda keys: mget_calls.append(keys) or real_mget(keys)
+        )
+
+        assert backend.set_many(items, ttl=60) is True
+        assert backend.get_many([*items, "missing"]) == items
+
+        assert [len(keys) for keys in mget_calls] == mget_sizes
+        assert all(0 < raw.ttl(PREFIX + key) <= 60 for key in items)
+        assert backend.size() == count
+
+    def test_flush_crosses_batches(self, make_backend, raw):
+        """Test a write-behind flush larger than batch_size writes every key."""
+        backend = make_backend(
+            batch_size=2, write_behind_prefixes=("context:",), flush_interval=60
+        )
+        for i in range(5):
+            backend.set(f"context:t{i}", {"n": i}, ttl=60)
+
+        backend.flush()
+
+        assert sorted(raw.keys(PREFIX + "context:*")) == [
+            f"{PREFIX}context:t{i}" for i in range(5)
+        ]
+        assert backend.size() == 5
+
+
+class TestRedisPools:
+    """Tests for the connection pools shared across backends."""
+
+    def test_pool_reused_for_same_url(self, monkeypatch):
+        """Test backends on one URL share a pool, and other URLs get their own."""
+        monkeypatch.setattr(redis_backend, "_POOLS", {})
+
+        first = RedisBackend(url="redis://cache-a:6379/0")
+        second = RedisBackend(url="redis://cache-a:6379/0", key_prefix="other:")
+        other_db = RedisBackend(url="redis://cache-a:6379/1")
+        other_host = RedisBackend(url="redis://cache-b:6379/0")
+
+        pool = first._client.connection_pool
+        assert second._client.connection_pool is pool
+        assert other_db._client.connection_pool is not pool
+        assert other_host._client.connection_pool is not pool
+        assert len(redis_backend._POOLS) == 3
+
+    def test_pool_decodes_replies(self, monkeypatch):
+        """Test shared pools decode replies, as the backend expects str keys."""
+        monkeypatch.setattr(redis_backend, "_POOLS", {})
+
+        pool = redis_backend._get_pool("redis://cache-a:6379/0")
+
+        assert pool.connection_kwargs["decode_responses"] is True
+        assert redis_backend._get_pool("redis://cache-a:6379/0") is pool
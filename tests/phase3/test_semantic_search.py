@@ -2,6 +2,8 @@
 Tests for semantic search functionality.
 """
 
+import math
+
 import pytest
 from datetime import datetime
 from uuid import uuid4
@@ -42,6 +44,15 @@ class TestTaskSimilarity:
         tokens = sim.tokenize("")
         assert tokens == []
 
+    def test_tokenize_many_matches_joined_text(self):
+        """Test tokenizing parts gives the same tokens as the joined text."""
+        sim = TaskSimilarity()
+        title = "Fix API bug"
+        description = "Users cannot login via api-endpoint"
+
+        assert sim.tokenize_many(title, description) == sim.tokenize(f"{title} {description}")
+        assert sim.tokenize_many("", "") == []
+
     def test_compute_tf(self):
         """Test term frequency calculation."""
         sim = TaskSimilarity()
@@ -80,6 +91,25 @@ class TestTaskSimilarity:
         assert len(results) > 0
         assert results[0].task_id == "task-1"
 
+    def test_tag_scores_match_set_jaccard(self):
+        """Test bitmask tag scores equal set Jaccard, including unknown query tags."""
+        sim = TaskSimilarity(text_weight=0.0, tag_weight=1.0)
+        docs = {
+            "task-1": {"python", "backend"},
+            "task-2": {"python", "frontend", "ui"},
+            "task-3": {"javascript"},
+        }
+        for task_id, tags in docs.items():
+            sim.add_document(task_id, "text", list(tags))
+        sim.remove_document("task-3")
+        del docs["task-3"]
+
+        query = {"python", "backend", "unseen"}
+        results = {r.task_id: r.tag_score for r in sim.find_similar("", list(query))}
+
+        for task_id, tags in docs.items():
+            assert results[task_id] == pytest.approx(sim.jaccard_similarity(query, tags))
+
     def test_find_similar_with_text_only(self):
         """Test finding similar using only text."""
         sim = TaskSimilarity(text_weight=1.0, tag_weight=0.0)
@@ -133,6 +163,140 @@ class TestTaskSimilarity:
         results = sim.find_similar("API")
         assert all(r.task_id != "task-1" for r in results)
 
+    def test_find_similar_text_score_matches_cosine(self):
+        """Test text scores equal the cosine of the full TF-IDF vectors."""
+        sim = TaskSimilarity(text_weight=1.0, tag_weight=0.0)
+
+        sim.add_document("task-1", "API authentication bug in login api")
+        sim.add_document("task-2", "Add API rate limiting feature")
+        sim.add_document("task-3", "Update frontend styling")
+
+        query = "API login bug"
+        results = {r.task_id: r.text_score for r in sim.find_similar(query)}
+        query_tfidf = sim.compute_tfidf(sim.tokenize(query))
+
+        for task_id, text in [
+            ("task-1", "API authentication bug in login api"),
+            ("task-2", "Add API rate limiting feature"),
+            ("task-3", "Update frontend styling"),
+        ]:
+            expected = sim.cosine_similarity(query_tfidf, sim.compute_tfidf(sim.tokenize(text)))
+            assert results[task_id] == pytest.approx(expected)
+
+    def test_tfidf_cache_refreshes_after_corpus_change(self):
+        """Test cached IDF and scores are rebuilt when the corpus changes."""
+        sim = TaskSimilarity(text_weight=1.0, tag_weight=0.0)
+
+        sim.add_document("task-1", "API feature")
+        sim.add_document("task-2", "Database tuning")
+        assert sim.compute_idf("api") == pytest.approx(math.log(2))
+        assert sim.find_similar("API")[0].task_id == "task-1"
+
+        sim.add_document("task-3", "API docs")
+        assert sim.compute_idf("api") == pytest.approx(math.log(3 / 2))
+
+        sim.remove_document("task-1")
+        results = sim.find_similar("API", min_score=0.1)
+        assert [r.task_id for r in results] == ["task-3"]
+
+    def test_incremental_norms_match_full_recompute(self):
+        """Test incrementally maintained norms give the same scores as cosine."""
+        sim = TaskSimilarity(text_weight=1.0, tag_weight=0.0)
+        docs = {
+            "task-1": "api api login bug",
+            "task-2": "api rate limiting",
+            "task-3": "login page styling",
+            "task-4": "database api tuning",
+        }
+        for task_id, text in docs.items():
+            sim.add_document(task_id, text)
+            sim.find_similar("api")  # refresh between writes
+
+        sim.remove_document("task-2")
+        del docs["task-2"]
+        sim.add_document("task-5", "login api timeout")
+        docs["task-5"] = "login api timeout"
+
+        query = "api login"
+        results = {r.task_id: r.text_score for r in sim.find_similar(query)}
+        query_tfidf = sim.compute_tfidf(sim.tokenize(query))
+
+        assert set(results) == set(docs)
+        for task_id, text in docs.items():
+            expected = sim.cosine_similarity(query_tfidf, sim.compute_tfidf(sim.tokenize(text)))
+            assert results[task_id] == pytest.approx(expected)
+
+    def test_repeated_query_reuses_tokenization(self):
+        """Test repeated queries reuse the cached query TF across corpus writes."""
+        sim = TaskSimilarity(text_weight=1.0, tag_weight=0.0)
+        sim.add_document("task-1", "API feature")
+        sim.add_document("task-2", "Database tuning")
+
+        sim.find_similar("API feature")
+        sim.add_document("task-3", "API feature docs")
+        results = sim.find_similar("API feature")
+
+        assert sim._query_tf.cache_info().hits == 1
+        assert {r.task_id for r in results if r.score > 0} == {"task-1", "task-3"}
+
+    def test_find_similar_scores_only_overlapping_documents(self):
+        """Test thresholded queries return documents sharing a term or tag."""
+        sim = TaskSimilarity()
+
+        sim.add_document("task-1", "API feature", {"backend": True})
+        sim.add_document("task-2", "Frontend styling", {"ui": True})
+        sim.add_document("task-3", "Database tuning", {"backend": True})
+
+        results = sim.find_similar("API", {"backend": True}, min_score=0.01)
+
+        assert {r.task_id for r in results} == {"task-1", "task-3"}
+
+        # Without a threshold, non-overlapping documents pad the results
+        padded = sim.find_similar("API", {"backend": True})
+        assert [r.task_id for r in padded][-1] == "task-2"
+        assert padded[-1].score == 0.0
+        assert len(sim.find_similar("API", {"backend": True}, limit=2)) == 2
+
+    def test_add_document_replaces_existing(self):
+        """Test re-adding a task replaces its terms instead of double-counting."""
+        sim = TaskSimilarity()
+
+        sim.add_document("task-1", "API feature", {"backend": True})
+        sim.add_document("task-2", "Database tuning")
+        sim.add_document("task-1", "Frontend styling", {"ui": True})
+
+        assert sim.get_corpus_size() == 2
+        assert sim.find_similar("API", {"backend": True}, min_score=0.01) == []
+        assert sim.find_similar("frontend", min_score=0.01)[0].task_id == "task-1"
+
+    def test_find_similar_limit_keeps_top_scores(self):
+        """Test limit returns the highest scores in descending order."""
+        sim = TaskSimilarity(text_weight=0.0, tag_weight=1.0)
+
+        sim.add_document("task-1", "one", {"a": True})
+        sim.add_document("task-2", "two", {"a": True, "b": True, "c": True})
+        sim.add_document("task-3", "three", {"a": True, "b": True})
+        sim.add_document("task-4", "four", {"d": True})
+
+        results = sim.find_similar("query", {"a": True, "b": True, "c": True}, limit=2)
+
+        assert [r.task_id for r in results] == ["task-2", "task-3"]
+        assert results[0].score >= results[1].score
+
+    def test_find_similar_ties_keep_corpus_order(self):
+        """Test equal scores rank in insertion order, whatever the hash seed."""
+        sim = TaskSimilarity()
+        for i in range(8):
+            sim.add_document(f"task-{i}", "fix api bug", ["api"])
+
+        results = sim.find_similar("api bug", ["api"], limit=3)
+        assert [r.task_id for r in results] == ["task-0", "task-1", "task-2"]
+
+        # Re-adding a document moves it to the end of the corpus
+        sim.add_document("task-0", "fix api bug", ["api"])
+        results = sim.find_similar("api bug", ["api"], limit=3)
+        assert [r.task_id for r in results] == ["task-1", "task-2", "task-3"]
+
     def test_remove_nonexistent_document(self):
         """Test removing nonexistent document."""
         sim = TaskSimilarity()
@@ -261,6 +425,50 @@ class TestTaskSearcher:
         assert count == len(sample_tasks)
         assert searcher.get_index_size() == len(sample_tasks)
 
+    def test_index_tasks_single_query(self, count_statements, db_session, sample_tasks):
+        """Test indexing loads every task and its tags in one statement (no N+1)."""
+        searcher = TaskSearcher(db_session)
+        with count_statements() as statements:
+            searcher.index_tasks()
+            searcher.search("API authentication", tags={"api": True})
+
+        assert len(statements) == 1
+
+    def test_index_tasks_caches_metadata_from_rows(self, db_session, sample_tasks):
+        """Test indexing from column rows caches the same metadata as Task objects."""
+        searcher = TaskSearcher(db_session)
+        searcher.index_tasks()
+
+        task = sample_tasks[3]
+        results = searcher.search("database query optimization")
+
+        assert results[0].task_id == task.id
+        assert results[0].title == task.title
+        assert results[0].project == "backend"
+        assert results[0].tags == task.tags
+        assert results[0].status == "in_progress"
+        assert results[0].created_at == task.created_at
+
+    def test_index_snapshot_reused_until_tasks_change(self, db_session, sample_tasks, tmp_path, monkeypatch):
+        """Test a persisted index is loaded while unchanged and rebuilt after a write."""
+        path = tmp_path / "index.pkl"
+        TaskSearcher(db_session, persist_path=path).index_tasks()
+        assert path.exists()
+
+        indexed = []
+        monkeypatch.setattr(TaskSearcher, "_index_row", lambda self, row: indexed.append(row.id))
+
+        searcher = TaskSearcher(db_session, persist_path=path)
+        assert searcher.index_tasks() == len(sample_tasks)
+        assert indexed == []
+        assert searcher.search("API authentication")[0].task_id == sample_tasks[0].id
+
+        sample_tasks[2].title = "Restyle homepage"
+        db_session.flush()
+
+        TaskSearcher(db_session, persist_path=path).index_tasks()
+        assert len(indexed) == len(sample_tasks)
+
     def test_search_by_text(self, db_session, sample_tasks):
         """Test searching by text."""
         searcher = TaskSearcher(db_session)
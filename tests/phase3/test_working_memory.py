@@ -9,6 +9,7 @@ from datetime import datetime
 from hopper.memory.working import RoutingContext, WorkingMemory
 from hopper.memory.working.backends import LocalBackend
 from hopper.memory.working.context import InstanceInfo, RecentDecision, SimilarTask
+from hopper.models import RoutingDecision
 
 
 class TestLocalBackend:
@@ -98,6 +99,45 @@ class TestLocalBackend:
         assert len(session_keys) == 1
         assert len(all_keys) == 3
 
+    def test_keys_pattern_shapes(self, local_backend: LocalBackend):
+        """Test exact, suffix and general glob patterns, skipping expired keys."""
+        local_backend.set("suggestions:task-1:5", {"a": 1})
+        local_backend.set("suggestions:task-2:5", {"b": 2})
+        local_backend.set("suggestions:task-1:10", {"c": 3})
+        local_backend.set("suggestions:task-3:5", {"d": 4}, ttl=-1)
+
+        assert local_backend.keys("suggestions:task-1:5") == ["suggestions:task-1:5"]
+        assert local_backend.keys("suggestions:task-3:5") == []
+        assert sorted(local_backend.keys("*:5")) == [
+            "suggestions:task-1:5",
+            "suggestions:task-2:5",
+        ]
+        assert sorted(local_backend.keys("suggestions:task-?:*")) == [
+            "suggestions:task-1:10",
+            "suggestions:task-1:5",
+            "suggestions:task-2:5",
+        ]
+        assert local_backend.size() == 3
+
+    def test_clear_expired_skips_overwritten_ttl(self, local_backend: LocalBackend):
+        """Test a stale expiry entry does not remove a key re-set with a longer TTL."""
+        local_backend.set("key", {"v": 1}, ttl=-1)
+        local_backend.set("key", {"v": 2}, ttl=60)
+        local_backend.set("gone", {"v": 3}, ttl=-1)
+
+        assert local_backend.clear_expired() == 1
+        assert local_backend.get("key") == {"v": 2}
+
+    def test_expiry_heap_stays_bounded(self):
+        """Test repeatedly re-setting keys with a TTL compacts stale heap entries."""
+        backend = LocalBackend(max_entries=10)
+
+        for i in range(1000):
+            backend.set(f"key-{i % 5}", {"i": i}, ttl=60)
+
+        assert backend.size() == 5
+        assert len(backend._expiry_heap) <= 2 * 5 + 64 + 1
+
     def test_max_entries_eviction(self):
         """Test that entries are evicted when max is reached."""
         backend = LocalBackend(max_entries=3)
@@ -111,6 +151,19 @@ class TestLocalBackend:
         assert backend.get("key1") is None  # Evicted
         assert backend.get("key4") is not None
 
+    def test_eviction_keeps_recently_read_entries(self):
+        """Test eviction drops the least recently used entry, not the oldest."""
+        backend = LocalBackend(max_entries=3)
+
+        backend.set("key1", {"a": 1})
+        backend.set("key2", {"b": 2})
+        backend.set("key3", {"c": 3})
+        backend.get("key1")
+        backend.set("key4", {"d": 4})  # Should evict key2
+
+        assert backend.get("key1") is not None
+        assert backend.get("key2") is None
+
     def test_get_stats(self, local_backend: LocalBackend):
         """Test getting backend statistics."""
         local_backend.set("key1", {"a": 1})
@@ -156,6 +209,20 @@ class TestRoutingContext:
         missing = sample_routing_context.get_instance_by_id("nonexistent")
         assert missing is None
 
+    def test_get_instance_by_id_tracks_instance_changes(
+        self, sample_routing_context: RoutingContext
+    ):
+        """Test the instance lookup follows appended and replaced instance lists."""
+        assert sample_routing_context.get_instance_by_id("inst-new") is None
+
+        new = InstanceInfo(instance_id="inst-new", name="new", scope="project", status="running")
+        sample_routing_context.available_instances.append(new)
+        assert sample_routing_context.get_instance_by_id("inst-new") is new
+
+        sample_routing_context.available_instances = [new]
+        assert sample_routing_context.get_instance_by_id("inst-1") is None
+        assert sample_routing_context.get_instance_by_id("inst-new") is new
+
     def test_get_instances_with_capacity(self, sample_routing_context: RoutingContext):
         """Test getting instances with remaining capacity."""
         with_capacity = sample_routing_context.get_instances_with_capacity()
@@ -253,6 +320,47 @@ class TestWorkingMemory:
         assert len(retrieved.similar_tasks) == 1
         assert retrieved.similar_tasks[0].task_id == "similar-1"
 
+    def test_pattern_matches_cache(self, monkeypatch, working_memory: WorkingMemory):
+        """Test pattern matches are cached by tag names, priority and title."""
+        matches = [
+            {"pattern_id": "pat-1", "pattern_name": "api", "target_instance": "api-instance", "score": 1.0}
+        ]
+        working_memory.set_pattern_matches({"api": True, "python": True}, "high", "Add API", 3, matches)
+
+        # Tag order and values don't matter; title case doesn't either
+        assert working_memory.get_pattern_matches(["python", "api"], "high", "add api", 3) == matches
+        assert working_memory.get_pattern_matches({"api": True}, "high", "Add API", 3) is None
+        assert working_memory.get_pattern_matches({"api": True, "python": True}, "low", "Add API", 3) is None
+
+        working_memory.set_suggestions("task-1", 3, [{"target_instance": "api-instance"}])
+
+        # Clearing bumps the generation instead of scanning for entries, and
+        # takes the suggestions built from the matches with it
+        def fail(*args, **kwargs):
+            raise AssertionError("clearing pattern matches should not scan keys")
+
+        monkeypatch.setattr(working_memory._backend, "keys", fail)
+        working_memory.clear_pattern_matches()
+        assert working_memory.get_pattern_matches(["api", "python"], "high", "Add API", 3) is None
+        assert working_memory.get_suggestions("task-1", 3) is None
+
+    def test_suggestions_cache(self, monkeypatch, working_memory: WorkingMemory):
+        """Test suggestions are kept per task and sliced for smaller limits."""
+        suggestions = [{"target_instance": f"inst-{i}"} for i in range(5)]
+        working_memory.set_suggestions("task-1", 5, suggestions)
+
+        assert working_memory.get_suggestions("task-1", 2) == suggestions[:2]
+        assert working_memory.get_suggestions("task-1", 5) == suggestions
+        assert working_memory.get_suggestions("task-1", 6) is None
+
+        # Dropping one task's suggestions doesn't scan the keyspace
+        def fail(*args, **kwargs):
+            raise AssertionError("per-task invalidation should not scan keys")
+
+        monkeypatch.setattr(working_memory._backend, "keys", fail)
+        assert working_memory.invalidate_suggestions("task-1") is True
+        assert working_memory.get_suggestions("task-1", 2) is None
+
     def test_get_stats(
         self,
         working_memory: WorkingMemory,
@@ -280,6 +388,122 @@ class TestWorkingMemory:
         assert cleared >= 1
         assert working_memory.get_context(sample_routing_context.task_id) is None
 
+    def test_get_context_cached_in_process(
+        self,
+        working_memory: WorkingMemory,
+        sample_routing_context: RoutingContext,
+    ):
+        """Test decoded contexts are reused until the context is stored again."""
+        working_memory.set_context(sample_routing_context)
+        task_id = sample_routing_context.task_id
+
+        first = working_memory.get_context(task_id)
+        assert working_memory.get_context(task_id) is first
+
+        first.task_priority = "high"
+        working_memory.set_context(first)
+        refreshed = working_memory.get_context(task_id)
+        assert refreshed is not first
+        assert refreshed.task_priority == "high"
+
+        working_memory.delete_context(task_id)
+        assert working_memory.get_context(task_id) is None
+
+    def test_get_context_cache_disabled(self, sample_routing_context: RoutingContext):
+        """Test a zero context cache TTL decodes on every read."""
+        memory = WorkingMemory(context_cache_ttl=0)
+        memory.set_context(sample_routing_context)
+        task_id = sample_routing_context.task_id
+
+        assert memory.get_context(task_id) is not memory.get_context(task_id)
+
+    def test_get_context_uncached_copy(
+        self,
+        working_memory: WorkingMemory,
+        sample_routing_context: RoutingContext,
+    ):
+        """Test cache=False returns a private copy that doesn't leak into later reads."""
+        working_memory.set_context(sample_routing_context)
+        task_id = sample_routing_context.task_id
+        shared = working_memory.get_context(task_id)
+
+        private = working_memory.get_context(task_id, cache=False)
+        assert private is not shared
+        private.task_priority = "urgent"
+        assert working_memory.get_context(task_id).task_priority == shared.task_priority
+
+    def test_context_cache_respects_context_ttl(self, sample_routing_context: RoutingContext):
+        """Test a cached context is not returned after its backend TTL runs out."""
+        memory = WorkingMemory(backend=LocalBackend(), context_cache_ttl=60)
+        memory.set_context(sample_routing_context, ttl=1)
+        task_id = sample_routing_context.task_id
+        assert memory.get_context(task_id) is memory.get_context(task_id)
+
+        time.sleep(1.1)
+
+        assert memory.get_context(task_id, cache=False) is None
+        assert memory.get_context(task_id) is None
+
+    def test_context_cache_off_for_shared_backends(self, sample_routing_context: RoutingContext):
+        """Test the in-process cache defaults off for backends other processes write."""
+
+        class SharedBackend(LocalBackend):
+            shared = True
+
+        memory = WorkingMemory(backend=SharedBackend())
+        memory.set_context(sample_routing_context)
+        task_id = sample_routing_context.task_id
+
+        assert memory.get_context(task_id) is not memory.get_context(task_id)
+
+    def test_update_decision_outcome(
+        self,
+        working_memory: WorkingMemory,
+        sample_routing_context: RoutingContext,
+    ):
+        """Test decision outcomes are updated in every context that records them."""
+        other = RoutingContext.from_dict(sample_routing_context.to_dict())
+        other.task_id = "task-other"
+        other.recent_decisions = []
+        working_memory.set_context(sample_routing_context)
+        working_memory.set_context(other)
+
+        assert working_memory.update_decision_outcome("task-recent-1", "failure") is True
+
+        updated = working_memory.get_context(sample_routing_context.task_id)
+        assert updated.recent_decisions[0].outcome == "failure"
+        assert working_memory.get_context("task-other").recent_decisions == []
+
+    def test_update_decision_outcome_uses_index(
+        self,
+        working_memory: WorkingMemory,
+        sample_routing_context: RoutingContext,
+        monkeypatch,
+    ):
+        """Test outcome updates find contexts through the decision index, not a scan."""
+        working_memory.set_context(sample_routing_context)
+        # Index entries survive a context delete and must be skipped
+        stale = RoutingContext.from_dict(sample_routing_context.to_dict())
+        stale.task_id = "task-stale"
+        working_memory.set_context(stale)
+        working_memory.delete_context("task-stale")
+
+        backend = working_memory._backend
+        assert set(backend.get_members("decision_index:task-recent-1")) == {
+            "context:task-stale",
+            f"context:{sample_routing_context.task_id}",
+        }
+
+        def fail_scan(pattern="*"):
+            raise AssertionError("update_decision_outcome scanned the keyspace")
+
+        monkeypatch.setattr(backend, "keys", fail_scan)
+        assert working_memory.update_decision_outcome("task-recent-1", "success") is True
+
+        updated = working_memory.get_context(sample_routing_context.task_id)
+        assert updated.recent_decisions[0].outcome == "success"
+        assert working_memory.get_context("task-stale") is None
+
     def test_from_config_local(self):
         """Test creating from config with local backend."""
         config = {
@@ -296,6 +520,21 @@ class TestWorkingMemory:
         assert stats["default_ttl"] == 600
 
 
+    def test_from_config_compressed_context_roundtrip(
+        self,
+        sample_routing_context: RoutingContext,
+    ):
+        """Test contexts round-trip through a compressing local backend."""
+        memory = WorkingMemory.from_config({"backend": "local", "compress": True})
+
+        memory.set_context(sample_routing_context)
+        retrieved = memory.get_context(sample_routing_context.task_id)
+
+        assert retrieved is not None
+        assert retrieved.to_dict() == sample_routing_context.to_dict()
+        assert isinstance(memory._backend._store[f"context:{sample_routing_context.task_id}"][0], bytes)
+
+
 class TestContextIntegration:
     """Integration tests for working memory with database."""
 
@@ -323,6 +562,33 @@ class TestContextIntegration:
         assert "python" in webapp_inst.capabilities
         assert "dashboard" in webapp_inst.capabilities
 
+    def test_context_includes_recent_decisions(
+        self,
+        working_memory: WorkingMemory,
+        db_session,
+        count_statements,
+        sample_task_for_memory,
+        instances_for_memory,
+    ):
+        """Test recent decisions carry task titles and are loaded in one query."""
+        db_session.add(
+            RoutingDecision(
+                task_id=sample_task_for_memory.id,
+                confidence=0.8,
+                decided_at=datetime.utcnow(),
+            )
+        )
+        db_session.flush()
+
+        with count_statements() as statements:
+            recent = working_memory._get_recent_decisions(db_session)
+
+        assert len(statements) == 1
+        assert recent[0].task_id == sample_task_for_memory.id
+        assert recent[0].task_title == sample_task_for_memory.title
+        assert recent[0].confidence == 0.8
+        assert recent[0].routed_to == ""
+
     def test_context_reflects_instance_load(
         self,
         working_memory: WorkingMemory,